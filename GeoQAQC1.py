@@ -1,15 +1,35 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
-from io import StringIO
-import base64
+import os
+import uuid
+from functools import partial
+from io import BytesIO
+
+from geoqaqc import defaults, diagnostics, jobs
+from geoqaqc.diagnostics import Recorder, stage
+from geoqaqc.jobs import JobManager
+from geoqaqc.lazy import lazy_import
+
+# Modules d'analyse et de tracé (numpy, pandas, plotly), importés au premier
+# usage : le premier affichage d'une session n'en charge aucun
+np = lazy_import("numpy")
+batch = lazy_import("geoqaqc.batch")
+carryover = lazy_import("geoqaqc.carryover")
+censored = lazy_import("geoqaqc.censored")
+certificates = lazy_import("geoqaqc.certificates")
+charts = lazy_import("geoqaqc.charts")
+control_rules = lazy_import("geoqaqc.control_rules")
+engine = lazy_import("geoqaqc.engine")
+export = lazy_import("geoqaqc.export")
+ingestion = lazy_import("geoqaqc.ingestion")
+memo = lazy_import("geoqaqc.memo")
+multi = lazy_import("geoqaqc.multi")
+precision = lazy_import("geoqaqc.precision")
+results_view = lazy_import("geoqaqc.results_view")
 
 # Configuration de la page
 st.set_page_config(
     page_title="GeoQAQC",
-    page_icon="📊",
+    page_icon=":material/bar_chart:",
     layout="wide"
 )
 
@@ -24,493 +44,1841 @@ st.sidebar.markdown("**Version:** 1.0.0")
 st.title("GeoQAQC")
 st.markdown("### Contrôle Qualité des Analyses Chimiques des Roches")
 
-# Onglets
-tabs = st.tabs(["Type de Contrôle", "Importation des Données", "Analyse"])
+# Paramètres de la session : valeurs par défaut à la première exécution, puis
+# réaffectés à chaque exécution, car Streamlit oublie l'état des widgets
+# absents d'une exécution (onglets non affichés)
+def bootstrap_session():
+    for key, value in defaults.SESSION_DEFAULTS.items():
+        st.session_state[key] = st.session_state.get(key, value)
+    for key in defaults.SESSION_PARAMETERS:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+bootstrap_session()
+
+# Onglets : seul l'onglet affiché est exécuté
+tabs = st.tabs(
+    ["Type de Contrôle", "Importation des Données", "Analyse", "Historique"],
+    key="main_tab",
+    on_change="rerun"
+)
 
 with tabs[0]:
-    st.header("Choisir le Type de Carte de Contrôle")
+    if tabs[0].open:
+        st.header("Choisir le Type de Carte de Contrôle")
+        
+        control_type = st.selectbox(
+            "Type de contrôle:",
+            [
+                "Standards CRM",
+                "Blancs",
+                "Duplicatas (nuage de points et régression)",
+                "Tableau de bord multi-élément (CRM, blancs, duplicatas)",
+            ],
+            key="control_type"
+        )
+        
+        if control_type in ("Standards CRM", "Tableau de bord multi-élément (CRM, blancs, duplicatas)"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                if control_type == "Standards CRM":
+                    reference_value = st.number_input(
+                        "Valeur de référence:",
+                        min_value=0.0,
+                        step=0.0001,
+                        format="%.4f",
+                        key="reference_value"
+                    )
+                    
+                    reference_stddev = st.number_input(
+                        "Écart-type de référence:",
+                        min_value=0.0,
+                        step=0.0001,
+                        format="%.4f",
+                        key="reference_stddev"
+                    )
+                else:
+                    st.info(
+                        "Les CRM de tous les éléments sont évalués contre la base de certificats, "
+                        "avec la tolérance choisie ici."
+                    )
+            
+            with col2:
+                tolerance_type = st.radio(
+                    "Type de tolérance:",
+                    [defaults.TOLERANCE_PERCENT, defaults.TOLERANCE_STDDEV],
+                    key="tolerance_type"
+                )
+                
+                if tolerance_type == defaults.TOLERANCE_PERCENT:
+                    tolerance_value = st.number_input(
+                        "Tolérance (%):",
+                        min_value=0.0,
+                        max_value=100.0,
+                        step=0.1,
+                        key="tolerance_percent"
+                    )
+                else:
+                    tolerance_value = st.number_input(
+                        "Multiple de l'écart-type:",
+                        min_value=0.0,
+                        step=0.1,
+                        key="tolerance_stddev"
+                    )
+
+# Cache d'ingestion partagé entre réexécutions et sessions, borné en mémoire
+INGESTION_CACHE_MAX_BYTES = int(os.environ.get("GEOQAQC_INGESTION_CACHE_MB", "1024")) * 2 ** 20
+
+@st.cache_resource
+def get_ingestion_cache():
+    return ingestion.IngestionCache(max_entries=8, max_bytes=INGESTION_CACHE_MAX_BYTES)
+
+def show_ingestion_stats():
+    stats = get_ingestion_cache().stats()
+    st.caption(
+        f"Cache d'ingestion : {stats['hits']} succès, {stats['misses']} échecs, "
+        f"{stats['entries']}/{stats['max_entries']} fichiers en mémoire, "
+        f"{stats['bytes'] / 2 ** 20:.1f}/{stats['max_bytes'] / 2 ** 20:.0f} Mo."
+    )
+
+# Source en lecture continue, partagée tant que le fichier n'a pas changé
+@st.cache_resource(max_entries=4)
+def get_streaming_source(path, separator, chunksize, mtime):
+    return ingestion.StreamingSource(path, separator, chunksize=chunksize)
+
+# Colonnes nécessaires à l'analyse, depuis la mémoire ou la source en continu.
+# La source est résolue dans le fil de la session : les tâches en arrière-plan
+# n'ont pas accès à st.session_state.
+def current_source():
+    source = st.session_state.get("data_source")
+    return st.session_state.data if source is None else source
+
+def read_columns(source, columns, numeric_columns, progress=None):
+    with stage("Lecture des colonnes") as current:
+        if isinstance(source, ingestion.StreamingSource):
+            frame = source.load(columns, numeric_columns, progress=progress)[columns]
+        else:
+            frame = source[columns].copy()
+        current.rows = len(frame)
+    return frame
+
+def load_analysis_columns(columns, numeric_columns):
+    return read_columns(current_source(), columns, numeric_columns)
+
+# Base de certificats CRM, chargée une fois par processus
+CERTIFICATES_PATH = os.environ.get("GEOQAQC_CERTIFICATES", "crm_certificates.csv")
+
+@st.cache_resource
+def get_certificate_store(path, mtime):
+    return certificates.CertificateStore.from_csv(path)
+
+@st.cache_resource(max_entries=4)
+def get_uploaded_certificate_store(content):
+    return certificates.CertificateStore.from_csv(BytesIO(content))
+
+def load_certificate_store():
+    if os.path.exists(CERTIFICATES_PATH):
+        return get_certificate_store(CERTIFICATES_PATH, os.path.getmtime(CERTIFICATES_PATH))
+    return None
+
+# Base de certificats locale, sinon table chargée par l'utilisateur ;
+# (None, fichier) si la table chargée est illisible
+def select_certificate_store(key):
+    store = load_certificate_store()
+    certificate_file = None
+    if store is None:
+        certificate_file = st.file_uploader(
+            "Table des certificats CRM (colonnes crm_id, element, method, value, std_dev):",
+            type=["csv", "txt"],
+            key=key
+        )
+        if certificate_file is not None:
+            try:
+                store = get_uploaded_certificate_store(certificate_file.getvalue())
+            except Exception as e:
+                st.error(f"Erreur lors du chargement des certificats: {e}")
+    return store, certificate_file
+
+# Empreinte de la base de certificats, pour indexer les résultats mémoïsés
+def certificate_store_key(certificate_file=None):
+    if certificate_file is not None:
+        return ingestion.content_key(certificate_file.getvalue(), "")
+    return (CERTIFICATES_PATH, os.path.getmtime(CERTIFICATES_PATH))
+
+# Paramètres de tolérance choisis dans l'onglet 'Type de Contrôle'
+def get_tolerance_settings():
+    tolerance_type = st.session_state.tolerance_type
+    if tolerance_type == defaults.TOLERANCE_PERCENT:
+        return tolerance_type, st.session_state.tolerance_percent
+    return tolerance_type, st.session_state.tolerance_stddev
+
+# Rendu WebGL avec réduction des séries au-delà de ce nombre de points
+LARGE_DATA_THRESHOLD = 20_000
+
+def use_large_rendering(n_points, render_mode=None):
+    if render_mode is None:
+        render_mode = st.session_state.get("render_mode", "Automatique")
+    if render_mode == "Automatique":
+        return n_points > LARGE_DATA_THRESHOLD
+    return render_mode == "Grands jeux de données"
+
+def show_chart(fig, large, description):
+    with traced("Affichage"), stage("Envoi du graphique"):
+        st.plotly_chart(fig, use_container_width=True)
+    if large:
+        st.caption(
+            f"Rendu grands jeux de données : {description}, "
+            f"environ {charts.payload_size(fig) / 1024:.0f} Ko de données envoyés au navigateur."
+        )
+
+# Résultats d'analyse et figures mémoïsés, partagés entre réexécutions et sessions
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("GEOQAQC_RESULT_CACHE_MB", "512")) * 2 ** 20
+
+@st.cache_resource
+def get_result_cache():
+    return memo.ResultCache(max_bytes=RESULT_CACHE_MAX_BYTES)
+
+def result_key(key):
+    return (st.session_state.get("data_key"), st.session_state.get("render_mode")) + tuple(key)
+
+def show_result_cache_stats():
+    stats = get_result_cache().stats()
+    st.caption(
+        f"Cache des analyses : {stats['hits']} succès, {stats['misses']} échecs, "
+        f"{stats['entries']} résultats, {stats['bytes'] / 2 ** 20:.1f}/{stats['max_bytes'] / 2 ** 20:.0f} Mo."
+    )
+
+# Analyses en arrière-plan : pool de fils borné partagé par les sessions
+JOB_WORKERS = int(os.environ.get("GEOQAQC_JOB_WORKERS", jobs.DEFAULT_MAX_WORKERS))
+JOB_POLL_SECONDS = 0.5
+# Une analyse rapide est attendue brièvement pour s'afficher sans barre de progression
+JOB_WAIT_SECONDS = 0.5
+
+@st.cache_resource
+def get_job_manager():
+    return JobManager(max_workers=JOB_WORKERS)
+
+def session_owner():
+    if "session_owner" not in st.session_state:
+        st.session_state.session_owner = uuid.uuid4().hex
+    return st.session_state.session_owner
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def render_job_progress(job_id):
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    if job.status == jobs.JOB_QUEUED:
+        stats = manager.stats()
+        text = f"{job.label} : en attente ({stats['running']}/{stats['workers']} analyses en cours, {stats['queued']} en attente)"
+    elif job.cancel_requested:
+        text = f"{job.label} : annulation..."
+    else:
+        text = f"{job.label} : {job.message or 'en cours'} ({job.elapsed:.0f} s)"
+    st.progress(job.progress, text=text)
+    if st.button("Annuler", key=f"cancel_{job_id}", disabled=job.cancel_requested):
+        manager.cancel(job_id)
+        st.rerun()
+
+# Résultat de compute(progress=...) calculé en arrière-plan et mémoïsé ;
+# None tant que la tâche n'est pas terminée (la barre de progression est affichée)
+def background_result(section, key, compute, label):
+    key = result_key(key)
+    manager = get_job_manager()
+    state_key = f"{section}_job"
+    job = manager.get(st.session_state.get(state_key))
+    if job is None or job.key != key:
+        if job is not None:
+            manager.cancel(job.id)
+        cache = get_result_cache()
+        found, value = cache.lookup(key)
+        if found:
+            return value
+        recorder = get_recorder()
+        owner = session_owner()
+        
+        def run(progress):
+            with recorder.trace(owner, label), stage("Analyse complète"):
+                return cache.get_or_compute(key, partial(compute, progress=progress))
+        
+        job = manager.submit(owner, run, key=key, label=label)
+        st.session_state[state_key] = job.id
+        job.wait(JOB_WAIT_SECONDS)
+    
+    if job.status == jobs.JOB_DONE:
+        return job.result
+    if job.status == jobs.JOB_FAILED:
+        raise job.error
+    if job.status == jobs.JOB_CANCELLED:
+        st.info("Analyse annulée.")
+        return None
+    render_job_progress(job.id)
+    return None
+
+# Un nouveau clic relance une analyse annulée ou en échec
+def reset_finished_job(section):
+    job = get_job_manager().get(st.session_state.get(f"{section}_job"))
+    if job is not None and job.status in (jobs.JOB_CANCELLED, jobs.JOB_FAILED):
+        del st.session_state[f"{section}_job"]
+
+# La demande d'analyse est gardée en session : le résultat reste affiché
+# après une autre interaction ou un changement d'onglet
+def analysis_requested(section, params):
+    params = (st.session_state.get("data_key"),) + tuple(params)
+    state_key = f"{section}_requested"
+    if st.button("Générer la Carte de Contrôle", key=f"{section}_generate"):
+        st.session_state[state_key] = params
+        reset_finished_job(section)
+    return st.session_state.get(state_key) == params
+
+# Tableau paginé : filtrage, tri et pagination relancent seulement ce fragment
+@st.fragment
+def render_results_table(results_df, flagged, key, flag_label, highlight_column=None):
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        only_flagged = st.checkbox(f"{flag_label} seulement", key=f"{key}_only_flagged")
+    with col2:
+        sort_column = st.selectbox(
+            "Trier par:",
+            [None] + list(results_df.columns),
+            format_func=lambda column: "Ordre d'origine" if column is None else str(column),
+            key=f"{key}_sort_column"
+        )
+        descending = st.checkbox("Ordre décroissant", key=f"{key}_descending")
+    with col3:
+        page_size = st.selectbox("Lignes par page:", results_view.PAGE_SIZES, key=f"{key}_page_size")
+    with col4:
+        page = st.number_input("Page:", min_value=1, value=1, step=1, key=f"{key}_page")
     
-    control_type = st.selectbox(
-        "Type de contrôle:",
-        ["Standards CRM", "Blancs", "Duplicatas (nuage de points et régression)"],
-        key="control_type"
+    view = results_view.paginate(
+        results_df,
+        flagged,
+        only_flagged=only_flagged,
+        sort_column=sort_column,
+        ascending=not descending,
+        page=page,
+        page_size=page_size
     )
+    st.caption(f"{view.n_rows} lignes, page {view.page} sur {view.n_pages}.")
     
-    if control_type == "Standards CRM":
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            reference_value = st.number_input(
-                "Valeur de référence:",
-                min_value=0.0,
-                step=0.0001,
-                format="%.4f",
-                key="reference_value"
-            )
-            
-            reference_stddev = st.number_input(
-                "Écart-type de référence:",
-                min_value=0.0,
-                step=0.0001,
-                format="%.4f",
-                key="reference_stddev"
+    with traced("Affichage"), stage("Mise en forme du tableau", rows=len(view.frame)):
+        if highlight_column is not None:
+            st.dataframe(results_view.style_page(view, highlight_column))
+        else:
+            st.dataframe(view.frame)
+
+# Boutons de téléchargement ; les fichiers ne sont produits qu'au clic,
+# hors du fil du script : la session est passée explicitement à la trace
+def traced_export(owner, export_function, data, fmt, rows):
+    with get_recorder().trace(owner, "Export"), stage(f"Export {fmt}", rows=rows):
+        return export_function(data, fmt)
+
+def render_downloads(results_df, base_name, key):
+    formats = export.available_formats()
+    for column, fmt in zip(st.columns(len(formats)), formats):
+        with column:
+            st.download_button(
+                f"Télécharger les résultats ({fmt})",
+                data=partial(traced_export, session_owner(), export.export_frame, results_df, fmt, len(results_df)),
+                file_name=export.file_name(base_name, fmt),
+                mime=export.mime_type(fmt),
+                on_click="ignore",
+                key=f"{key}_download_{fmt}"
             )
-        
-        with col2:
-            tolerance_type = st.radio(
-                "Type de tolérance:",
-                ["Pourcentage (%)", "Multiple de l'écart-type"],
-                key="tolerance_type"
+
+def render_archive_downloads(frames, base_name, key):
+    formats = export.available_formats()
+    for column, fmt in zip(st.columns(len(formats)), formats):
+        with column:
+            st.download_button(
+                f"Télécharger l'archive ({fmt})",
+                data=partial(
+                    traced_export, session_owner(), export.export_archive, frames, fmt,
+                    sum(len(frame) for frame in frames.values())
+                ),
+                file_name=f"{base_name}.zip",
+                mime="application/zip",
+                on_click="ignore",
+                key=f"{key}_archive_{fmt}"
             )
-            
-            if tolerance_type == "Pourcentage (%)":
-                tolerance_value = st.number_input(
-                    "Tolérance (%):",
-                    min_value=0.0,
-                    max_value=100.0,
-                    value=10.0,
-                    step=0.1,
-                    key="tolerance_percent"
-                )
-            else:
-                tolerance_value = st.number_input(
-                    "Multiple de l'écart-type:",
-                    min_value=0.0,
-                    value=2.0,
-                    step=0.1,
-                    key="tolerance_stddev"
-                )
+
+# États persistés des cartes de contrôle (Westgard, CUSUM, EWMA, Welford)
+DATA_DIR = os.environ.get("GEOQAQC_DATA_DIR", ".geoqaqc")
+
+# Seuls les fichiers de ce répertoire peuvent être ouverts en lecture continue
+STREAM_DIR = os.environ.get("GEOQAQC_STREAM_DIR", os.path.join(DATA_DIR, "imports"))
+
+@st.cache_resource
+def get_control_state_store():
+    return control_rules.ControlStateStore(os.path.join(DATA_DIR, "control_states"))
+
+# Mesures par étape (durée, pic mémoire, lignes), journalisées en lignes JSON ;
+# GEOQAQC_DIAGNOSTICS_LOG vide désactive le journal
+DIAGNOSTICS_LOG = os.environ.get("GEOQAQC_DIAGNOSTICS_LOG", os.path.join(DATA_DIR, "diagnostics.jsonl"))
+
+@st.cache_resource
+def get_recorder():
+    return Recorder(log_path=DIAGNOSTICS_LOG or None)
+
+def traced(section):
+    return get_recorder().trace(session_owner(), section)
+
+def render_diagnostics():
+    st.checkbox(
+        "Mesurer le pic mémoire (tracemalloc)",
+        value=diagnostics.tracemalloc.is_tracing(),
+        key="diagnostics_tracemalloc",
+        on_change=lambda: diagnostics.set_memory_tracing(st.session_state.diagnostics_tracemalloc),
+        help="Réglage commun à tout le serveur ; ralentit les analyses pendant la mesure."
+    )
+    records = get_recorder().records(session=session_owner())
+    if not records:
+        st.caption("Aucune mesure pour cette session.")
+    else:
+        columns = ["section", "stage", "wall_ms", "rows", "peak_mb", "max_rss_mb", "error"]
+        st.dataframe([{column: record[column] for column in columns} for record in reversed(records[-100:])])
+    if DIAGNOSTICS_LOG:
+        st.caption(f"Journal : {DIAGNOSTICS_LOG}")
+    st.button("Actualiser", key="diagnostics_refresh")
+
+@st.fragment
+def render_history_update(crm_id, element, values, target, sigma):
+    store = get_control_state_store()
+    state = store.load(crm_id, element)
+    if state is not None:
+        st.caption(
+            f"Historique {crm_id} / {element} : {state.count} résultats, "
+            f"moyenne {state.mean:.4f}, écart-type {state.std_dev:.4f}."
+        )
+    
+    if st.button("Ajouter ce lot à l'historique", key=f"history_{crm_id}_{element}"):
+        try:
+            state, flags = store.append(crm_id, element, values, target, sigma)
+        except ValueError as e:
+            st.warning(str(e))
+            return
+        st.success(f"Lot ajouté : {len(values)} résultats, {state.count} au total.")
+        st.dataframe(control_rules.rule_summary(flags).T)
+
+# Historique local indexé des résultats importés
+HISTORY_QUERY_LIMIT = 200_000
+
+@st.cache_resource
+def get_history_store():
+    from geoqaqc.history import HistoryStore
+    
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return HistoryStore(os.path.join(DATA_DIR, "history.sqlite"))
+
+@st.fragment
+def render_history_import(crm_column, sample_column, element_columns, result):
+    st.subheader("Enregistrer dans l'historique local")
+    
+    data_key = st.session_state.get("data_key")
+    if data_key is None:
+        st.info("L'empreinte des données importées est inconnue ; veuillez réimporter le fichier.")
+        return
+    
+    df = st.session_state.data
+    optional_columns = [None] + list(df.columns)
+    column_label = lambda column: "(aucune)" if column is None else str(column)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        lab = st.text_input("Laboratoire:", key="history_lab")
+    with col2:
+        date_column = st.selectbox("Colonne de date:", optional_columns, format_func=column_label, key="history_date_column")
+    with col3:
+        batch_column = st.selectbox("Colonne de lot/certificat:", optional_columns, format_func=column_label, key="history_batch_column")
+    
+    store = get_history_store()
+    if store.has_certificate(data_key):
+        st.caption("Ce fichier est déjà enregistré dans l'historique.")
+    elif st.button("Enregistrer", key="history_import"):
+        columns = [column for column in [crm_column, sample_column, date_column, batch_column] if column is not None]
+        frame = load_analysis_columns(list(dict.fromkeys(columns + element_columns)), element_columns)
+        evaluated, failed = batch.row_flags(frame, crm_column, element_columns, result)
+        n_results = store.import_results(
+            frame,
+            data_key,
+            element_columns,
+            crm_column=crm_column,
+            source_name=st.session_state.get("data_name"),
+            lab=lab.strip() or None,
+            batch_column=batch_column,
+            date_column=date_column,
+            sample_column=sample_column,
+            evaluated=evaluated,
+            failed=failed
+        )
+        if n_results is None:
+            st.caption("Ce fichier est déjà enregistré dans l'historique.")
+        else:
+            st.success(f"{n_results} résultats enregistrés dans l'historique.")
+
+# LOD des blancs mise à jour lot par lot à partir de l'état de Welford
+BLANK_HISTORY_ID = "Blancs"
+
+@st.fragment
+def render_blank_history(element, values, mean, std_dev):
+    store = get_control_state_store()
+    state = store.load(BLANK_HISTORY_ID, element)
+    if state is not None:
+        st.markdown(f"**LOD historique ({state.count} blancs):** {state.mean + 3 * state.std_dev:.4f}")
+    
+    if st.button("Ajouter ces blancs à l'historique", key=f"blank_history_{element}"):
+        try:
+            state, _ = store.append(BLANK_HISTORY_ID, element, values, mean, std_dev)
+        except ValueError as e:
+            st.warning(str(e))
+            return
+        st.success(f"LOD historique mise à jour : {state.mean + 3 * state.std_dev:.4f} sur {state.count} blancs.")
+
+# Précision des duplicatas : HARD/HRD et Thompson-Howarth
+def render_precision_section(precision_result, hard_threshold):
+    st.subheader("Précision")
+    
+    st.markdown(
+        f"**Paires avec HARD ≤ {hard_threshold:g}%:** {precision_result.hard_within_threshold_pct:.1f}% "
+        f"(HARD au {precision.HARD_PERCENTILE:g}e centile : {precision_result.hard_percentile_value:.2f}%)"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        ranks, quantiles = precision.percentile_curve(precision_result.hard)
+        st.plotly_chart(
+            charts.percentile_figure(ranks, quantiles, "HARD par rang centile", "HARD (%)", hard_threshold),
+            use_container_width=True
+        )
+    with col2:
+        ranks, quantiles = precision.percentile_curve(precision_result.hrd)
+        st.plotly_chart(
+            charts.percentile_figure(ranks, quantiles, "HRD par rang centile", "HRD (%)"),
+            use_container_width=True
+        )
+    
+    th = precision_result.thompson_howarth
+    if th is None:
+        st.info(f"Au moins {2 * precision.TH_GROUP_SIZE} paires sont nécessaires pour la méthode de Thompson-Howarth.")
+        return
+    st.plotly_chart(charts.thompson_howarth_figure(th, "Précision de Thompson-Howarth"), use_container_width=True)
+    median_grade = float(np.median(th.group_means))
+    st.markdown(
+        f"**Modèle de Thompson-Howarth:** σ(c) = {th.sigma0:.4g} + {th.k:.4g}·c — "
+        f"précision à 2σ de {float(th.precision_pct(median_grade)):.1f}% à la teneur médiane ({median_grade:.4g})"
+    )
+
+def compute_bootstrap(x, y, n_resamples, confidence, method, progress=jobs.no_progress):
+    with stage("Bootstrap", rows=len(x)):
+        return precision.bootstrap_regression(
+            x, y, n_resamples, confidence, method,
+            progress=jobs.stage(progress, 0.0, 1.0, "{done}/{total} rééchantillonnages")
+        )
+
+@st.fragment
+def render_bootstrap(x, y, pairs_key):
+    st.subheader("Intervalles de confiance (bootstrap)")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        n_resamples = st.number_input(
+            "Rééchantillonnages:",
+            min_value=100,
+            max_value=100_000,
+            step=1000,
+            key="bootstrap_resamples",
+            help="Le temps de calcul croît avec le nombre de rééchantillonnages × le nombre de paires."
+        )
+    with col2:
+        confidence = st.selectbox(
+            "Niveau de confiance:",
+            [0.90, 0.95, 0.99],
+            format_func=lambda level: f"{level:.0%}",
+            key="bootstrap_confidence"
+        )
+    with col3:
+        method = st.radio(
+            "Régression:",
+            [precision.REGRESSION_RMA, precision.REGRESSION_OLS],
+            key="bootstrap_method"
+        )
+    
+    params = (st.session_state.get("data_key"),) + tuple(pairs_key) + (int(n_resamples), confidence, method)
+    if st.button("Calculer les intervalles de confiance", key="bootstrap_run"):
+        st.session_state.bootstrap_requested = params
+        reset_finished_job("bootstrap")
+    if st.session_state.get("bootstrap_requested") != params:
+        return
+    
+    result = background_result(
+        "bootstrap",
+        ("bootstrap",) + params[1:],
+        partial(compute_bootstrap, x, y, int(n_resamples), confidence, method),
+        "Intervalles de confiance (bootstrap)"
+    )
+    if result is None:
+        return
+    low, high = result.slope_interval
+    st.markdown(f"**Pente ({confidence:.0%}):** [{low:.4f} ; {high:.4f}]")
+    low, high = result.intercept_interval
+    st.markdown(f"**Ordonnée à l'origine ({confidence:.0%}):** [{low:.4f} ; {high:.4f}]")
 
 # Fonction pour calculer les limites pour les CRM
 def calculate_crm_limits(reference_value, tolerance_type, tolerance_value, reference_stddev=None):
-    if tolerance_type == "Pourcentage (%)":
-        tolerance = tolerance_value / 100
-        upper_limit = reference_value * (1 + tolerance)
-        lower_limit = reference_value * (1 - tolerance)
-    else:  # Multiple de l'écart-type
-        if reference_stddev is None or reference_stddev == 0:
-            st.error("L'écart-type de référence doit être défini et supérieur à zéro pour utiliser ce type de tolérance.")
-            return None, None
-        upper_limit = reference_value + (tolerance_value * reference_stddev)
-        lower_limit = reference_value - (tolerance_value * reference_stddev)
-    
-    return lower_limit, upper_limit
+    try:
+        return engine.crm_limits(reference_value, tolerance_type, tolerance_value, reference_stddev)
+    except ValueError as e:
+        st.error(str(e))
+        return None, None
 
-# Dans le deuxième onglet - Importation des données
-with tabs[1]:
-    st.header("Importer les Données")
+# Carte de contrôle CRM pour une série de valeurs déjà préparée
+def compute_crm_analysis(data, id_column, value_column, reference_value, reference_stddev, lower_limit, upper_limit,
+                         render_mode=None):
+    values = data[value_column].to_numpy()
+    with stage("Statistiques", rows=len(values)):
+        result = engine.evaluate_crm(values, reference_value, lower_limit, upper_limit, reference_stddev)
     
-    import_method = st.radio(
-        "Méthode d'importation:",
-        ["Téléchargement de fichier", "Copier-coller des données"],
-        key="import_method"
-    )
+    # Création du graphique avec Plotly
+    large = use_large_rendering(len(data), render_mode)
+    with stage("Figure", rows=len(values)):
+        fig, n_shown = charts.crm_figure(
+            data[id_column].to_numpy(),
+            values,
+            reference_value,
+            lower_limit,
+            upper_limit,
+            value_column,
+            id_column,
+            large=large,
+            out_of_limits=result.out_of_limits
+        )
+    
+    # Règles de contrôle sur la série affichée
+    sigma = reference_stddev if reference_stddev > 0 else result.stats.std_dev
+    flags = None
+    if sigma > 0:
+        with stage("Règles de contrôle", rows=len(values)):
+            _, flags = control_rules.update_state(control_rules.new_state(reference_value, sigma), values)
+    
+    # Création d'un DataFrame avec les résultats
+    with stage("Tableau des résultats", rows=len(data)):
+        results_df = data.copy()
+        results_df['Écart (%)'] = result.deviation_pct
+        if result.z_score is not None:
+            results_df['Z-score'] = result.z_score
+        results_df['Statut'] = engine.status_column(result.out_of_limits)
+    
+    return {
+        "result": result,
+        "fig": fig,
+        "n_shown": n_shown,
+        "large": large,
+        "sigma": sigma,
+        "flags": flags,
+        "results_df": results_df,
+    }
+
+def render_crm_chart(analysis, value_column, reference_value, reference_stddev,
+                     tolerance_type, tolerance_value, history_id=None):
+    result = analysis["result"]
+    results_df = analysis["results_df"]
+    mean = result.stats.mean
+    std_dev = result.stats.std_dev
+    min_val = result.stats.min
+    max_val = result.stats.max
     
-    if import_method == "Téléchargement de fichier":
-        uploaded_file = st.file_uploader("Choisir un fichier CSV", type=["csv", "txt"])
+    show_chart(analysis["fig"], analysis["large"], f"{analysis['n_shown']} points affichés sur {len(results_df)}")
+
+    # Tableau des statistiques
+    st.subheader("Statistiques")
+
+    stats_col1, stats_col2 = st.columns(2)
+
+    with stats_col1:
+        st.markdown(f"**Valeur de référence:** {reference_value:.4f}")
+
+        if reference_stddev > 0:
+            st.markdown(f"**Écart-type de référence:** {reference_stddev:.4f}")
+
+        if tolerance_type == engine.TOLERANCE_PERCENT:
+            st.markdown(f"**Tolérance:** {tolerance_value:.2f}%")
+        else:
+            st.markdown(f"**Tolérance:** {tolerance_value:.1f} × écart-type")
+
+    with stats_col2:
+        st.markdown(f"**Moyenne:** {mean:.4f}")
+        st.markdown(f"**Écart-type:** {std_dev:.4f}")
+        st.markdown(f"**Min:** {min_val:.4f}")
+        st.markdown(f"**Max:** {max_val:.4f}")
+
+    # Règles de contrôle sur la série affichée
+    st.subheader("Règles de Westgard, CUSUM et EWMA")
+    
+    sigma = analysis["sigma"]
+    if analysis["flags"] is not None:
+        if reference_stddev <= 0:
+            st.caption("Sans écart-type de référence, les z-scores utilisent l'écart-type observé.")
+        st.dataframe(control_rules.rule_summary(analysis["flags"]).T)
         
-        if uploaded_file is not None:
-            separator = st.selectbox(
-                "Séparateur:",
-                [",", ";", "Tab"],
-                key="file_separator"
+        if history_id:
+            render_history_update(history_id, value_column, results_df[value_column].to_numpy(), reference_value, sigma)
+    
+    # Tableau de données
+    st.subheader("Résultats détaillés")
+
+    # Afficher le tableau avec coloration conditionnelle
+    render_results_table(results_df, result.out_of_limits, "crm", engine.STATUS_OUT_OF_LIMITS, highlight_column='Statut')
+
+    # Boutons d'export
+    render_downloads(results_df, "geoqaqc_crm_results", key="crm")
+
+# Valeurs d'un CRM : une valeur censurée (<0.005, >10) est évaluée à sa limite,
+# comme dans l'évaluation des lots ; la colonne « Censure » la signale
+def crm_values(data, id_column, value_column):
+    parsed = censored.parse_censored(data[value_column])
+    keep = np.isfinite(parsed.values) & data[id_column].notna().to_numpy()
+    data = data[keep].assign(**{value_column: parsed.values[keep]})
+    if parsed.take(keep).n_censored:
+        data['Censure'] = parsed.take(keep).labels()
+    return data
+
+# Couple CRM × élément du lot, tracé sur la carte de contrôle habituelle ;
+# avec ``batch_column``, seules les lignes du lot ``batch_name`` sont tracées
+def compute_crm_batch_detail(source, crm_column, id_column, crm_id, element, reference_value, reference_stddev,
+                             lower_limit, upper_limit, render_mode, batch_column=None, batch_name=None,
+                             progress=jobs.no_progress):
+    columns = list(dict.fromkeys(column for column in [crm_column, id_column, element, batch_column] if column is not None))
+    frame = read_columns(
+        source, columns, [],
+        progress=jobs.stage(progress, 0.0, 0.8, "Lecture du fichier : {done} lignes")
+    )
+    with stage("Conversion numérique", rows=len(frame)):
+        rows = frame[crm_column].astype(str).str.strip() == crm_id
+        if batch_column is not None:
+            rows &= multi.batch_mask(frame, batch_column, batch_name)
+        data = crm_values(frame.loc[rows, list(dict.fromkeys([id_column, element]))], id_column, element)
+    if data.empty:
+        raise ValueError("Aucune donnée numérique valide trouvée pour l'analyse.")
+    progress(0.8, 1.0, "Construction du graphique")
+    return compute_crm_analysis(
+        data, id_column, element, reference_value, reference_stddev, lower_limit, upper_limit, render_mode
+    )
+
+# Lot multi-CRM, lu en arrière-plan
+def compute_crm_batch(source, store, crm_column, element_columns, tolerance_type, tolerance_value, method,
+                      progress=jobs.no_progress):
+    # Colonnes lues en texte : les valeurs censurées sont évaluées à leur limite
+    frame = read_columns(
+        source, [crm_column] + element_columns, [],
+        progress=jobs.stage(progress, 0.0, 0.8, "Lecture du fichier : {done} lignes")
+    )
+    progress(0.8, 1.0, "Évaluation du lot")
+    with stage("Statistiques", rows=len(frame) * len(element_columns)):
+        return batch.evaluate_crm_batch(frame, crm_column, element_columns, store, tolerance_type, tolerance_value, method)
+
+# Évaluation d'un lot multi-CRM contre la base de certificats
+@st.fragment
+def render_crm_batch_section(df):
+    store, certificate_file = select_certificate_store("certificate_file")
+    if store is None:
+        if certificate_file is None:
+            st.info(f"Aucune base de certificats trouvée ({CERTIFICATES_PATH}). Veuillez charger une table de certificats.")
+        return
+    
+    st.caption(f"Base de certificats : {len(store)} valeurs certifiées pour {len(store.crm_ids)} CRM.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        crm_column = st.selectbox("Colonne identifiant du CRM:", df.columns, key="batch_crm_column")
+    with col2:
+        id_column = st.selectbox("Colonne ID/échantillon:", df.columns, key="batch_id_column")
+    
+    # Éléments certifiés présélectionnés pour chaque nouveau fichier
+    data_key = st.session_state.get("data_key")
+    if st.session_state.get("batch_elements_data_key") != data_key:
+        st.session_state.batch_element_columns = [column for column in df.columns if column in set(store.elements)]
+        st.session_state.batch_elements_data_key = data_key
+    element_columns = st.multiselect("Colonnes des éléments:", df.columns, key="batch_element_columns")
+    
+    method = None
+    if len(store.methods) > 1:
+        method = st.selectbox("Méthode analytique:", store.methods, key="batch_method")
+    
+    tolerance_type, tolerance_value = get_tolerance_settings()
+    
+    store_key = certificate_store_key(certificate_file)
+    if st.button("Évaluer le lot"):
+        if not element_columns:
+            st.warning("Veuillez choisir au moins une colonne d'élément.")
+        else:
+            st.session_state.crm_batch_requested = (
+                data_key, store_key, crm_column, id_column, tuple(element_columns), method, tolerance_type, tolerance_value
             )
-            
-            sep_dict = {",": ",", ";": ";", "Tab": "\t"}
-            try:
-                if separator == "Tab":
-                    df = pd.read_csv(uploaded_file, sep="\t")
-                else:
-                    df = pd.read_csv(uploaded_file, sep=separator)
-                
-                st.session_state.data = df
-                st.success(f"Fichier chargé avec succès! {len(df)} lignes et {len(df.columns)} colonnes.")
-                st.write("Aperçu des données:")
-                st.dataframe(df.head())
-            except Exception as e:
-                st.error(f"Erreur lors du chargement du fichier: {e}")
+            reset_finished_job("crm_batch")
+    
+    # La demande reste valable tant que les données et la base n'ont pas changé
+    request = st.session_state.get("crm_batch_requested")
+    if request is None or request[:2] != (data_key, store_key):
+        return
+    _, _, crm_column, id_column, element_columns, method, tolerance_type, tolerance_value = request
+    result = background_result(
+        "crm_batch",
+        ("crm_batch",) + request[1:],
+        partial(
+            compute_crm_batch, current_source(), store, crm_column, list(element_columns),
+            tolerance_type, tolerance_value, method
+        ),
+        "Évaluation du lot"
+    )
+    if result is None:
+        return
+    
+    st.subheader("Synthèse du lot")
+    status = result.status
+    st.dataframe(status.style.apply(
+        lambda frame: np.where(frame.to_numpy() == batch.STATUS_FAILED, 'background-color: #ffcccc', ''),
+        axis=None
+    ))
+    
+    st.markdown("**Taux de résultats hors limites (%)**")
+    st.dataframe((result.failure_rate * 100).round(1))
+    
+    render_archive_downloads(result.tables(), "geoqaqc_crm_batch", key="crm_batch")
+    
+    render_history_import(crm_column, id_column, list(result.count.columns), result)
+    
+    # Détail d'un couple CRM × élément sur la carte de contrôle habituelle
+    st.subheader("Carte de contrôle détaillée")
+    col1, col2 = st.columns(2)
+    with col1:
+        crm_id = st.selectbox("CRM:", status.index, key="batch_drill_crm")
+    with col2:
+        element = st.selectbox("Élément:", status.columns, key="batch_drill_element")
+    
+    lower_limit = result.lower_limit.loc[crm_id, element]
+    if np.isnan(lower_limit):
+        st.warning("Aucune limite calculable pour ce couple CRM × élément (certificat ou écart-type manquant).")
+        return
+    
+    reference_value = result.reference_value.loc[crm_id, element]
+    reference_stddev = result.reference_stddev.loc[crm_id, element]
+    reference_stddev = 0 if np.isnan(reference_stddev) else reference_stddev
+    upper_limit = result.upper_limit.loc[crm_id, element]
+    try:
+        analysis = background_result(
+            "crm_batch_detail",
+            ("crm_batch_detail", crm_column, id_column, crm_id, element,
+             reference_value, reference_stddev, lower_limit, upper_limit),
+            partial(
+                compute_crm_batch_detail, current_source(), crm_column, id_column, crm_id, element,
+                reference_value, reference_stddev, lower_limit, upper_limit, st.session_state.get("render_mode")
+            ),
+            f"Carte de contrôle {crm_id} × {element}"
+        )
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if analysis is None:
+        return
+    
+    render_crm_chart(
+        analysis, element, reference_value, reference_stddev,
+        tolerance_type, tolerance_value, history_id=crm_id
+    )
+
+# Contamination : chaque blanc est relié aux échantillons de routine qui le précèdent
+def compute_carryover_analysis(source, type_column, id_column, value_column, sequence_column, batch_column,
+                               blank_labels, crm_labels, window, grade_threshold, blank_limit,
+                               progress=jobs.no_progress):
+    columns = list(dict.fromkeys(
+        column for column in [type_column, id_column, value_column, sequence_column, batch_column]
+        if column is not None
+    ))
+    frame = read_columns(source, columns, [], progress=jobs.stage(progress, 0.0, 0.7, "Lecture du fichier : {done} lignes"))
+    progress(0.7, 1.0, "Recherche des contaminations")
+    with stage("Conversion numérique", rows=len(frame)):
+        parsed = censored.parse_censored(frame[value_column])
+    with stage("Statistiques", rows=len(frame)):
+        result = carryover.detect_carryover(
+            parsed.values,
+            carryover.sample_kinds(frame[type_column], list(blank_labels), list(crm_labels)),
+            window=window,
+            grade_threshold=grade_threshold,
+            blank_limit=blank_limit,
+            sequence=None if sequence_column is None else carryover.sequence_keys(frame[sequence_column]),
+            batches=None if batch_column is None else frame[batch_column],
+            censored_left=parsed.left
+        )
+    table = result.table()
+    table.insert(1, id_column, frame[id_column].to_numpy()[result.positions])
+    return {"result": result, "table": table, "value_column": value_column}
+
+@st.fragment
+def render_carryover_section(df):
+    optional_columns = [None] + list(df.columns)
+    column_label = lambda column: "(aucune)" if column is None else str(column)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        type_column = st.selectbox("Colonne du type d'échantillon:", df.columns, key="carryover_type_column")
+        id_column = st.selectbox("Colonne ID/échantillon:", df.columns, key="carryover_id_column")
+    with col2:
+        value_column = st.selectbox("Colonne des teneurs (élément):", df.columns, key="carryover_value_column")
+        sequence_column = st.selectbox(
+            "Colonne de la séquence d'analyse:",
+            optional_columns,
+            format_func=lambda column: "(ordre du fichier)" if column is None else str(column),
+            key="carryover_sequence_column"
+        )
+    batch_column = st.selectbox(
+        "Colonne du lot (la fenêtre ne traverse pas les lots):",
+        optional_columns,
+        format_func=column_label,
+        key="carryover_batch_column"
+    )
+    
+    types = load_analysis_columns([type_column], [])[type_column]
+    labels = types.astype(str).str.strip().value_counts().index[:200].tolist()
+    col1, col2 = st.columns(2)
+    with col1:
+        blank_labels = st.multiselect("Valeurs désignant les blancs:", labels, key="carryover_blank_labels")
+    with col2:
+        crm_labels = st.multiselect("Valeurs désignant les CRM:", labels, key="carryover_crm_labels")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        window = st.number_input(
+            "Échantillons précédents (N):",
+            min_value=1,
+            max_value=50,
+            key="carryover_window"
+        )
+    with col2:
+        grade_threshold = st.number_input(
+            "Seuil de forte teneur:",
+            min_value=0.0,
+            value=None,
+            format="%.4f",
+            key="carryover_grade_threshold",
+            help=f"Vide : {carryover.DEFAULT_GRADE_PERCENTILE:g}e centile des échantillons de routine."
+        )
+    with col3:
+        blank_limit = st.number_input(
+            "Limite des blancs:",
+            min_value=0.0,
+            value=None,
+            format="%.4f",
+            key="carryover_blank_limit",
+            help="Vide : moyenne + 3 écarts-types des blancs."
+        )
+    log_axes = st.checkbox("Axes logarithmiques", key="carryover_log_axes")
+    
+    data_key = st.session_state.get("data_key")
+    params = (
+        type_column, id_column, value_column, sequence_column, batch_column, tuple(blank_labels), tuple(crm_labels),
+        int(window), grade_threshold, blank_limit
+    )
+    if st.button("Analyser la séquence"):
+        if not blank_labels:
+            st.warning("Veuillez choisir au moins une valeur désignant les blancs.")
+        else:
+            st.session_state.carryover_requested = (data_key,) + params
+            reset_finished_job("carryover")
+    
+    # La demande reste valable tant que les données n'ont pas changé
+    request = st.session_state.get("carryover_requested")
+    if request is None or request[0] != data_key:
+        return
+    try:
+        analysis = background_result(
+            "carryover",
+            ("carryover",) + request[1:],
+            partial(compute_carryover_analysis, current_source(), *request[1:]),
+            "Contamination"
+        )
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if analysis is None:
+        return
+    result, table = analysis["result"], analysis["table"]
+    blanks = result.blanks
+    
+    st.markdown(f"**Seuil de forte teneur:** {result.grade_threshold:.4f}")
+    st.markdown(f"**Limite des blancs:** {result.blank_limit:.4f}")
+    st.markdown(
+        f"**Blancs suivant une forte teneur:** {int(result.follows_high_grade.sum())} sur {int(blanks.sum())} — "
+        f"**contamination probable:** {int(result.contaminated.sum())}"
+    )
+    
+    large = use_large_rendering(int(blanks.sum()))
+    fig, n_shown = charts.carryover_figure(
+        result.max_grade[blanks],
+        result.values[blanks],
+        result.contaminated[blanks],
+        result.grade_threshold,
+        result.blank_limit,
+        f"Teneur max. des {result.window} échantillons précédents",
+        analysis["value_column"],
+        large=large,
+        log_axes=log_axes
+    )
+    show_chart(fig, large, f"{n_shown} blancs affichés sur {int(blanks.sum())}")
+    
+    st.subheader("Contrôles et échantillons précédents")
+    render_results_table(
+        table,
+        result.contaminated,
+        "carryover",
+        "Contamination probable",
+        highlight_column="Contamination probable"
+    )
+    render_downloads(table, "geoqaqc_carryover_results", key="carryover")
+
+# Carte de contrôle d'un CRM unique
+def compute_crm_single(source, id_column, value_column, reference_value, reference_stddev, lower_limit, upper_limit,
+                       render_mode, progress=jobs.no_progress):
+    data = read_columns(
+        source, [id_column, value_column], [],
+        progress=jobs.stage(progress, 0.0, 0.6, "Lecture du fichier : {done} lignes")
+    )
+    
+    progress(0.6, 1.0, "Lecture des valeurs censurées")
+    with stage("Conversion numérique", rows=len(data)):
+        data = crm_values(data, id_column, value_column)
+    if data.empty:
+        raise ValueError("Aucune donnée numérique valide trouvée pour l'analyse.")
+    
+    progress(0.8, 1.0, "Construction du graphique")
+    return compute_crm_analysis(
+        data, id_column, value_column, reference_value, reference_stddev, lower_limit, upper_limit, render_mode
+    )
+
+@st.fragment
+def render_crm_section(df):
+    col1, col2 = st.columns(2)
+    with col1:
+        id_column = st.selectbox("Colonne ID/échantillon:", df.columns, key="crm_id_column")
+    with col2:
+        value_column = st.selectbox("Colonne des valeurs mesurées:", df.columns, key="crm_value_column")
+    
+    history_id = st.text_input(
+        "Identifiant du CRM (historique des règles de contrôle, optionnel):",
+        key="crm_history_id"
+    )
+    
+    # Récupération des paramètres
+    reference_value = st.session_state.reference_value
+    reference_stddev = st.session_state.reference_stddev if 'reference_stddev' in st.session_state else 0
+    tolerance_type, tolerance_value = get_tolerance_settings()
+    params = (id_column, value_column, reference_value, reference_stddev, tolerance_type, tolerance_value)
+    
+    if not analysis_requested("crm", params):
+        return
+    
+    # Calcul des limites
+    lower_limit, upper_limit = calculate_crm_limits(
+        reference_value,
+        tolerance_type,
+        tolerance_value,
+        reference_stddev
+    )
+    if lower_limit is None or upper_limit is None:
+        return
+    
+    try:
+        analysis = background_result(
+            "crm",
+            ("crm",) + params,
+            partial(
+                compute_crm_single, current_source(), id_column, value_column, reference_value, reference_stddev,
+                lower_limit, upper_limit, st.session_state.get("render_mode")
+            ),
+            "Carte de contrôle CRM"
+        )
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if analysis is None:
+        return
+    
+    render_crm_chart(
+        analysis, value_column, reference_value, reference_stddev,
+        tolerance_type, tolerance_value, history_id=history_id.strip()
+    )
+
+# Nuage des duplicatas, régression et précision
+def compute_duplicate_analysis(source, original_column, replicate_column, outlier_threshold, hard_threshold, log_axes,
+                               render_mode, progress=jobs.no_progress):
+    columns = list(dict.fromkeys([original_column, replicate_column]))
+    frame = read_columns(source, columns, [], progress=jobs.stage(progress, 0.0, 0.5, "Lecture du fichier : {done} lignes"))
+    # Une paire dont une valeur est censurée (<0.005, >10) n'a pas de différence
+    # mesurable : elle est écartée et comptée
+    with stage("Conversion numérique", rows=len(frame)):
+        frame = frame.dropna()
+        original = censored.parse_censored(frame[original_column])
+        replicate = censored.parse_censored(frame[replicate_column])
+        uncensored = (original.censoring == censored.CENSORING_NONE) & (replicate.censoring == censored.CENSORING_NONE)
+        keep = uncensored & np.isfinite(original.values) & np.isfinite(replicate.values)
+        data = frame[keep].assign(**{original_column: original.values[keep], replicate_column: replicate.values[keep]})
+        n_censored = int(np.count_nonzero(~uncensored))
+    if data.empty:
+        raise ValueError("Aucune donnée numérique valide trouvée pour l'analyse.")
+    
+    progress(0.5, 1.0, "Régressions et précision")
+    x = data[original_column].to_numpy()
+    y = data[replicate_column].to_numpy()
+    with stage("Statistiques", rows=len(x)):
+        result = engine.evaluate_duplicates(x, y)
+        precision_result = precision.evaluate_precision(x, y, hard_threshold)
+    
+    # Création du graphique avec Plotly
+    progress(0.8, 1.0, "Construction du graphique")
+    large = use_large_rendering(len(data), render_mode)
+    with stage("Figure", rows=len(x)):
+        fig, n_shown = charts.duplicate_figure(
+            x,
+            y,
+            result.slope,
+            result.intercept,
+            original_column,
+            replicate_column,
+            binned=large,
+            log_axes=log_axes,
+            rel_diff_pct=result.rel_diff_pct,
+            outlier_threshold=outlier_threshold,
+            rma=(precision_result.rma_slope, precision_result.rma_intercept)
+        )
+    
+    # Création d'un DataFrame avec les résultats
+    with stage("Tableau des résultats", rows=len(data)):
+        results_df = data.copy()
+        results_df['Diff. Abs.'] = result.abs_diff
+        results_df['Diff. Rel. (%)'] = result.rel_diff_pct
+        results_df['HARD (%)'] = precision_result.hard
+    
+    return {
+        "x": x,
+        "y": y,
+        "result": result,
+        "precision": precision_result,
+        "fig": fig,
+        "n_shown": n_shown,
+        "large": large,
+        "results_df": results_df,
+        "n_censored": n_censored,
+    }
+
+@st.fragment
+def render_duplicate_section(df):
+    col1, col2 = st.columns(2)
+    with col1:
+        original_column = st.selectbox("Colonne des valeurs originales:", df.columns, key="duplicate_original_column")
+    with col2:
+        replicate_column = st.selectbox("Colonne des valeurs dupliquées:", df.columns, key="duplicate_replicate_column")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        outlier_threshold = st.number_input(
+            "Seuil de différence relative des valeurs aberrantes (%):",
+            min_value=0.0,
+            step=1.0,
+            key="duplicate_outlier_threshold",
+            help="En rendu par densité, les paires au-delà de ce seuil sont affichées individuellement."
+        )
+    with col2:
+        hard_threshold = st.number_input(
+            "Seuil HARD (%):",
+            min_value=0.0,
+            step=1.0,
+            key="duplicate_hard_threshold",
+            help="Demi-différence relative absolue acceptée pour une paire."
+        )
+    log_axes = st.checkbox("Axes logarithmiques", key="duplicate_log_axes")
+    params = (original_column, replicate_column, outlier_threshold, hard_threshold, log_axes)
+    
+    if not analysis_requested("duplicate", params):
+        return
+    
+    try:
+        analysis = background_result(
+            "duplicate",
+            ("duplicate",) + params,
+            partial(compute_duplicate_analysis, current_source(), *params, st.session_state.get("render_mode")),
+            "Analyse des duplicatas"
+        )
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if analysis is None:
+        return
+    render_duplicate_chart(analysis, outlier_threshold, hard_threshold, params)
+
+# Nuage des duplicatas, statistiques, précision et tableau des paires
+def render_duplicate_chart(analysis, outlier_threshold, hard_threshold, pairs_key):
+    result = analysis["result"]
+    precision_result = analysis["precision"]
+    slope, intercept, r = result.slope, result.intercept, result.r
+    
+    show_chart(
+        analysis["fig"],
+        analysis["large"],
+        f"{len(analysis['x'])} paires agrégées en grille de densité, {analysis['n_shown']} valeurs aberrantes affichées"
+    )
+    
+    # Tableau des statistiques
+    st.subheader("Statistiques")
+    
+    st.markdown(f"**Équation de régression:** y = {slope:.4f}x + {intercept:.4f}")
+    st.markdown(
+        f"**Régression de l'axe majeur réduit (RMA):** "
+        f"y = {precision_result.rma_slope:.4f}x + {precision_result.rma_intercept:.4f}"
+    )
+    st.markdown(f"**Coefficient de corrélation (R²):** {r*r:.4f}")
+    st.markdown(f"**Différence absolue moyenne:** {result.mean_abs_diff:.4f}")
+    st.markdown(f"**Différence relative moyenne:** {result.mean_rel_diff_pct:.2f}%")
+    if analysis["n_censored"]:
+        st.caption(f"{analysis['n_censored']} paires avec une valeur censurée (<0.005, >10) écartées des statistiques.")
+    
+    render_precision_section(precision_result, hard_threshold)
+    render_bootstrap(analysis["x"], analysis["y"], pairs_key)
+    
+    # Tableau de données
+    st.subheader("Résultats détaillés")
+    results_df = analysis["results_df"]
+    render_results_table(
+        results_df,
+        result.rel_diff_pct > outlier_threshold,
+        "duplicate",
+        f"Diff. Rel. > {outlier_threshold:g}%",
+        highlight_column='Diff. Rel. (%)'
+    )
+    
+    # Boutons d'export
+    render_downloads(results_df, "geoqaqc_duplicate_results", key="duplicate")
+
+# Carte des blancs ; les valeurs censurées sont conservées
+def compute_blank_analysis(source, id_column, value_column, censored_method, default_limit, negative_as_censored,
+                           render_mode, progress=jobs.no_progress):
+    data = read_columns(
+        source, [id_column, value_column], [],
+        progress=jobs.stage(progress, 0.0, 0.5, "Lecture du fichier : {done} lignes")
+    )
+    progress(0.5, 1.0, "Valeurs censurées et limite de détection")
+    data = data[data[id_column].notna()]
+    with stage("Conversion numérique", rows=len(data)):
+        parsed = censored.parse_censored(data[value_column], default_limit or None, negative_as_censored)
+    progress(0.8, 1.0, "Construction du graphique")
+    return blank_chart_analysis(data, id_column, value_column, parsed, censored_method, render_mode)
+
+# Carte des blancs à partir des valeurs lues ; ``shown`` restreint la carte et
+# le tableau à une partie des lignes, la LOD restant celle de tous les blancs
+def blank_chart_analysis(data, id_column, value_column, parsed, censored_method, render_mode, shown=None):
+    with stage("Statistiques", rows=len(data)):
+        kept, values, result = censored.evaluate_censored_blanks(parsed, censored_method)
+    data = data[kept].assign(**{value_column: values})
+    data['Censure'] = parsed.take(kept).labels()
+    elevated = result.elevated
+    n_censored = parsed.n_censored
+    if shown is not None:
+        n_censored = parsed.take(shown).n_censored
+        shown = shown[kept]
+        data, values, elevated = data[shown], values[shown], elevated[shown]
+        if data.empty:
+            raise ValueError("Aucun blanc exploitable dans ce lot.")
+    
+    # Création du graphique avec Plotly
+    large = use_large_rendering(len(data), render_mode)
+    with stage("Figure", rows=len(values)):
+        fig, n_shown = charts.blank_figure(
+            data[id_column].to_numpy(),
+            values,
+            result.stats.mean,
+            result.lod,
+            value_column,
+            id_column,
+            large=large,
+            elevated=elevated
+        )
+    
+    # Création d'un DataFrame avec les résultats
+    with stage("Tableau des résultats", rows=len(data)):
+        results_df = data.copy()
+        results_df['Statut'] = engine.status_column(elevated, failed_label=engine.STATUS_HIGH)
+    
+    return {
+        "values": values,
+        "n_censored": n_censored,
+        "result": result,
+        "elevated": elevated,
+        "fig": fig,
+        "n_shown": n_shown,
+        "large": large,
+        "results_df": results_df,
+    }
+
+@st.fragment
+def render_blank_section(df):
+    col1, col2 = st.columns(2)
+    with col1:
+        id_column = st.selectbox("Colonne ID/échantillon:", df.columns, key="blank_id_column")
+    with col2:
+        value_column = st.selectbox("Colonne des valeurs mesurées:", df.columns, key="blank_value_column")
+    
+    # Valeurs censurées (<0.005, BDL, -0.005)
+    col1, col2 = st.columns(2)
+    with col1:
+        censored_method = st.selectbox(
+            "Traitement des valeurs censurées:",
+            censored.SUBSTITUTION_METHODS,
+            key="blank_censored_method",
+            help="Les valeurs sous la limite de détection sont conservées et substituées ou estimées."
+        )
+    with col2:
+        default_limit = st.number_input(
+            "Limite de détection des mentions sans valeur (BDL, ND):",
+            min_value=0.0,
+            format="%.4f",
+            key="blank_default_limit",
+            help="0 : ces lignes sont écartées."
+        )
+    negative_as_censored = st.checkbox(
+        "Valeurs négatives = sous la limite de détection (-0.005 lu comme <0.005)",
+        key="blank_negative_censored"
+    )
+    params = (id_column, value_column, censored_method, default_limit, negative_as_censored)
+    
+    if not analysis_requested("blank", params):
+        return
+    
+    try:
+        analysis = background_result(
+            "blank",
+            ("blank",) + params,
+            partial(compute_blank_analysis, current_source(), *params, st.session_state.get("render_mode")),
+            "Carte des blancs"
+        )
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if analysis is None:
+        return
+    render_blank_chart(analysis, value_column, censored_method)
+
+# Carte des blancs, statistiques et tableau des résultats
+def render_blank_chart(analysis, value_column, censored_method):
+    result = analysis["result"]
+    values = analysis["values"]
+    mean = result.stats.mean
+    std_dev = result.stats.std_dev
+    
+    show_chart(analysis["fig"], analysis["large"], f"{analysis['n_shown']} points affichés sur {len(values)}")
+    
+    # Tableau des statistiques
+    st.subheader("Statistiques")
+    
+    st.markdown(f"**Moyenne:** {mean:.4f}")
+    st.markdown(f"**Écart-type:** {std_dev:.4f}")
+    st.markdown(f"**Min:** {result.stats.min:.4f}")
+    st.markdown(f"**Max:** {result.stats.max:.4f}")
+    st.markdown(f"**Limite de détection estimée (LOD):** {result.lod:.4f}")
+    st.markdown(f"**Valeurs censurées:** {analysis['n_censored']} ({censored_method})")
+    render_blank_history(value_column, values, mean, std_dev)
+    
+    # Tableau de données
+    st.subheader("Résultats détaillés")
+    results_df = analysis["results_df"]
+    
+    # Afficher le tableau avec coloration conditionnelle
+    render_results_table(results_df, analysis["elevated"], "blank", engine.STATUS_HIGH, highlight_column='Statut')
+    
+    # Boutons d'export
+    render_downloads(results_df, "geoqaqc_blank_results", key="blank")
+
+# Tableau de bord multi-élément : les trois contrôles de tous les éléments, lus une fois
+def compute_multi_element(source, store, type_column, id_column, batch_column, parent_column, element_columns,
+                          blank_labels, duplicate_labels, censored_method, negative_as_censored, hard_threshold,
+                          tolerance_type, tolerance_value, method, progress=jobs.no_progress):
+    columns = list(dict.fromkeys(
+        column for column in [type_column, id_column, batch_column, parent_column] + element_columns
+        if column is not None
+    ))
+    frame = read_columns(
+        source, columns, [],
+        progress=jobs.stage(progress, 0.0, 0.8, "Lecture du fichier : {done} lignes")
+    )
+    progress(0.8, 1.0, "Évaluation des contrôles")
+    with stage("Statistiques", rows=len(frame) * len(element_columns)):
+        return multi.evaluate_multi_element(
+            frame, type_column, element_columns, batch_column, store, tolerance_type, tolerance_value, method,
+            blank_labels=blank_labels, censored_method=censored_method, negative_as_censored=negative_as_censored,
+            duplicate_labels=duplicate_labels, id_column=id_column, parent_column=parent_column,
+            hard_threshold=hard_threshold
+        )
+
+# Blancs d'un lot × élément, sur la carte des blancs habituelle (LOD de tous les blancs)
+def compute_multi_blank_detail(source, type_column, id_column, batch_column, blank_labels, element, batch_name,
+                               censored_method, negative_as_censored, render_mode, progress=jobs.no_progress):
+    columns = list(dict.fromkeys(column for column in [type_column, id_column, batch_column, element] if column is not None))
+    frame = read_columns(source, columns, [], progress=jobs.stage(progress, 0.0, 0.5, "Lecture du fichier : {done} lignes"))
+    progress(0.5, 1.0, "Valeurs censurées et limite de détection")
+    with stage("Conversion numérique", rows=len(frame)):
+        blanks = multi.sample_kinds(frame[type_column], blank_labels=blank_labels) == carryover.KIND_BLANK
+        data = frame.loc[blanks, list(dict.fromkeys([id_column, element]))]
+        parsed = censored.parse_censored(data[element], negative_as_censored=negative_as_censored)
+    return blank_chart_analysis(
+        data, id_column, element, parsed, censored_method, render_mode,
+        shown=multi.batch_mask(frame[blanks], batch_column, batch_name)
+    )
+
+# Paires de duplicatas d'un lot × élément, sur le nuage de points habituel
+def compute_multi_duplicate_detail(source, type_column, id_column, batch_column, parent_column, duplicate_labels,
+                                   element, batch_name, outlier_threshold, hard_threshold, render_mode,
+                                   progress=jobs.no_progress):
+    columns = list(dict.fromkeys(
+        column for column in [type_column, id_column, batch_column, parent_column, element] if column is not None
+    ))
+    frame = read_columns(source, columns, [], progress=jobs.stage(progress, 0.0, 0.4, "Lecture du fichier : {done} lignes"))
+    with stage("Conversion numérique", rows=len(frame)):
+        kinds = multi.sample_kinds(frame[type_column], duplicate_labels=duplicate_labels)
+        pairs = multi.duplicate_pair_table(
+            frame, element, kinds, id_column, parent_column, mask=multi.batch_mask(frame, batch_column, batch_name)
+        )
+    original_column, replicate_column = pairs.columns
+    return compute_duplicate_analysis(
+        pairs, original_column, replicate_column, outlier_threshold, hard_threshold, False, render_mode, progress
+    )
+
+@st.fragment
+def render_multi_element_section(df):
+    store, certificate_file = select_certificate_store("multi_certificate_file")
+    if store is None and certificate_file is not None:
+        return
+    if store is None:
+        st.caption(f"Aucune base de certificats trouvée ({CERTIFICATES_PATH}) : les CRM ne sont pas évalués.")
+    else:
+        st.caption(f"Base de certificats : {len(store)} valeurs certifiées pour {len(store.crm_ids)} CRM.")
+    
+    optional_columns = [None] + list(df.columns)
+    col1, col2 = st.columns(2)
+    with col1:
+        type_column = st.selectbox(
+            "Colonne du type d'échantillon (CRM, blanc, duplicata):", df.columns, key="multi_type_column"
+        )
+        id_column = st.selectbox("Colonne ID/échantillon:", df.columns, key="multi_id_column")
+    with col2:
+        batch_column = st.selectbox(
+            "Colonne du lot:",
+            optional_columns,
+            format_func=lambda column: "(aucune)" if column is None else str(column),
+            key="multi_batch_column"
+        )
+        parent_column = st.selectbox(
+            "Colonne de l'échantillon original des duplicatas:",
+            optional_columns,
+            format_func=lambda column: "(ligne précédente)" if column is None else str(column),
+            key="multi_parent_column",
+            help="Identifiant de l'échantillon original ; sans colonne, l'original est la ligne qui précède le "
+                 "duplicata si c'est un échantillon de routine."
+        )
+    
+    types = load_analysis_columns([type_column], [])[type_column]
+    labels = types.astype(str).str.strip().value_counts().index[:200].tolist()
+    col1, col2 = st.columns(2)
+    with col1:
+        blank_labels = st.multiselect("Valeurs désignant les blancs:", labels, key="multi_blank_labels")
+    with col2:
+        duplicate_labels = st.multiselect("Valeurs désignant les duplicatas:", labels, key="multi_duplicate_labels")
+    
+    # Colonnes numériques (valeurs censurées comprises) présélectionnées pour chaque nouveau fichier
+    data_key = st.session_state.get("data_key")
+    if st.session_state.get("multi_elements_data_key") != data_key:
+        st.session_state.multi_element_columns = censored.numeric_columns(
+            df, exclude=[type_column, id_column, batch_column, parent_column]
+        )
+        st.session_state.multi_elements_data_key = data_key
+    element_columns = st.multiselect("Colonnes des éléments:", df.columns, key="multi_element_columns")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        censored_method = st.selectbox(
+            "Traitement des blancs censurés:",
+            multi.CENSORED_METHODS,
+            key="multi_censored_method"
+        )
+    with col2:
+        hard_threshold = st.number_input(
+            "Seuil HARD (%):",
+            min_value=0.0,
+            step=1.0,
+            key="multi_hard_threshold",
+            help="Demi-différence relative absolue acceptée pour une paire."
+        )
+    with col3:
+        method = None
+        if store is not None and len(store.methods) > 1:
+            method = st.selectbox("Méthode analytique:", store.methods, key="multi_method")
+    
+    tolerance_type, tolerance_value = get_tolerance_settings()
+    
+    # Lecture des valeurs négatives des blancs, réglée dans l'analyse des blancs
+    negative_as_censored = st.session_state.blank_negative_censored
+    
+    store_key = certificate_store_key(certificate_file) if store is not None else None
+    if st.button("Évaluer tous les éléments"):
+        if not element_columns:
+            st.warning("Veuillez choisir au moins une colonne d'élément.")
+        else:
+            st.session_state.multi_requested = (
+                data_key, store_key, type_column, id_column, batch_column, parent_column, tuple(element_columns),
+                tuple(blank_labels), tuple(duplicate_labels), censored_method, negative_as_censored, hard_threshold,
+                tolerance_type, tolerance_value, method
+            )
+            reset_finished_job("multi")
+    
+    # La demande reste valable tant que les données et la base n'ont pas changé
+    request = st.session_state.get("multi_requested")
+    if request is None or request[:2] != (data_key, store_key):
+        return
+    (_, _, type_column, id_column, batch_column, parent_column, element_columns,
+     blank_labels, duplicate_labels, censored_method, negative_as_censored, hard_threshold, tolerance_type, tolerance_value,
+     method) = request
+    try:
+        result = background_result(
+            "multi",
+            ("multi",) + request[1:],
+            partial(
+                compute_multi_element, current_source(), store, type_column, id_column, batch_column, parent_column,
+                list(element_columns), list(blank_labels), list(duplicate_labels), censored_method, negative_as_censored,
+                hard_threshold, tolerance_type, tolerance_value, method
+            ),
+            "Tableau de bord multi-élément"
+        )
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if result is None:
+        return
+    
+    st.subheader("Synthèse par lot et par élément")
+    indicator = st.radio("Indicateur:", multi.INDICATORS, horizontal=True, key="multi_indicator")
+    values, counts = result.indicator(indicator)
+    if not counts.to_numpy().any():
+        st.info("Aucun résultat pour cet indicateur : vérifiez les valeurs désignant les contrôles.")
+    else:
+        with stage("Figure", rows=values.size):
+            fig = charts.qc_heatmap(
+                values, counts, f"GeoQAQC - {indicator}", "HARD (%)" if indicator == multi.INDICATOR_PRECISION else "%",
+                zmax=None if indicator == multi.INDICATOR_PRECISION else 100
+            )
+        show_chart(fig, False, "")
+    
+    if indicator == multi.INDICATOR_BLANK:
+        st.markdown("**Limite de détection estimée (LOD) de chaque élément**")
+        st.dataframe(result.tables()["lod_blancs"])
+    
+    render_archive_downloads(result.tables(), "geoqaqc_multi_element", key="multi")
+    
+    # Détail d'une cellule lot × élément sur la carte de contrôle habituelle
+    st.subheader("Carte de contrôle détaillée")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        element = st.selectbox("Élément:", values.columns, key="multi_drill_element")
+    with col2:
+        batch_name = st.selectbox("Lot:", values.index, key="multi_drill_batch")
+    render_mode = st.session_state.get("render_mode")
+    
+    if indicator == multi.INDICATOR_CRM:
+        if result.crm_lower_limit.empty:
+            st.info("Aucun CRM certifié dans ce fichier.")
+            return
+        with col3:
+            crm_id = st.selectbox("CRM:", result.crm_lower_limit.index, key="multi_drill_crm")
+        lower_limit = result.crm_lower_limit.loc[crm_id, element]
+        if np.isnan(lower_limit):
+            st.warning("Aucune limite calculable pour ce couple CRM × élément (certificat ou écart-type manquant).")
+            return
+        reference_value = result.crm_reference_value.loc[crm_id, element]
+        reference_stddev = result.crm_reference_stddev.loc[crm_id, element]
+        reference_stddev = 0 if np.isnan(reference_stddev) else reference_stddev
+        upper_limit = result.crm_upper_limit.loc[crm_id, element]
+        params = (type_column, id_column, crm_id, element, reference_value, reference_stddev, lower_limit, upper_limit)
+        try:
+            analysis = background_result(
+                "multi_detail",
+                ("multi_crm_detail",) + params + (batch_column, batch_name),
+                partial(
+                    compute_crm_batch_detail, current_source(), *params, render_mode,
+                    batch_column=batch_column, batch_name=batch_name
+                ),
+                f"Carte de contrôle {crm_id} × {element}, lot {batch_name}"
+            )
+        except ValueError as e:
+            st.error(str(e))
+            return
+        if analysis is not None:
+            render_crm_chart(analysis, element, reference_value, reference_stddev, tolerance_type, tolerance_value)
+    
+    elif indicator == multi.INDICATOR_BLANK:
+        params = (
+            type_column, id_column, batch_column, blank_labels, element, batch_name, censored_method, negative_as_censored
+        )
+        try:
+            analysis = background_result(
+                "multi_detail",
+                ("multi_blank_detail",) + params,
+                partial(compute_multi_blank_detail, current_source(), *params, render_mode),
+                f"Carte des blancs {element}, lot {batch_name}"
+            )
+        except ValueError as e:
+            st.error(str(e))
+            return
+        if analysis is not None:
+            st.caption("La LOD est calculée sur l'ensemble des blancs de l'élément ; seuls les blancs du lot sont tracés.")
+            render_blank_chart(analysis, element, censored_method)
+    
     else:
-        pasted_data = st.text_area(
-            "Collez vos données (format CSV ou tableau séparé par des tabulations):",
-            height=200,
-            key="pasted_data"
+        outlier_threshold = st.session_state.duplicate_outlier_threshold
+        params = (
+            type_column, id_column, batch_column, parent_column, duplicate_labels, element, batch_name,
+            outlier_threshold, hard_threshold
         )
+        try:
+            analysis = background_result(
+                "multi_detail",
+                ("multi_duplicate_detail",) + params,
+                partial(compute_multi_duplicate_detail, current_source(), *params, render_mode),
+                f"Duplicatas {element}, lot {batch_name}"
+            )
+        except ValueError as e:
+            st.error(str(e))
+            return
+        if analysis is not None:
+            render_duplicate_chart(analysis, outlier_threshold, hard_threshold, params)
+
+# Dans le deuxième onglet - Importation des données
+with tabs[1]:
+    if tabs[1].open:
+        st.header("Importer les Données")
         
-        separator = st.selectbox(
-            "Séparateur:",
-            [",", ";", "Tab"],
-            key="paste_separator"
+        import_method = st.radio(
+            "Méthode d'importation:",
+            ["Téléchargement de fichier", "Copier-coller des données", "Fichier volumineux (lecture en continu)"],
+            key="import_method"
         )
         
-        if st.button("Traiter les données"):
-            if pasted_data:
+        if import_method == "Téléchargement de fichier":
+            uploaded_file = st.file_uploader("Choisir un fichier CSV", type=["csv", "txt"])
+            
+            # Le fichier reste chargé quand l'onglet est quitté, le sélecteur est vidé
+            if uploaded_file is None and "data_name" in st.session_state:
+                st.caption(f"Données chargées : {st.session_state.data_name}")
+            
+            if uploaded_file is not None:
+                separator = st.selectbox(
+                    "Séparateur:",
+                    [",", ";", "Tab"],
+                    key="file_separator"
+                )
+                
                 sep_dict = {",": ",", ";": ";", "Tab": "\t"}
                 try:
-                    df = pd.read_csv(StringIO(pasted_data), sep=sep_dict[separator])
+                    with traced("Importation"):
+                        data_key, df = get_ingestion_cache().load(uploaded_file.getvalue(), sep_dict[separator])
+                    
                     st.session_state.data = df
-                    st.success(f"Données traitées avec succès! {len(df)} lignes et {len(df.columns)} colonnes.")
+                    st.session_state.data_source = None
+                    st.session_state.data_key = data_key
+                    st.session_state.data_name = uploaded_file.name
+                    st.success(f"Fichier chargé avec succès! {len(df)} lignes et {len(df.columns)} colonnes.")
+                    show_ingestion_stats()
                     st.write("Aperçu des données:")
                     st.dataframe(df.head())
                 except Exception as e:
-                    st.error(f"Erreur lors du traitement des données: {e}")
-            else:
-                st.warning("Veuillez coller des données avant de les traiter.")
+                    st.error(f"Erreur lors du chargement du fichier: {e}")
+        elif import_method == "Fichier volumineux (lecture en continu)":
+            st.info("Seuls l'en-tête et un échantillon sont lus ici. Les colonnes choisies dans l'onglet 'Analyse' sont ensuite chargées par blocs.")
+            
+            stream_path = st.text_input(
+                "Chemin du fichier sur le serveur:",
+                help=f"Relatif au répertoire de données {os.path.abspath(STREAM_DIR)} (GEOQAQC_STREAM_DIR).",
+                key="stream_path"
+            )
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                separator = st.selectbox(
+                    "Séparateur:",
+                    [",", ";", "Tab"],
+                    key="stream_separator"
+                )
+            with col2:
+                chunksize = st.number_input(
+                    "Lignes par bloc:",
+                    min_value=10_000,
+                    step=10_000,
+                    key="stream_chunksize"
+                )
+            
+            if stream_path:
+                try:
+                    stream_path = ingestion.resolve_data_path(STREAM_DIR, stream_path)
+                except ValueError as e:
+                    st.error(str(e))
+                    stream_path = None
+            
+            if stream_path:
+                sep_dict = {",": ",", ";": ";", "Tab": "\t"}
+                try:
+                    with traced("Importation"):
+                        source = get_streaming_source(stream_path, sep_dict[separator], int(chunksize), os.path.getmtime(stream_path))
+                    
+                    st.session_state.data = source.sample
+                    st.session_state.data_source = source
+                    # Empreinte du contenu : un fichier copié ou déplacé garde la même clé
+                    st.session_state.data_key = source.content_key
+                    st.session_state.data_name = os.path.basename(stream_path)
+                    st.success(f"Fichier ouvert en lecture continue! {len(source.columns)} colonnes.")
+                    st.write("Aperçu des données:")
+                    st.dataframe(source.sample.head())
+                except Exception as e:
+                    st.error(f"Erreur lors de l'ouverture du fichier: {e}")
+        else:
+            pasted_data = st.text_area(
+                "Collez vos données (format CSV ou tableau séparé par des tabulations):",
+                height=200,
+                key="pasted_data"
+            )
+            
+            separator = st.selectbox(
+                "Séparateur:",
+                [",", ";", "Tab"],
+                key="paste_separator"
+            )
+            
+            if st.button("Traiter les données"):
+                if pasted_data:
+                    sep_dict = {",": ",", ";": ";", "Tab": "\t"}
+                    try:
+                        with traced("Importation"):
+                            data_key, df = get_ingestion_cache().load(pasted_data, sep_dict[separator])
+                        st.session_state.data = df
+                        st.session_state.data_source = None
+                        st.session_state.data_key = data_key
+                        st.session_state.data_name = "Données collées"
+                        st.success(f"Données traitées avec succès! {len(df)} lignes et {len(df.columns)} colonnes.")
+                        show_ingestion_stats()
+                        st.write("Aperçu des données:")
+                        st.dataframe(df.head())
+                    except Exception as e:
+                        st.error(f"Erreur lors du traitement des données: {e}")
+                else:
+                    st.warning("Veuillez coller des données avant de les traiter.")
 
 # Dans le troisième onglet - Analyse
 with tabs[2]:
-    st.header("Analyse des Données")
-    
-    if 'data' not in st.session_state:
-        st.warning("Aucune donnée n'a été importée. Veuillez d'abord importer des données dans l'onglet 'Importation des Données'.")
-    else:
-        df = st.session_state.data
-        control_type = st.session_state.control_type
+    if tabs[2].open:
+        st.header("Analyse des Données")
         
-        # Sélection des colonnes selon le type de contrôle
-        if control_type == "Standards CRM":
-            col1, col2 = st.columns(2)
-            with col1:
-                id_column = st.selectbox("Colonne ID/échantillon:", df.columns, key="crm_id_column")
-            with col2:
-                value_column = st.selectbox("Colonne des valeurs mesurées:", df.columns, key="crm_value_column")
+        if 'data' not in st.session_state:
+            st.warning("Aucune donnée n'a été importée. Veuillez d'abord importer des données dans l'onglet 'Importation des Données'.")
+        else:
+            df = st.session_state.data
+            control_type = st.session_state.control_type
+            
+            st.radio(
+                "Rendu des graphiques:",
+                ["Automatique", "Standard", "Grands jeux de données"],
+                horizontal=True,
+                key="render_mode",
+                help=f"En mode automatique, les séries de plus de {LARGE_DATA_THRESHOLD} points sont réduites et tracées en WebGL."
+            )
+            show_result_cache_stats()
+            
+            if control_type == "Standards CRM":
+                crm_mode = st.radio(
+                    "Mode d'analyse:",
+                    ["CRM unique", "Lot multi-CRM (base de certificats)"],
+                    horizontal=True,
+                    key="crm_mode"
+                )
+            elif control_type == "Blancs":
+                blank_mode = st.radio(
+                    "Mode d'analyse:",
+                    ["Blancs seuls", "Séquence d'analyse (contamination)"],
+                    horizontal=True,
+                    key="blank_mode"
+                )
+            
+            # Sélection des colonnes selon le type de contrôle
+            if control_type == "Standards CRM" and crm_mode == "Lot multi-CRM (base de certificats)":
+                render_crm_batch_section(df)
                 
-            if st.button("Générer la Carte de Contrôle"):
-                # Préparation des données
-                data = df[[id_column, value_column]].copy()
-                data = data.dropna()
-                data[value_column] = pd.to_numeric(data[value_column], errors='coerce')
-                data = data.dropna()
+            elif control_type == "Standards CRM":
+                render_crm_section(df)
                 
-                if data.empty:
-                    st.error("Aucune donnée numérique valide trouvée pour l'analyse.")
-                else:
-                    # Récupération des paramètres
-                    reference_value = st.session_state.reference_value
-                    tolerance_type = st.session_state.tolerance_type
-                    
-                    if tolerance_type == "Pourcentage (%)":
-                        tolerance_value = st.session_state.tolerance_percent
-                    else:
-                        tolerance_value = st.session_state.tolerance_stddev
-                        
-                    reference_stddev = st.session_state.reference_stddev if 'reference_stddev' in st.session_state else 0
-                    
-                    # Calcul des limites
-                    lower_limit, upper_limit = calculate_crm_limits(
-                        reference_value,
-                        tolerance_type,
-                        tolerance_value,
-                        reference_stddev
-                    )
-                    
-                    if lower_limit is not None and upper_limit is not None:
-                        # Statistiques
-                        values = data[value_column].values
-                        mean = np.mean(values)
-                        std_dev = np.std(values)
-                        min_val = np.min(values)
-                        max_val = np.max(values)
-                        
-                        # Création du graphique avec Plotly
-                        fig = go.Figure()
-                        
-                        # Données mesurées
-                        fig.add_trace(go.Scatter(
-                            x=data[id_column],
-                            y=data[value_column],
-                            mode='lines+markers',
-                            name='Valeur mesurée',
-                            line=dict(color='rgb(75, 192, 192)', width=2),
-                            marker=dict(size=8)
-                        ))
-                        
-                        # Valeur de référence
-                        fig.add_trace(go.Scatter(
-                            x=data[id_column],
-                            y=[reference_value] * len(data),
-                            mode='lines',
-                            name='Valeur référence',
-                            line=dict(color='rgb(54, 162, 235)', width=2, dash='dash')
-                        ))
-                        
-                        # Limites
-                        fig.add_trace(go.Scatter(
-                            x=data[id_column],
-                            y=[upper_limit] * len(data),
-                            mode='lines',
-                            name='Limite supérieure',
-                            line=dict(color='rgb(255, 99, 132)', width=2, dash='dash')
-                        ))
-                        
-                        fig.add_trace(go.Scatter(
-                            x=data[id_column],
-                            y=[lower_limit] * len(data),
-                            mode='lines',
-                            name='Limite inférieure',
-                            line=dict(color='rgb(255, 99, 132)', width=2, dash='dash')
-                        ))
-                        
-                        # Mise en forme
-                        fig.update_layout(
-                            title=f"GeoQAQC - Carte de Contrôle CRM - {value_column}",
-                            xaxis_title=id_column,
-                            yaxis_title=value_column,
-                            height=600,
-                            hovermode="closest"
-                        )
-                        
-                        st.plotly_chart(fig, use_container_width=True)
-                        
-                        # Tableau des statistiques
-                        st.subheader("Statistiques")
-                        
-                        stats_col1, stats_col2 = st.columns(2)
-                        
-                        with stats_col1:
-                            st.markdown(f"**Valeur de référence:** {reference_value:.4f}")
-                            
-                            if reference_stddev > 0:
-                                st.markdown(f"**Écart-type de référence:** {reference_stddev:.4f}")
-                            
-                            if tolerance_type == "Pourcentage (%)":
-                                st.markdown(f"**Tolérance:** {tolerance_value:.2f}%")
-                            else:
-                                st.markdown(f"**Tolérance:** {tolerance_value:.1f} × écart-type")
-                        
-                        with stats_col2:
-                            st.markdown(f"**Moyenne:** {mean:.4f}")
-                            st.markdown(f"**Écart-type:** {std_dev:.4f}")
-                            st.markdown(f"**Min:** {min_val:.4f}")
-                            st.markdown(f"**Max:** {max_val:.4f}")
-                        
-                        # Tableau de données
-                        st.subheader("Résultats détaillés")
-                        
-                        # Création d'un DataFrame avec les résultats
-                        results_df = data.copy()
-                        results_df['Écart (%)'] = ((results_df[value_column] - reference_value) / reference_value) * 100
-                        
-                        if reference_stddev > 0:
-                            results_df['Z-score'] = (results_df[value_column] - reference_value) / reference_stddev
-                        
-                        results_df['Statut'] = results_df[value_column].apply(
-                            lambda x: 'OK' if lower_limit <= x <= upper_limit else 'Hors limites'
-                        )
-                        
-                        # Afficher le tableau avec coloration conditionnelle
-                        st.dataframe(results_df.style.apply(
-                            lambda x: ['background-color: #ffcccc' if v == 'Hors limites' else '' for v in x],
-                            subset=['Statut']
-                        ))
-                        
-                        # Bouton d'export
-                        csv = results_df.to_csv(index=False)
-                        b64 = base64.b64encode(csv.encode()).decode()
-                        href = f'<a href="data:file/csv;base64,{b64}" download="geoqaqc_crm_results.csv">Télécharger les résultats (CSV)</a>'
-                        st.markdown(href, unsafe_allow_html=True)
-                        
-        elif control_type == "Duplicatas (nuage de points et régression)":
-            col1, col2 = st.columns(2)
-            with col1:
-                original_column = st.selectbox("Colonne des valeurs originales:", df.columns, key="duplicate_original_column")
-            with col2:
-                replicate_column = st.selectbox("Colonne des valeurs dupliquées:", df.columns, key="duplicate_replicate_column")
-            
-            if st.button("Générer la Carte de Contrôle"):
-                # Préparation des données
-                data = df[[original_column, replicate_column]].copy()
-                data = data.dropna()
-                data[original_column] = pd.to_numeric(data[original_column], errors='coerce')
-                data[replicate_column] = pd.to_numeric(data[replicate_column], errors='coerce')
-                data = data.dropna()
+            elif control_type == "Duplicatas (nuage de points et régression)":
+                render_duplicate_section(df)
                 
-                if data.empty:
-                    st.error("Aucune donnée numérique valide trouvée pour l'analyse.")
-                else:
-                    # Calcul de la régression linéaire
-                    x = data[original_column].values
-                    y = data[replicate_column].values
-                    
-                    slope, intercept = np.polyfit(x, y, 1)
-                    r = np.corrcoef(x, y)[0, 1]
-                    
-                    # Calcul des statistiques
-                    differences = np.abs(y - x)
-                    mean_diff = np.mean(differences)
-                    
-                    relative_diff = np.abs(y - x) / ((x + y) / 2) * 100
-                    mean_relative_diff = np.nanmean(relative_diff)
-                    
-                    # Création du graphique avec Plotly
-                    fig = go.Figure()
-                    
-                    # Nuage de points
-                    fig.add_trace(go.Scatter(
-                        x=data[original_column],
-                        y=data[replicate_column],
-                        mode='markers',
-                        name='Duplicatas',
-                        marker=dict(
-                            color='rgb(75, 192, 192)',
-                            size=10,
-                            opacity=0.8
-                        )
-                    ))
-                    
-                    # Ligne de régression
-                    x_range = np.linspace(min(x), max(x), 100)
-                    y_pred = slope * x_range + intercept
-                    
-                    fig.add_trace(go.Scatter(
-                        x=x_range,
-                        y=y_pred,
-                        mode='lines',
-                        name=f'Régression linéaire (y = {slope:.4f}x + {intercept:.4f})',
-                        line=dict(color='rgb(255, 99, 132)', width=2)
-                    ))
-                    
-                    # Ligne d'égalité parfaite (y = x)
-                    fig.add_trace(go.Scatter(
-                        x=x_range,
-                        y=x_range,
-                        mode='lines',
-                        name='Ligne d\'égalité (y=x)',
-                        line=dict(color='rgb(54, 162, 235)', width=2, dash='dash')
-                    ))
-                    
-                    # Mise en forme
-                    fig.update_layout(
-                        title=f"GeoQAQC - Analyse des Duplicatas - {original_column} vs {replicate_column}",
-                        xaxis_title=original_column,
-                        yaxis_title=replicate_column,
-                        height=600,
-                        hovermode="closest"
-                    )
-                    
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Tableau des statistiques
-                    st.subheader("Statistiques")
-                    
-                    st.markdown(f"**Équation de régression:** y = {slope:.4f}x + {intercept:.4f}")
-                    st.markdown(f"**Coefficient de corrélation (R²):** {r*r:.4f}")
-                    st.markdown(f"**Différence absolue moyenne:** {mean_diff:.4f}")
-                    st.markdown(f"**Différence relative moyenne:** {mean_relative_diff:.2f}%")
-                    
-                    # Tableau de données
-                    st.subheader("Résultats détaillés")
-                    
-                    # Création d'un DataFrame avec les résultats
-                    results_df = data.copy()
-                    results_df['Diff. Abs.'] = np.abs(results_df[replicate_column] - results_df[original_column])
-                    results_df['Diff. Rel. (%)'] = np.abs(results_df[replicate_column] - results_df[original_column]) / ((results_df[original_column] + results_df[replicate_column]) / 2) * 100
-                    
-                    st.dataframe(results_df)
-                    
-                    # Bouton d'export
-                    csv = results_df.to_csv(index=False)
-                    b64 = base64.b64encode(csv.encode()).decode()
-                    href = f'<a href="data:file/csv;base64,{b64}" download="geoqaqc_duplicate_results.csv">Télécharger les résultats (CSV)</a>'
-                    st.markdown(href, unsafe_allow_html=True)
-                    
-        elif control_type == "Blancs":
-            col1, col2 = st.columns(2)
+            elif control_type == "Blancs" and blank_mode == "Séquence d'analyse (contamination)":
+                render_carryover_section(df)
+                
+            elif control_type == "Blancs":
+                render_blank_section(df)
+                
+            elif control_type == "Tableau de bord multi-élément (CRM, blancs, duplicatas)":
+                render_multi_element_section(df)
+
+# Dans le quatrième onglet - Historique local
+with tabs[3]:
+    if tabs[3].open:
+        st.header("Historique des Résultats")
+        
+        history = get_history_store()
+        crm_ids = history.distinct("crm_id")
+        
+        if not crm_ids:
+            st.info("L'historique est vide. Les lots multi-CRM évalués dans l'onglet 'Analyse' peuvent y être enregistrés.")
+        else:
+            any_label = lambda value: "Tous" if value is None else str(value)
+            col1, col2, col3, col4 = st.columns(4)
             with col1:
-                id_column = st.selectbox("Colonne ID/échantillon:", df.columns, key="blank_id_column")
+                history_crm = st.selectbox("CRM:", [None] + crm_ids, format_func=any_label, key="history_crm")
             with col2:
-                value_column = st.selectbox("Colonne des valeurs mesurées:", df.columns, key="blank_value_column")
+                history_element = st.selectbox("Élément:", [None] + history.distinct("element"), format_func=any_label, key="history_element")
+            with col3:
+                history_lab = st.selectbox("Laboratoire:", [None] + history.distinct("lab"), format_func=any_label, key="history_lab_filter")
+            with col4:
+                history_period = st.date_input("Période:", value=(), key="history_period")
             
-            if st.button("Générer la Carte de Contrôle"):
-                # Préparation des données
-                data = df[[id_column, value_column]].copy()
-                data = data.dropna()
-                data[value_column] = pd.to_numeric(data[value_column], errors='coerce')
-                data = data.dropna()
-                
-                if data.empty:
-                    st.error("Aucune donnée numérique valide trouvée pour l'analyse.")
-                else:
-                    # Calcul des statistiques
-                    values = data[value_column].values
-                    mean = np.mean(values)
-                    std_dev = np.std(values)
-                    min_val = np.min(values)
-                    max_val = np.max(values)
-                    
-                    # Limites de détection estimées
-                    lod = mean + 3 * std_dev
-                    
-                    # Création du graphique avec Plotly
-                    fig = go.Figure()
-                    
-                    # Données mesurées
-                    fig.add_trace(go.Scatter(
-                        x=data[id_column],
-                        y=data[value_column],
-                        mode='lines+markers',
-                        name='Valeur mesurée',
-                        line=dict(color='rgb(75, 192, 192)', width=2),
-                        marker=dict(size=8)
-                    ))
-                    
-                    # Moyenne
-                    fig.add_trace(go.Scatter(
-                        x=data[id_column],
-                        y=[mean] * len(data),
-                        mode='lines',
-                        name='Moyenne',
-                        line=dict(color='rgb(54, 162, 235)', width=2, dash='dash')
-                    ))
-                    
-                    # Limite de détection
-                    fig.add_trace(go.Scatter(
-                        x=data[id_column],
-                        y=[lod] * len(data),
-                        mode='lines',
-                        name='Limite de détection (LOD)',
-                        line=dict(color='rgb(255, 99, 132)', width=2, dash='dash')
-                    ))
-                    
-                    # Mise en forme
-                    fig.update_layout(
-                        title=f"GeoQAQC - Carte de Contrôle Blancs - {value_column}",
-                        xaxis_title=id_column,
-                        yaxis_title=value_column,
-                        height=600,
-                        hovermode="closest"
-                    )
-                    
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Tableau des statistiques
-                    st.subheader("Statistiques")
-                    
-                    st.markdown(f"**Moyenne:** {mean:.4f}")
-                    st.markdown(f"**Écart-type:** {std_dev:.4f}")
-                    st.markdown(f"**Min:** {min_val:.4f}")
-                    st.markdown(f"**Max:** {max_val:.4f}")
-                    st.markdown(f"**Limite de détection estimée (LOD):** {lod:.4f}")
-                    
-                    # Tableau de données
-                    st.subheader("Résultats détaillés")
-                    
-                    # Création d'un DataFrame avec les résultats
-                    results_df = data.copy()
-                    results_df['Statut'] = results_df[value_column].apply(
-                        lambda x: 'OK' if x <= lod else 'Élevé'
-                    )
-                    
-                    # Afficher le tableau avec coloration conditionnelle
-                    st.dataframe(results_df.style.apply(
-                        lambda x: ['background-color: #ffcccc' if v == 'Élevé' else '' for v in x],
-                        subset=['Statut']
-                    ))
-                    
-                    # Bouton d'export
-                    csv = results_df.to_csv(index=False)
-                    b64 = base64.b64encode(csv.encode()).decode()
-                    href = f'<a href="data:file/csv;base64,{b64}" download="geoqaqc_blank_results.csv">Télécharger les résultats (CSV)</a>'
-                    st.markdown(href, unsafe_allow_html=True)
+            start = history_period[0] if len(history_period) > 0 else None
+            end = history_period[1] if len(history_period) > 1 else start
+            
+            results = history.query(
+                crm_id=history_crm,
+                element=history_element,
+                lab=history_lab,
+                start=start,
+                end=end,
+                limit=HISTORY_QUERY_LIMIT
+            )
+            if len(results) == HISTORY_QUERY_LIMIT:
+                st.caption(f"Les {HISTORY_QUERY_LIMIT} premiers résultats sont affichés ; précisez les filtres pour les autres.")
+            else:
+                st.caption(f"{len(results)} résultats trouvés.")
+            
+            if not results.empty:
+                flagged = (results['status'] == engine.STATUS_OUT_OF_LIMITS).to_numpy()
+                render_results_table(results, flagged, "history", engine.STATUS_OUT_OF_LIMITS, highlight_column='status')
+            
+            with st.expander("Certificats importés"):
+                st.dataframe(history.certificates())
+
+# Panneau de diagnostic optionnel, rempli après les analyses de cette exécution
+with st.sidebar:
+    st.markdown("---")
+    if st.checkbox("Diagnostics de performance", key="show_diagnostics"):
+        render_diagnostics()
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,2 @@
+"""Benchmarks de performance de GeoQAQC (voir ``python -m benchmarks.run --help``
+et ``python -m benchmarks.startup --help`` pour le démarrage à froid)."""
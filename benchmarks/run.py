@@ -0,0 +1,362 @@
+"""Benchmarks de la logique QAQC sur des jeux de données synthétiques.
+
+    python -m benchmarks.run                               # 1e3, 1e4, 1e5 lignes
+    python -m benchmarks.run --sizes 1e6 1e7 --repeat 1
+    python -m benchmarks.run --update-baseline             # nouvelle référence
+
+Chaque benchmark est chronométré sur ``--repeat`` exécutions (meilleur
+temps et médiane), puis exécuté une fois sous tracemalloc pour le pic de
+mémoire (allocations Python et numpy). Les résultats sont écrits en JSON ;
+comparés à la référence, une médiane plus lente ou une hausse de mémoire
+au-delà de la tolérance fait échouer la commande (code 1). La médiane de
+plusieurs exécutions est moins sensible qu'une mesure isolée à la charge
+passagère de la machine. La référence dépend de la
+machine : elle est régénérée avec ``--update-baseline`` sur la machine
+d'intégration.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from geoqaqc import __version__, censored, charts, engine, export, multi, precision, synthetic
+from geoqaqc.batch import evaluate_crm_batch
+from geoqaqc.certificates import CertificateStore
+from geoqaqc.ingestion import load_columns, parse_csv
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results.json")
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+# Écarts tolérés avant de signaler une régression ; les écarts absolus
+# minimaux évitent de signaler le bruit des mesures très courtes
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.25
+MIN_TIME_DELTA = 0.005
+MIN_MEMORY_DELTA_MB = 1.0
+
+# Comme dans l'application : rendu WebGL réduit au-delà de ce nombre de points
+LARGE_DATA_THRESHOLD = 20_000
+
+
+class Datasets:
+    """Jeux de données d'une taille, générés une seule fois par exécution."""
+
+    def __init__(self, n, seed=synthetic.DEFAULT_SEED):
+        self.n = n
+        self.seed = seed
+        self._cache = {}
+
+    def _get(self, name, build):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    @property
+    def crm(self):
+        return self._get("crm", lambda: synthetic.crm_results(self.n, self.seed))
+
+    @property
+    def crm_csv(self):
+        return self._get("crm_csv", lambda: self.crm.to_csv(index=False).encode("utf-8"))
+
+    @property
+    def blanks(self):
+        return self._get("blanks", lambda: synthetic.blank_results(self.n, self.seed))
+
+    @property
+    def duplicates(self):
+        return self._get("duplicates", lambda: synthetic.duplicate_pairs(self.n, self.seed))
+
+    @property
+    def assays(self):
+        return self._get("assays", lambda: synthetic.assay_table(self.n, self.seed))
+
+    @property
+    def store(self):
+        return self._get("store", lambda: CertificateStore(synthetic.certificate_table()))
+
+    @property
+    def crm_series(self):
+        # Série d'un seul CRM et d'un seul élément, comme la carte de contrôle
+        def build():
+            crm = self.crm[self.crm["crm_id"] == "CRM-MED"]
+            value, std_dev = synthetic.CERTIFIED_VALUES["CRM-MED"]["Au_ppm"]
+            return crm["sample_id"].to_numpy(), crm["Au_ppm"].to_numpy(), value, std_dev
+        return self._get("crm_series", build)
+
+    @property
+    def crm_results_table(self):
+        def build():
+            ids, values, value, std_dev = self.crm_series
+            lower, upper = engine.crm_limits(value, engine.TOLERANCE_STDDEV, 2, std_dev)
+            result = engine.evaluate_crm(values, value, lower, upper, std_dev)
+            return pd.DataFrame({
+                "sample_id": ids,
+                "Au_ppm": values,
+                "Écart (%)": result.deviation_pct,
+                "Z-score": result.z_score,
+                "Statut": engine.status_column(result.out_of_limits),
+            })
+        return self._get("crm_results_table", build)
+
+
+def bench_ingestion_csv(data):
+    return parse_csv(data.crm_csv, ",")
+
+
+def bench_ingestion_blocs(data):
+    return load_columns(BytesIO(data.crm_csv), ",", ["crm_id"] + synthetic.ELEMENTS, synthetic.ELEMENTS)
+
+
+def bench_crm_evaluation(data):
+    _, values, value, std_dev = data.crm_series
+    lower, upper = engine.crm_limits(value, engine.TOLERANCE_STDDEV, 2, std_dev)
+    return engine.evaluate_crm(values, value, lower, upper, std_dev)
+
+
+def bench_crm_lot(data):
+    return evaluate_crm_batch(
+        data.crm, "crm_id", synthetic.ELEMENTS, data.store, engine.TOLERANCE_STDDEV, 2, synthetic.METHOD
+    )
+
+
+def bench_blancs_lod(data):
+    parsed = censored.parse_censored(data.blanks["Au_ppm"], negative_as_censored=True)
+    return censored.evaluate_censored_blanks(parsed, censored.SUBSTITUTE_ROS)
+
+
+def bench_duplicatas_regression(data):
+    x = data.duplicates["original"].to_numpy()
+    y = data.duplicates["duplicate"].to_numpy()
+    return engine.evaluate_duplicates(x, y), precision.evaluate_precision(x, y)
+
+
+def bench_multi_element(data):
+    return multi.evaluate_multi_element(
+        data.assays, "type", synthetic.WIDE_ELEMENTS, "batch", data.store, engine.TOLERANCE_STDDEV, 2, synthetic.METHOD,
+        blank_labels=[synthetic.BLANK_LABEL], duplicate_labels=[synthetic.DUPLICATE_LABEL],
+        id_column="sample_id", parent_column="parent_id"
+    )
+
+
+def bench_figure_crm(data):
+    ids, values, value, std_dev = data.crm_series
+    lower, upper = engine.crm_limits(value, engine.TOLERANCE_STDDEV, 2, std_dev)
+    fig, _ = charts.crm_figure(
+        ids, values, value, lower, upper, "Au_ppm", "sample_id",
+        large=len(values) > LARGE_DATA_THRESHOLD, out_of_limits=(values < lower) | (values > upper)
+    )
+    return charts.payload_size(fig)
+
+
+def bench_figure_duplicatas(data):
+    x = data.duplicates["original"].to_numpy()
+    y = data.duplicates["duplicate"].to_numpy()
+    result = engine.evaluate_duplicates(x, y)
+    fig, _ = charts.duplicate_figure(
+        x, y, result.slope, result.intercept, "original", "duplicate",
+        binned=len(x) > LARGE_DATA_THRESHOLD, rel_diff_pct=result.rel_diff_pct, outlier_threshold=30
+    )
+    return charts.payload_size(fig)
+
+
+def bench_export_csv_gz(data):
+    return export.export_frame(data.crm_results_table, export.CSV_GZ)
+
+
+def bench_export_parquet(data):
+    return export.export_frame(data.crm_results_table, export.PARQUET)
+
+
+BENCHMARKS = {
+    "ingestion_csv": bench_ingestion_csv,
+    "ingestion_blocs": bench_ingestion_blocs,
+    "crm_evaluation": bench_crm_evaluation,
+    "crm_lot": bench_crm_lot,
+    "blancs_lod": bench_blancs_lod,
+    "duplicatas_regression": bench_duplicatas_regression,
+    "multi_element": bench_multi_element,
+    "figure_crm": bench_figure_crm,
+    "figure_duplicatas": bench_figure_duplicatas,
+    "export_csv_gz": bench_export_csv_gz,
+    "export_parquet": bench_export_parquet,
+}
+
+
+def available_benchmarks():
+    names = list(BENCHMARKS)
+    if export.PARQUET not in export.available_formats():
+        names.remove("export_parquet")
+    return names
+
+
+def measure(function, data, repeat):
+    """Meilleur temps et médiane (s), puis pic de mémoire (Mo) d'une exécution tracée."""
+    function(data)  # échauffement : imports paresseux, caches des données
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(data)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        function(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), float(np.median(times)), (peak - baseline) / 2 ** 20
+
+
+def environment():
+    versions = {"numpy": np.__version__, "pandas": pd.__version__}
+    for module in ("plotly", "pyarrow"):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return {
+        "geoqaqc": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        **versions,
+    }
+
+
+def run(sizes, names, repeat, seed=synthetic.DEFAULT_SEED):
+    results = []
+    for n in sizes:
+        data = Datasets(n, seed)
+        for name in names:
+            best, median, peak_mb = measure(BENCHMARKS[name], data, repeat)
+            results.append({
+                "benchmark": name,
+                "rows": n,
+                "seconds": round(best, 6),
+                "seconds_median": round(median, 6),
+                "rows_per_second": round(n / best) if best > 0 else None,
+                "peak_mb": round(peak_mb, 3),
+                "repeat": repeat,
+            })
+            print(
+                f"{name:<24} {n:>10} lignes  {median * 1000:10.2f} ms (médiane)  {peak_mb:9.2f} Mo",
+                file=sys.stderr
+            )
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "results": results,
+    }
+
+
+def compare(report, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Régressions par rapport à la référence (benchmark, lignes, mesure, référence, actuel).
+
+    Les temps comparés sont les médianes des exécutions chronométrées.
+    """
+    reference = {(row["benchmark"], row["rows"]): row for row in baseline["results"]}
+    regressions = []
+    for row in report["results"]:
+        base = reference.get((row["benchmark"], row["rows"]))
+        if base is None:
+            continue
+        before, after = base["seconds_median"], row["seconds_median"]
+        if after > before * (1 + time_tolerance) and after - before > MIN_TIME_DELTA:
+            regressions.append((row["benchmark"], row["rows"], "seconds_median", before, after))
+        if (row["peak_mb"] > base["peak_mb"] * (1 + memory_tolerance)
+                and row["peak_mb"] - base["peak_mb"] > MIN_MEMORY_DELTA_MB):
+            regressions.append((row["benchmark"], row["rows"], "peak_mb", base["peak_mb"], row["peak_mb"]))
+    return regressions
+
+
+def write_json(path, content):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump(content, output, indent=2, ensure_ascii=False)
+        output.write("\n")
+
+
+def save_datasets(directory, sizes, seed):
+    """Écrit les jeux synthétiques en CSV (pour essayer l'application ou la CLI)."""
+    os.makedirs(directory, exist_ok=True)
+    synthetic.certificate_table().to_csv(os.path.join(directory, "certificats.csv"), index=False)
+    for n in sizes:
+        data = Datasets(n, seed)
+        data.crm.to_csv(os.path.join(directory, f"crm_{n}.csv"), index=False)
+        data.blanks.to_csv(os.path.join(directory, f"blancs_{n}.csv"), index=False)
+        data.duplicates.to_csv(os.path.join(directory, f"duplicatas_{n}.csv"), index=False)
+        data.assays.to_csv(os.path.join(directory, f"analyses_{n}.csv"), index=False)
+
+
+def _size(text):
+    return int(float(text))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Benchmarks de temps et de mémoire de GeoQAQC sur des données synthétiques.",
+    )
+    parser.add_argument("--sizes", type=_size, nargs="+", default=DEFAULT_SIZES,
+                        help="nombres de lignes (1e3 à 1e7)")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="benchmarks à exécuter")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="exécutions chronométrées par mesure (médiane comparée à la référence)")
+    parser.add_argument("--seed", type=int, default=synthetic.DEFAULT_SEED, help="graine des données")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="fichier JSON des résultats")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="fichier JSON de référence")
+    parser.add_argument("--update-baseline", action="store_true", help="remplace la référence par ces résultats")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE,
+                        help="ralentissement toléré de la médiane (0.25 = 25 %%)")
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE,
+                        help="hausse de mémoire tolérée (0.25 = 25 %%)")
+    parser.add_argument("--save-data", metavar="DOSSIER", help="écrit aussi les jeux synthétiques en CSV")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    names = [name for name in available_benchmarks() if args.only is None or name in args.only]
+    if args.save_data:
+        save_datasets(args.save_data, args.sizes, args.seed)
+
+    report = run(args.sizes, names, args.repeat, args.seed)
+    write_json(args.output, report)
+    print(f"Résultats écrits dans {args.output}.", file=sys.stderr)
+
+    if args.update_baseline:
+        write_json(args.baseline, report)
+        print(f"Référence mise à jour : {args.baseline}.", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"Aucune référence ({args.baseline}) ; comparaison ignorée.", file=sys.stderr)
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare(report, baseline, args.time_tolerance, args.memory_tolerance)
+    for name, n, metric, before, after in regressions:
+        print(f"Régression {name} ({n} lignes) : {metric} {before:g} -> {after:g}", file=sys.stderr)
+    if regressions:
+        return 1
+    print("Aucune régression par rapport à la référence.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Benchmark du démarrage à froid de l'application.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --target 1.0 --repeat 5
+
+Chaque mesure est faite dans un nouveau processus, comme un conteneur qui
+démarre : import de Streamlit puis première exécution du script pour une
+nouvelle session (temps jusqu'au premier affichage), puis une seconde
+session dans le même processus (imports déjà faits). La commande échoue
+(code 1) si la médiane du premier affichage dépasse la cible ou si un
+module d'analyse ou de tracé est chargé avant la première analyse.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(os.path.dirname(BENCHMARK_DIR), "GeoQAQC1.py")
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "startup_results.json")
+
+# Cible du temps jusqu'au premier affichage (s), import de Streamlit compris
+TARGET_SECONDS = 1.5
+DEFAULT_REPEAT = 3
+
+# Modules qui ne doivent pas être chargés par le premier affichage
+# (Streamlit importe lui-même plotly.graph_objects)
+DEFERRED_MODULES = [
+    "numpy",
+    "pandas",
+    "plotly.express",
+    "pyarrow",
+    "geoqaqc.batch",
+    "geoqaqc.carryover",
+    "geoqaqc.censored",
+    "geoqaqc.certificates",
+    "geoqaqc.charts",
+    "geoqaqc.control_rules",
+    "geoqaqc.engine",
+    "geoqaqc.export",
+    "geoqaqc.history",
+    "geoqaqc.multi",
+    "geoqaqc.ingestion",
+    "geoqaqc.precision",
+    "geoqaqc.results_view",
+]
+
+
+def measure_process(app_path):
+    """Mesures d'un processus neuf (exécuté avec ``--process``)."""
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    imported = time.perf_counter()
+
+    app = AppTest.from_file(app_path, default_timeout=60).run()
+    first_render = time.perf_counter()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+
+    AppTest.from_file(app_path, default_timeout=60).run()
+    new_session = time.perf_counter()
+    return {
+        "streamlit_import": imported - start,
+        "first_render": first_render - start,
+        "script_run": first_render - imported,
+        "new_session": new_session - first_render,
+        "deferred_modules_loaded": loaded,
+    }
+
+
+def run_process(app_path):
+    # Répertoire de données temporaire : la mesure ne touche pas aux données locales
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(os.environ, GEOQAQC_DATA_DIR=data_dir, GEOQAQC_DIAGNOSTICS_LOG="")
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--process", app_path],
+            cwd=os.path.dirname(BENCHMARK_DIR), env=env, capture_output=True, text=True, check=True,
+        )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.startup",
+        description="Temps jusqu'au premier affichage de GeoQAQC, dans des processus neufs.",
+    )
+    parser.add_argument("--target", type=float, default=TARGET_SECONDS, help="cible du premier affichage (s)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="processus mesurés")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="fichier JSON des résultats")
+    parser.add_argument("--process", metavar="APP", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.process:
+        print(json.dumps(measure_process(args.process)))
+        return 0
+
+    # Importé ici : le processus mesuré ne doit pas charger numpy ni pandas
+    from benchmarks.run import environment, write_json
+
+    runs = []
+    for _ in range(args.repeat):
+        runs.append(run_process(APP_PATH))
+        print(
+            f"premier affichage {runs[-1]['first_render'] * 1000:8.0f} ms  "
+            f"(Streamlit {runs[-1]['streamlit_import'] * 1000:.0f} ms, "
+            f"script {runs[-1]['script_run'] * 1000:.0f} ms)  "
+            f"nouvelle session {runs[-1]['new_session'] * 1000:6.0f} ms",
+            file=sys.stderr,
+        )
+
+    first_render = _median([run["first_render"] for run in runs])
+    loaded = sorted({name for run in runs for name in run["deferred_modules_loaded"]})
+    write_json(args.output, {
+        "environment": environment(),
+        "target_seconds": args.target,
+        "first_render_median": round(first_render, 4),
+        "new_session_median": round(_median([run["new_session"] for run in runs]), 4),
+        "runs": runs,
+    })
+    print(f"Résultats écrits dans {args.output}.", file=sys.stderr)
+
+    failed = False
+    if first_render > args.target:
+        print(f"Premier affichage trop lent : {first_render:.2f} s > {args.target:.2f} s.", file=sys.stderr)
+        failed = True
+    if loaded:
+        print(f"Modules chargés avant la première analyse : {', '.join(loaded)}.", file=sys.stderr)
+        failed = True
+    if failed:
+        return 1
+    print(f"Premier affichage : {first_render:.2f} s (cible {args.target:.2f} s).", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+"""GeoQAQC - Contrôle Qualité des Analyses Chimiques des Roches."""
+
+__version__ = "1.0.0"
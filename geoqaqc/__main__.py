@@ -0,0 +1,5 @@
+import sys
+
+from geoqaqc.cli import main
+
+sys.exit(main())
@@ -0,0 +1,149 @@
+"""Évaluation d'un lot multi-CRM et multi-élément en une seule passe.
+
+Les lignes sont regroupées par CRM (``pd.factorize``) ; les valeurs
+certifiées sont alignées sur chaque ligne par indexation, puis toutes les
+paires CRM × élément sont comptées avec ``np.bincount``.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from geoqaqc.censored import parse_censored_block
+from geoqaqc.engine import STATUS_OK, TOLERANCE_PERCENT
+
+STATUS_FAILED = "Échec"
+STATUS_NO_CERTIFICATE = "Sans certificat"
+
+
+@dataclass
+class CrmBatchResult:
+    """Résumé du lot ; chaque tableau est indexé par CRM, une colonne par élément."""
+
+    count: pd.DataFrame
+    failed: pd.DataFrame
+    mean: pd.DataFrame
+    reference_value: pd.DataFrame
+    reference_stddev: pd.DataFrame
+    lower_limit: pd.DataFrame
+    upper_limit: pd.DataFrame
+
+    @property
+    def failure_rate(self):
+        evaluated = (self.count > 0) & self.lower_limit.notna()
+        return self.failed / self.count.where(evaluated)
+
+    @property
+    def status(self):
+        """Matrice de statuts : OK, Échec, vide (aucun résultat) ou Sans certificat.
+
+        Un couple sans limites calculables (pas de valeur certifiée, ou pas
+        d'écart-type en tolérance par écarts-types) est « Sans certificat ».
+        """
+        status = np.where(self.failed.to_numpy() > 0, STATUS_FAILED, STATUS_OK).astype(object)
+        status[self.count.to_numpy() == 0] = ""
+        status[np.isnan(self.lower_limit.to_numpy())] = STATUS_NO_CERTIFICATE
+        return pd.DataFrame(status, index=self.count.index, columns=self.count.columns)
+
+    def tables(self):
+        """Tableaux du résumé, CRM en première colonne, pour l'export en archive."""
+        tables = {
+            "statut": self.status,
+            "taux_hors_limites": self.failure_rate,
+            "nombre_resultats": self.count,
+            "nombre_hors_limites": self.failed,
+            "moyenne": self.mean,
+            "valeur_certifiee": self.reference_value,
+            "ecart_type_certifie": self.reference_stddev,
+            "limite_inferieure": self.lower_limit,
+            "limite_superieure": self.upper_limit,
+        }
+        return {name: table.reset_index() for name, table in tables.items()}
+
+
+def crm_keys(column):
+    """Identifiants de CRM normalisés (texte sans espaces, NaN conservés)."""
+    return column.astype(str).str.strip().where(column.notna())
+
+
+def numeric_block(frame, columns):
+    """Colonnes converties en une matrice float64 (lignes × colonnes).
+
+    Une valeur censurée (``<0.005``, ``>10``) vaut sa limite, comme sur la
+    carte de contrôle d'un CRM ; un texte illisible devient NaN.
+    """
+    if not columns:
+        return np.empty((len(frame), 0))
+    return parse_censored_block(frame, columns).values
+
+
+def batch_limits(reference_value, reference_stddev, tolerance_type, tolerance_value):
+    """Version matricielle de ``engine.crm_limits`` (NaN si l'écart-type manque)."""
+    if tolerance_type == TOLERANCE_PERCENT:
+        tolerance = tolerance_value / 100
+        return reference_value * (1 - tolerance), reference_value * (1 + tolerance)
+    stddev = np.where(reference_stddev > 0, reference_stddev, np.nan)
+    return reference_value - tolerance_value * stddev, reference_value + tolerance_value * stddev
+
+
+def evaluate_crm_batch(frame, crm_column, element_columns, store, tolerance_type, tolerance_value, method=None):
+    """Évalue chaque couple CRM × élément du lot contre la base de certificats."""
+    element_columns = list(element_columns)
+    codes, crm_ids = pd.factorize(crm_keys(frame[crm_column]), sort=True)
+    crm_ids = list(crm_ids)
+    n_crm, n_elements = len(crm_ids), len(element_columns)
+
+    values = numeric_block(frame, element_columns)
+
+    ref_value, ref_stddev = store.reference_matrix(crm_ids, element_columns, method)
+    lower, upper = batch_limits(ref_value, ref_stddev, tolerance_type, tolerance_value)
+
+    # Les lignes sans CRM identifié (code -1) sont ignorées
+    rows = codes >= 0
+    codes = codes[rows]
+    values = values[rows]
+
+    row_lower = lower[codes]
+    row_upper = upper[codes]
+    valid = np.isfinite(values)
+    failed = valid & np.isfinite(row_lower) & ((values < row_lower) | (values > row_upper))
+
+    pair = (codes[:, None] * n_elements + np.arange(n_elements)).ravel()
+    size = n_crm * n_elements
+    count = np.bincount(pair, weights=valid.ravel(), minlength=size).reshape(n_crm, n_elements)
+    n_failed = np.bincount(pair, weights=failed.ravel(), minlength=size).reshape(n_crm, n_elements)
+    total = np.bincount(pair, weights=np.where(valid, values, 0.0).ravel(), minlength=size).reshape(n_crm, n_elements)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / count
+
+    def matrix(data):
+        return pd.DataFrame(data, index=pd.Index(crm_ids, name=crm_column), columns=element_columns)
+
+    return CrmBatchResult(
+        count=matrix(count.astype(np.int64)),
+        failed=matrix(n_failed.astype(np.int64)),
+        mean=matrix(mean),
+        reference_value=matrix(ref_value),
+        reference_stddev=matrix(ref_stddev),
+        lower_limit=matrix(lower),
+        upper_limit=matrix(upper),
+    )
+
+
+def row_flags(frame, crm_column, element_columns, result):
+    """Masques ligne × élément (évalué, hors limites) d'après les limites du lot."""
+    element_columns = list(element_columns)
+    codes = result.lower_limit.index.get_indexer(crm_keys(frame[crm_column]))
+    lower = result.lower_limit[element_columns].to_numpy()
+    upper = result.upper_limit[element_columns].to_numpy()
+    values = numeric_block(frame, element_columns)
+
+    known = codes >= 0
+    row_lower = np.full(values.shape, np.nan)
+    row_upper = np.full(values.shape, np.nan)
+    row_lower[known] = lower[codes[known]]
+    row_upper[known] = upper[codes[known]]
+
+    evaluated = np.isfinite(values) & np.isfinite(row_lower)
+    failed = evaluated & ((values < row_lower) | (values > row_upper))
+    return evaluated, failed
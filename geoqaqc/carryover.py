@@ -0,0 +1,185 @@
+"""Contamination par report (carry-over) le long de la séquence d'analyse.
+
+Le flux complet des échantillons (routine, blancs, CRM) est trié une fois
+par lot puis par position dans la séquence. Chaque blanc ou CRM est relié
+aux N échantillons de routine qui le précèdent par une jointure fenêtrée :
+``np.searchsorted`` sur les positions triées des échantillons de routine
+donne, pour tous les contrôles à la fois, une matrice d'indices
+(contrôles × N), sans boucle imbriquée.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from geoqaqc.defaults import DEFAULT_WINDOW
+
+KIND_ROUTINE = 0
+KIND_BLANK = 1
+KIND_CRM = 2
+KIND_LABELS = ["Routine", "Blanc", "CRM"]
+
+# Seuil de teneur par défaut : centile des échantillons de routine
+DEFAULT_GRADE_PERCENTILE = 95.0
+
+
+@dataclass
+class CarryoverResult:
+    """Contrôles (blancs et CRM) reliés aux échantillons de routine précédents.
+
+    ``positions`` sont les positions des contrôles dans le tableau d'origine.
+    """
+
+    positions: np.ndarray
+    kinds: np.ndarray
+    values: np.ndarray
+    previous_grade: np.ndarray
+    max_grade: np.ndarray
+    max_lag: np.ndarray
+    follows_high_grade: np.ndarray
+    contaminated: np.ndarray
+    window: int
+    grade_threshold: float
+    blank_limit: float
+
+    @property
+    def blanks(self):
+        return self.kinds == KIND_BLANK
+
+    @property
+    def carryover_pct(self):
+        """Valeur du contrôle en % de la plus forte teneur précédente."""
+        ratio = np.full(self.values.shape, np.nan)
+        np.divide(self.values * 100, self.max_grade, out=ratio, where=self.max_grade > 0)
+        return ratio
+
+    def table(self):
+        return pd.DataFrame({
+            "Ligne": self.positions,
+            "Type": pd.Categorical.from_codes(self.kinds, categories=KIND_LABELS),
+            "Valeur": self.values,
+            "Teneur précédente": self.previous_grade,
+            f"Teneur max. ({self.window} précédents)": self.max_grade,
+            "Rang de la teneur max.": self.max_lag,
+            "Report (%)": self.carryover_pct,
+            "Suit une forte teneur": self.follows_high_grade,
+            "Contamination probable": self.contaminated,
+        })
+
+
+def sample_kinds(types, blank_labels, crm_labels):
+    """Codes routine / blanc / CRM à partir de la colonne de type d'échantillon."""
+    types = pd.Series(types)
+    codes, uniques = pd.factorize(types.astype(str).str.strip().where(types.notna()))
+    unique_kinds = np.full(len(uniques), KIND_ROUTINE, dtype=np.int8)
+    unique_kinds[pd.Index(uniques).isin([str(label).strip() for label in blank_labels])] = KIND_BLANK
+    unique_kinds[pd.Index(uniques).isin([str(label).strip() for label in crm_labels])] = KIND_CRM
+    return np.where(codes < 0, KIND_ROUTINE, unique_kinds[codes]).astype(np.int8)
+
+
+def sequence_keys(column):
+    """Clé de tri de la séquence : numérique, sinon date, sinon None (ordre du fichier)."""
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    numeric = pd.to_numeric(column, errors="coerce")
+    if numeric.notna().mean() >= 0.5:
+        return numeric.to_numpy(dtype=np.float64)
+    dates = pd.to_datetime(column, errors="coerce")
+    if dates.notna().mean() >= 0.5:
+        return dates.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    return None
+
+
+def _is_sorted(values):
+    return bool(np.all(values[1:] >= values[:-1]))
+
+
+def _is_sorted_where(values, mask):
+    return bool(np.all(values[1:][mask] >= values[:-1][mask]))
+
+
+def sequence_order(sequence=None, batches=None):
+    """Ordre de la séquence (lot puis position), stable ; ``None`` si déjà trié."""
+    if batches is None:
+        if sequence is None or _is_sorted(sequence):
+            return None
+        return np.argsort(sequence, kind="stable")
+    # Cas fréquent : le fichier est déjà dans l'ordre d'analyse
+    if _is_sorted(batches):
+        same = batches[1:] == batches[:-1]
+        if sequence is None or _is_sorted_where(sequence, same):
+            return None
+    return np.lexsort((batches,) if sequence is None else (sequence, batches))
+
+
+def detect_carryover(grades, kinds, window=DEFAULT_WINDOW, grade_threshold=None, blank_limit=None,
+                     sequence=None, batches=None, censored_left=None):
+    """Relie chaque contrôle aux ``window`` échantillons de routine précédents.
+
+    ``grades`` contient la teneur de chaque ligne (routine et contrôles, même
+    élément) ; ``batches`` (identifiants de lot) limite la fenêtre au lot. Un blanc
+    est signalé s'il suit une teneur >= ``grade_threshold`` (par défaut le
+    95e centile des échantillons de routine) et dépasse ``blank_limit`` (par
+    défaut moyenne + 3 écarts-types des blancs). Les blancs censurés à
+    gauche (``censored_left``) ne sont jamais signalés comme contaminés.
+    """
+    if window < 1:
+        raise ValueError("La fenêtre doit comporter au moins un échantillon.")
+    grades = np.asarray(grades, dtype=np.float64)
+    kinds = np.asarray(kinds, dtype=np.int8)
+    if batches is not None:
+        batches = pd.factorize(pd.Series(batches), use_na_sentinel=False)[0]
+    order = sequence_order(sequence, batches)
+    if order is not None:
+        grades, kinds = grades[order], kinds[order]
+        if batches is not None:
+            batches = batches[order]
+        if censored_left is not None:
+            censored_left = np.asarray(censored_left)[order]
+
+    routine = np.flatnonzero(kinds == KIND_ROUTINE)
+    controls = np.flatnonzero(kinds != KIND_ROUTINE)
+
+    if grade_threshold is None:
+        routine_grades = grades[routine]
+        routine_grades = routine_grades[np.isfinite(routine_grades)]
+        grade_threshold = float(np.percentile(routine_grades, DEFAULT_GRADE_PERCENTILE)) if routine_grades.size else np.inf
+
+    # Jointure fenêtrée : k échantillons de routine précèdent chaque contrôle
+    k = np.searchsorted(routine, controls)
+    previous = k[:, None] - np.arange(1, window + 1)[None, :]
+    valid = (previous >= 0) & (routine.size > 0)
+    previous = np.append(routine, 0)[np.where(valid, previous, routine.size)]
+    if batches is not None:
+        valid &= batches[previous] == batches[controls][:, None]
+    window_grades = np.where(valid, grades[previous], np.nan)
+
+    max_grade = np.fmax.reduce(window_grades, axis=1)
+    filled = np.where(np.isnan(window_grades), -np.inf, window_grades)
+    max_lag = np.where(np.isnan(max_grade), 0, np.argmax(filled, axis=1) + 1)
+
+    values = grades[controls]
+    control_kinds = kinds[controls]
+    blanks = control_kinds == KIND_BLANK
+    if blank_limit is None:
+        blank_values = values[blanks & np.isfinite(values)]
+        blank_limit = float(blank_values.mean() + 3 * blank_values.std()) if blank_values.size else np.inf
+
+    follows_high_grade = blanks & (max_grade >= grade_threshold)
+    contaminated = follows_high_grade & (values > blank_limit)
+    if censored_left is not None:
+        contaminated &= ~np.asarray(censored_left)[controls]
+
+    return CarryoverResult(
+        positions=controls if order is None else order[controls],
+        kinds=control_kinds,
+        values=values,
+        previous_grade=window_grades[:, 0],
+        max_grade=max_grade,
+        max_lag=max_lag,
+        follows_high_grade=follows_high_grade,
+        contaminated=contaminated,
+        window=window,
+        grade_threshold=float(grade_threshold),
+        blank_limit=float(blank_limit),
+    )
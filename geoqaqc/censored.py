@@ -0,0 +1,339 @@
+"""Valeurs censurées des certificats de laboratoire (``<0.005``, ``>10``, ``BDL``).
+
+La colonne est factorisée (``pd.factorize``) : chaque valeur distincte
+est lue une seule fois, puis le résultat est reporté sur les lignes par
+leurs codes. Aucune expression régulière n'est appliquée ligne par ligne.
+
+Une valeur censurée à gauche garde sa limite de détection comme valeur ;
+les statistiques proposent ensuite une substitution (moitié de la limite,
+limite) ou une estimation par Kaplan-Meier ou ROS au lieu d'écarter les
+lignes.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from geoqaqc.engine import BlankResult, SummaryStats
+
+CENSORING_NONE = 0
+CENSORING_LEFT = 1
+CENSORING_RIGHT = 2
+CENSORING_LABELS = ["", "<", ">"]
+
+# Mentions sans valeur signifiant « sous la limite de détection »
+BELOW_DETECTION_LABELS = ("BDL", "<DL", "<LD", "LD", "ND", "N.D.", "NON DETECTE", "NON DÉTECTÉ", "TRACE")
+
+SUBSTITUTE_HALF_LIMIT = "Moitié de la limite de détection"
+SUBSTITUTE_LIMIT = "Limite de détection"
+SUBSTITUTE_KAPLAN_MEIER = "Kaplan-Meier"
+SUBSTITUTE_ROS = "ROS (régression sur statistiques d'ordre)"
+SUBSTITUTE_EXCLUDE = "Exclure les valeurs censurées"
+SUBSTITUTION_METHODS = [
+    SUBSTITUTE_HALF_LIMIT,
+    SUBSTITUTE_LIMIT,
+    SUBSTITUTE_KAPLAN_MEIER,
+    SUBSTITUTE_ROS,
+    SUBSTITUTE_EXCLUDE,
+]
+
+
+@dataclass
+class CensoredValues:
+    """Valeurs (limite pour les censurées, NaN si illisible) et codes de censure."""
+
+    values: np.ndarray
+    censoring: np.ndarray
+
+    @property
+    def left(self):
+        return self.censoring == CENSORING_LEFT
+
+    @property
+    def right(self):
+        return self.censoring == CENSORING_RIGHT
+
+    @property
+    def n_censored(self):
+        return int(np.count_nonzero(self.censoring))
+
+    def labels(self):
+        """Colonne catégorielle « < » / « > » pour les tableaux de résultats."""
+        return pd.Categorical.from_codes(self.censoring, categories=CENSORING_LABELS)
+
+    def take(self, mask):
+        return CensoredValues(values=self.values[mask], censoring=self.censoring[mask])
+
+
+def _parse_text(uniques, default_limit):
+    text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    values = pd.to_numeric(text, errors="coerce").to_numpy(dtype=np.float64, copy=True)
+    censoring = np.full(values.size, CENSORING_NONE, dtype=np.int8)
+    pending = np.isnan(values)
+    if not pending.any():
+        return values, censoring
+
+    text = text[pending]
+    prefix = text.str[:1]
+    left = prefix.eq("<").to_numpy(dtype=bool, copy=True)
+    right = prefix.eq(">").to_numpy(dtype=bool)
+    # « <0.005 », « < 0,005 », « <=0.005 »
+    number = text.where(~(left | right), text.str[1:]).str.lstrip("= ").str.replace(",", ".", regex=False)
+    parsed = pd.to_numeric(number, errors="coerce").to_numpy(dtype=np.float64, copy=True)
+
+    label = text.str.upper().isin(BELOW_DETECTION_LABELS).to_numpy(dtype=bool)
+    left |= label
+    parsed[label] = np.nan if default_limit is None else default_limit
+
+    codes = np.full(parsed.size, CENSORING_NONE, dtype=np.int8)
+    codes[left] = CENSORING_LEFT
+    codes[right] = CENSORING_RIGHT
+    # Texte illisible : ni valeur ni censure
+    codes[np.isnan(parsed) & ~label] = CENSORING_NONE
+    values[pending] = parsed
+    censoring[pending] = codes
+    return values, censoring
+
+
+def censor_negatives(parsed):
+    """Valeurs négatives (``-0.005``) lues comme censurées à gauche (« <0.005 »).
+
+    Convention de certains laboratoires pour les blancs ; à ne pas appliquer
+    aux CRM ni aux échantillons, dont une valeur négative reste une mesure.
+    """
+    negative = parsed.values < 0
+    values = np.where(negative, -parsed.values, parsed.values)
+    censoring = np.where(negative, CENSORING_LEFT, parsed.censoring).astype(np.int8)
+    return CensoredValues(values=values, censoring=censoring)
+
+
+def parse_censored(column, default_limit=None, negative_as_censored=False):
+    """Convertit une colonne en valeurs et codes de censure en une passe.
+
+    ``default_limit`` est la limite attribuée aux mentions sans valeur
+    (``BDL``) ; une valeur négative (``-0.005``) est lue comme « <0.005 »
+    si ``negative_as_censored`` (voir ``censor_negatives``).
+    """
+    column = pd.Series(column)
+    if pd.api.types.is_numeric_dtype(column):
+        values = column.to_numpy(dtype=np.float64, copy=True)
+        censoring = np.zeros(values.size, dtype=np.int8)
+    else:
+        # Les certificats répètent peu de valeurs distinctes : chacune n'est lue qu'une fois
+        codes, uniques = pd.factorize(column)
+        unique_values, unique_censoring = _parse_text(uniques, default_limit)
+        missing = codes < 0
+        values = np.append(unique_values, np.nan)[np.where(missing, unique_values.size, codes)]
+        censoring = np.append(unique_censoring, CENSORING_NONE)[np.where(missing, unique_censoring.size, codes)]
+
+    parsed = CensoredValues(values=values, censoring=censoring)
+    return censor_negatives(parsed) if negative_as_censored else parsed
+
+
+def parse_censored_block(frame, columns, default_limit=None, negative_as_censored=False):
+    """Comme ``parse_censored`` pour plusieurs colonnes : matrices lignes × colonnes.
+
+    Les colonnes numériques sont converties ensemble ; les colonnes texte
+    sont empilées et factorisées en une seule fois, de sorte qu'une valeur
+    répétée d'une colonne à l'autre (``<0.005``) n'est lue qu'une fois.
+    """
+    columns = list(columns)
+    n_rows = len(frame)
+    values = np.full((n_rows, len(columns)), np.nan)
+    censoring = np.zeros((n_rows, len(columns)), dtype=np.int8)
+    numeric = [i for i, column in enumerate(columns) if pd.api.types.is_numeric_dtype(frame[column])]
+    text = [i for i in range(len(columns)) if i not in numeric]
+    if numeric:
+        block = frame[[columns[i] for i in numeric]]
+        values[:, numeric] = block.to_numpy(dtype=np.float64, na_value=np.nan)
+    if text:
+        stacked = pd.concat([frame[columns[i]] for i in text], ignore_index=True)
+        parsed = parse_censored(stacked, default_limit, negative_as_censored=False)
+        values[:, text] = parsed.values.reshape(len(text), n_rows).T
+        censoring[:, text] = parsed.censoring.reshape(len(text), n_rows).T
+
+    parsed = CensoredValues(values=values, censoring=censoring)
+    return censor_negatives(parsed) if negative_as_censored else parsed
+
+
+def numeric_columns(frame, exclude=()):
+    """Colonnes numériques, y compris celles dont la moitié au moins des valeurs
+    sont des nombres ou des valeurs censurées lisibles."""
+    columns = []
+    for column in frame.columns:
+        if column in exclude:
+            continue
+        if pd.api.types.is_numeric_dtype(frame[column]):
+            columns.append(column)
+        elif frame[column].notna().any():
+            parsed = parse_censored(frame[column])
+            if np.isfinite(parsed.values).sum() >= frame[column].notna().sum() / 2:
+                columns.append(column)
+    return columns
+
+
+def _norm_ppf(p):
+    """Quantiles de la loi normale (approximation rationnelle d'Acklam)."""
+    a = [-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00]
+    b = [-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01]
+    c = [-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00]
+    d = [7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+         3.754408661907416e+00]
+    p = np.asarray(p, dtype=np.float64)
+    tail = np.minimum(p, 1 - p)
+    central = tail >= 0.02425
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q = p - 0.5
+        r = q * q
+        z_central = (((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q / \
+            (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1)
+        s = np.sqrt(-2 * np.log(tail))
+        z_tail = (((((c[0] * s + c[1]) * s + c[2]) * s + c[3]) * s + c[4]) * s + c[5]) / \
+            ((((d[0] * s + d[1]) * s + d[2]) * s + d[3]) * s + 1)
+    z_tail = np.where(p < 0.5, z_tail, -z_tail)
+    return np.where(central, z_central, z_tail)
+
+
+def ros_impute(parsed):
+    """Valeurs censurées à gauche imputées par ROS robuste (Helsel).
+
+    Les positions de tracé tiennent compte de plusieurs limites de
+    détection ; log(valeurs détectées) est régressé sur les quantiles
+    normaux et les censurées sont lues sur la droite. Lève ``ValueError``
+    s'il y a moins de trois valeurs détectées positives.
+    """
+    values = parsed.values.copy()
+    censored = parsed.left & np.isfinite(values)
+    detected = ~parsed.left & np.isfinite(values)
+    if np.count_nonzero(detected & (values > 0)) < 3:
+        raise ValueError("Au moins trois valeurs détectées positives sont nécessaires pour la méthode ROS.")
+    if not censored.any():
+        return values
+
+    # Bornes L_0 = 0 < L_1 < ... < L_m (limites de détection distinctes)
+    bounds = np.concatenate(([0.0], np.unique(values[censored])))
+    upper = np.concatenate((bounds[1:], [np.inf]))
+    det_sorted = np.sort(values[detected])
+    cens_sorted = np.sort(values[censored])
+    # A_j : détectées dans [L_j, L_j+1) ; B_j : observations sous L_j
+    above = np.searchsorted(det_sorted, upper, "left") - np.searchsorted(det_sorted, bounds, "left")
+    below = np.searchsorted(det_sorted, bounds, "left") + np.searchsorted(cens_sorted, bounds, "right")
+
+    # pe_j : probabilité de dépasser L_j, de la plus haute limite à la plus basse
+    pe = np.zeros(bounds.size + 1)
+    for j in range(bounds.size - 1, -1, -1):
+        total = above[j] + below[j]
+        ratio = above[j] / total if total else 1.0
+        pe[j] = pe[j + 1] + ratio * (1 - pe[j + 1])
+
+    positions = np.full(values.size, np.nan)
+    for mask, is_censored in ((detected, False), (censored, True)):
+        idx = np.flatnonzero(mask)
+        if is_censored:
+            groups = np.searchsorted(bounds, values[idx])
+        else:
+            groups = np.clip(np.searchsorted(bounds, values[idx], "right") - 1, 0, None)
+        # Rang de chaque valeur dans son groupe
+        order = np.lexsort((values[idx], groups))
+        idx, groups = idx[order], groups[order]
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        sizes = np.diff(np.r_[starts, groups.size])
+        rank = np.arange(groups.size) - np.repeat(starts, sizes) + 1
+        fraction = rank / (np.repeat(sizes, sizes) + 1)
+        if is_censored:
+            positions[idx] = (1 - pe[groups]) * fraction
+        else:
+            positions[idx] = (1 - pe[groups]) + (pe[groups] - pe[groups + 1]) * fraction
+
+    z = _norm_ppf(positions)
+    fit = detected & (values > 0)
+    log_values = np.log(values[fit])
+    z_fit = z[fit]
+    dz = z_fit - z_fit.mean()
+    slope = (dz @ (log_values - log_values.mean())) / (dz @ dz)
+    intercept = log_values.mean() - slope * z_fit.mean()
+    values[censored] = np.exp(intercept + slope * z[censored])
+    return values
+
+
+def kaplan_meier_stats(parsed):
+    """Moyenne et écart-type de Kaplan-Meier pour des données censurées à gauche.
+
+    Les valeurs sont retournées (M - x) pour se ramener à une censure à
+    droite ; la masse restante au-delà de la plus grande durée est placée
+    sur celle-ci (correction d'Efron).
+    """
+    finite = np.isfinite(parsed.values)
+    values = parsed.values[finite]
+    left = parsed.left[finite]
+    if values.size == 0 or left.all():
+        return float("nan"), float("nan")
+
+    flipped = values.max() + 1 - values
+    order = np.argsort(flipped, kind="stable")
+    flipped = flipped[order]
+    event = ~left[order]
+
+    times, first = np.unique(flipped, return_index=True)
+    at_risk = flipped.size - first
+    deaths = np.add.reduceat(event.astype(np.int64), first)
+    has_event = deaths > 0
+    times, at_risk, deaths = times[has_event], at_risk[has_event], deaths[has_event]
+
+    survival = np.cumprod(1 - deaths / at_risk)
+    mass = -np.diff(np.concatenate(([1.0], survival)))
+    mass[-1] += survival[-1]
+    mean = float(mass @ times)
+    std_dev = float(np.sqrt(mass @ (times - mean) ** 2))
+    return float(values.max() + 1 - mean), std_dev
+
+
+def substitute(parsed, method=SUBSTITUTE_HALF_LIMIT):
+    """Valeurs utilisables ligne à ligne (NaN pour les lignes écartées).
+
+    Les valeurs censurées à droite gardent leur limite. Kaplan-Meier ne
+    fournit que des statistiques : les lignes sont alors représentées à la
+    moitié de la limite.
+    """
+    values = parsed.values.copy()
+    left = parsed.left
+    if method == SUBSTITUTE_EXCLUDE:
+        values[parsed.censoring != CENSORING_NONE] = np.nan
+    elif method == SUBSTITUTE_ROS:
+        values = ros_impute(parsed)
+    elif method != SUBSTITUTE_LIMIT:
+        values[left] = values[left] / 2
+    return values
+
+
+def evaluate_censored_blanks(parsed, method=SUBSTITUTE_HALF_LIMIT, k=3):
+    """Comme ``engine.evaluate_blanks`` sans écarter les valeurs censurées.
+
+    Renvoie (masque des lignes retenues, valeurs retenues, BlankResult). Une
+    valeur censurée à gauche n'est jamais signalée comme élevée.
+    """
+    values = substitute(parsed, method)
+    kept = np.isfinite(values)
+    values = values[kept]
+    if values.size == 0:
+        raise ValueError("Aucune valeur exploitable parmi les blancs.")
+
+    if method == SUBSTITUTE_KAPLAN_MEIER:
+        mean, std_dev = kaplan_meier_stats(parsed)
+    else:
+        mean, std_dev = float(np.mean(values)), float(np.std(values))
+    stats = SummaryStats(
+        count=int(values.size),
+        mean=mean,
+        std_dev=std_dev,
+        min=float(np.min(values)),
+        max=float(np.max(values)),
+    )
+    lod = stats.mean + k * stats.std_dev
+    elevated = (values > lod) & ~parsed.left[kept]
+    return kept, values, BlankResult(lod=lod, stats=stats, elevated=elevated)
+
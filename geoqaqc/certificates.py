@@ -0,0 +1,89 @@
+"""Base des certificats de CRM (matériaux de référence certifiés).
+
+La table est indexée par (CRM, élément, méthode) ; elle est chargée une
+seule fois par processus puis partagée entre les sessions.
+"""
+import numpy as np
+import pandas as pd
+
+CERTIFICATE_COLUMNS = ["crm_id", "element", "method", "value", "std_dev"]
+
+
+class CertificateStore:
+    """Valeurs certifiées et écarts-types, indexés par (crm_id, element, method).
+
+    Le fichier source doit contenir les colonnes ``crm_id``, ``element``,
+    ``value`` et, optionnellement, ``method`` et ``std_dev``. Les noms
+    d'éléments doivent correspondre aux noms des colonnes du jeu de données.
+    """
+
+    def __init__(self, table):
+        missing = {"crm_id", "element", "value"} - set(table.columns)
+        if missing:
+            raise ValueError(f"Colonnes manquantes dans la table des certificats: {', '.join(sorted(missing))}")
+        table = table.copy()
+        if "method" not in table.columns:
+            table["method"] = ""
+        if "std_dev" not in table.columns:
+            table["std_dev"] = np.nan
+        table["crm_id"] = table["crm_id"].astype(str).str.strip()
+        table["element"] = table["element"].astype(str).str.strip()
+        table["method"] = table["method"].fillna("").astype(str).str.strip()
+        table["value"] = pd.to_numeric(table["value"], errors="coerce")
+        table["std_dev"] = pd.to_numeric(table["std_dev"], errors="coerce")
+        table = table.dropna(subset=["value"])
+        self.table = (
+            table[CERTIFICATE_COLUMNS]
+            .drop_duplicates(subset=["crm_id", "element", "method"], keep="last")
+            .set_index(["crm_id", "element", "method"])
+            .sort_index()
+        )
+
+    @classmethod
+    def from_csv(cls, path_or_buffer, separator=","):
+        return cls(pd.read_csv(path_or_buffer, sep=separator))
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def crm_ids(self):
+        return self.table.index.get_level_values("crm_id").unique().tolist()
+
+    @property
+    def elements(self):
+        return self.table.index.get_level_values("element").unique().tolist()
+
+    @property
+    def methods(self):
+        return self.table.index.get_level_values("method").unique().tolist()
+
+    def get(self, crm_id, element, method=None):
+        """Renvoie (valeur certifiée, écart-type) ou None si absent."""
+        frame = self._select(method)
+        try:
+            row = frame.loc[(str(crm_id), element)]
+        except KeyError:
+            return None
+        return float(row["value"]), float(row["std_dev"])
+
+    def reference_matrix(self, crm_ids, elements, method=None):
+        """Valeurs et écarts-types certifiés sous forme de matrices (CRM × élément).
+
+        Les couples sans certificat valent NaN. Sans méthode précisée, la
+        première méthode (ordre alphabétique) de chaque couple est retenue.
+        """
+        frame = self._select(method)
+        index = pd.MultiIndex.from_product([[str(c) for c in crm_ids], list(elements)])
+        aligned = frame.reindex(index)
+        shape = (len(crm_ids), len(elements))
+        return (
+            aligned["value"].to_numpy(dtype=np.float64).reshape(shape),
+            aligned["std_dev"].to_numpy(dtype=np.float64).reshape(shape),
+        )
+
+    def _select(self, method):
+        # Une ligne par couple (crm_id, element) pour la méthode demandée
+        if method is None:
+            return self.table.groupby(level=["crm_id", "element"], sort=False).head(1).droplevel("method")
+        return self.table.xs(method, level="method")
@@ -0,0 +1,403 @@
+"""Construction des graphiques Plotly de GeoQAQC.
+
+En mode grands jeux de données, la série mesurée est tracée avec
+``Scattergl`` (WebGL) après réduction LTTB, et les lignes constantes
+(référence, limites, LOD) ne comportent que deux points. Les grands
+ensembles de duplicatas sont agrégés en grille de densité.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+from geoqaqc.downsample import DEFAULT_MAX_POINTS, select_points
+from geoqaqc.precision import TH_MEDIAN_FACTOR
+
+MEASURED_COLOR = 'rgb(75, 192, 192)'
+REFERENCE_COLOR = 'rgb(54, 162, 235)'
+LIMIT_COLOR = 'rgb(255, 99, 132)'
+
+# Résolution de la grille de densité des duplicatas
+DEFAULT_BINS = 150
+
+# Attributs des traces portant les données tracées
+PAYLOAD_ATTRIBUTES = ("x", "y", "z", "customdata", "text")
+
+
+def constant_line(x, y, name, color):
+    """Ligne horizontale réduite à ses deux extrémités."""
+    return go.Scatter(
+        x=[x[0], x[-1]],
+        y=[y, y],
+        mode='lines',
+        name=name,
+        line=dict(color=color, width=2, dash='dash')
+    )
+
+
+def control_chart(ids, values, lines, title, x_title, y_title,
+                  large=False, max_points=DEFAULT_MAX_POINTS, keep=None):
+    """Carte de contrôle : série mesurée et lignes constantes.
+
+    ``lines`` est une liste de tuples (nom, valeur, couleur). En mode
+    ``large``, seuls les points retenus par LTTB et ceux de ``keep`` sont
+    envoyés. Renvoie la figure et le nombre de points tracés.
+    """
+    ids = np.asarray(ids)
+    values = np.asarray(values)
+
+    if large:
+        indices = select_points(values, max_points, keep)
+        x, y = ids[indices], values[indices]
+        trace = go.Scattergl
+        marker = dict(size=5)
+    else:
+        x, y = ids, values
+        trace = go.Scatter
+        marker = dict(size=8)
+
+    fig = go.Figure()
+
+    # Données mesurées
+    fig.add_trace(trace(
+        x=x,
+        y=y,
+        mode='lines+markers',
+        name='Valeur mesurée',
+        line=dict(color=MEASURED_COLOR, width=2),
+        marker=marker
+    ))
+
+    for name, value, color in lines:
+        fig.add_trace(constant_line(ids, value, name, color))
+
+    # Mise en forme
+    fig.update_layout(
+        title=title,
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        height=600,
+        hovermode="closest"
+    )
+    return fig, len(y)
+
+
+def crm_figure(ids, values, reference_value, lower_limit, upper_limit, value_column, id_column,
+               large=False, max_points=DEFAULT_MAX_POINTS, out_of_limits=None):
+    return control_chart(
+        ids,
+        values,
+        [
+            ('Valeur référence', reference_value, REFERENCE_COLOR),
+            ('Limite supérieure', upper_limit, LIMIT_COLOR),
+            ('Limite inférieure', lower_limit, LIMIT_COLOR),
+        ],
+        f"GeoQAQC - Carte de Contrôle CRM - {value_column}",
+        id_column,
+        value_column,
+        large=large,
+        max_points=max_points,
+        keep=out_of_limits,
+    )
+
+
+def blank_figure(ids, values, mean, lod, value_column, id_column,
+                 large=False, max_points=DEFAULT_MAX_POINTS, elevated=None):
+    return control_chart(
+        ids,
+        values,
+        [
+            ('Moyenne', mean, REFERENCE_COLOR),
+            ('Limite de détection (LOD)', lod, LIMIT_COLOR),
+        ],
+        f"GeoQAQC - Carte de Contrôle Blancs - {value_column}",
+        id_column,
+        value_column,
+        large=large,
+        max_points=max_points,
+        keep=elevated,
+    )
+
+
+def payload_size(fig):
+    """Taille approximative (octets) des données des traces envoyées au navigateur.
+
+    Estimée d'après les tableaux des traces, sans resérialiser la figure :
+    ``nbytes`` pour les tableaux numériques (encodés en base64 par Plotly),
+    longueur du texte pour les identifiants.
+    """
+    size = 0
+    for trace in fig.data:
+        for name in PAYLOAD_ATTRIBUTES:
+            value = getattr(trace, name, None)
+            if value is None:
+                continue
+            values = np.asarray(value)
+            if values.dtype.kind in "biuf":
+                size += values.nbytes * 4 // 3
+            else:
+                size += int(np.char.str_len(values.astype(str)).sum()) + 3 * values.size
+    return size
+
+
+def duplicate_figure(x, y, slope, intercept, x_title, y_title, binned=False, log_axes=False,
+                     bins=DEFAULT_BINS, rel_diff_pct=None, outlier_threshold=None, rma=None):
+    """Nuage original/duplicata avec régression et ligne y = x.
+
+    ``rma`` (pente, ordonnée) ajoute la droite de l'axe majeur réduit.
+
+    En mode ``binned``, les paires sont agrégées côté serveur en une grille
+    2D (``np.histogram2d``) et seules les paires dont la différence relative
+    dépasse ``outlier_threshold`` (%) sont tracées individuellement. La
+    taille de la figure ne dépend alors plus du nombre de paires.
+    Renvoie la figure et le nombre de points tracés individuellement.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    if log_axes:
+        positive = (x > 0) & (y > 0)
+        x, y = x[positive], y[positive]
+        if rel_diff_pct is not None:
+            rel_diff_pct = np.asarray(rel_diff_pct)[positive]
+
+    fig = go.Figure()
+
+    if binned:
+        counts, x_centers, y_centers = density_grid(x, y, bins, log_axes)
+        fig.add_trace(go.Heatmap(
+            x=x_centers,
+            y=y_centers,
+            z=np.where(counts > 0, counts, np.nan).T,
+            colorscale='Viridis',
+            colorbar=dict(title='Paires'),
+            name='Densité des duplicatas',
+            hovertemplate='x: %{x:.4g}<br>y: %{y:.4g}<br>Paires: %{z}<extra></extra>'
+        ))
+        n_shown = 0
+        if rel_diff_pct is not None and outlier_threshold is not None:
+            outliers = np.flatnonzero(np.asarray(rel_diff_pct) > outlier_threshold)
+            n_shown = outliers.size
+            fig.add_trace(go.Scattergl(
+                x=x[outliers],
+                y=y[outliers],
+                mode='markers',
+                name=f'Diff. rel. > {outlier_threshold:g}%',
+                marker=dict(color=LIMIT_COLOR, size=5, opacity=0.8)
+            ))
+    else:
+        n_shown = x.size
+        # Nuage de points
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            mode='markers',
+            name='Duplicatas',
+            marker=dict(
+                color=MEASURED_COLOR,
+                size=10,
+                opacity=0.8
+            )
+        ))
+
+    # Ligne de régression
+    if x.size:
+        if log_axes:
+            x_range = np.geomspace(x.min(), x.max(), 100)
+        else:
+            x_range = np.linspace(x.min(), x.max(), 100)
+        y_pred = slope * x_range + intercept
+        if log_axes:
+            # Les valeurs négatives ne peuvent pas être tracées en échelle log
+            y_pred = np.where(y_pred > 0, y_pred, np.nan)
+
+        fig.add_trace(go.Scatter(
+            x=x_range,
+            y=y_pred,
+            mode='lines',
+            name=f'Régression linéaire (y = {slope:.4f}x + {intercept:.4f})',
+            line=dict(color=LIMIT_COLOR, width=2)
+        ))
+
+        if rma is not None:
+            rma_slope, rma_intercept = rma
+            y_rma = rma_slope * x_range + rma_intercept
+            if log_axes:
+                y_rma = np.where(y_rma > 0, y_rma, np.nan)
+            fig.add_trace(go.Scatter(
+                x=x_range,
+                y=y_rma,
+                mode='lines',
+                name=f'RMA (y = {rma_slope:.4f}x + {rma_intercept:.4f})',
+                line=dict(color=MEASURED_COLOR, width=2, dash='dot')
+            ))
+
+        # Ligne d'égalité parfaite (y = x)
+        fig.add_trace(go.Scatter(
+            x=x_range,
+            y=x_range,
+            mode='lines',
+            name='Ligne d\'égalité (y=x)',
+            line=dict(color=REFERENCE_COLOR, width=2, dash='dash')
+        ))
+
+    # Mise en forme
+    fig.update_layout(
+        title=f"GeoQAQC - Analyse des Duplicatas - {x_title} vs {y_title}",
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        height=600,
+        hovermode="closest"
+    )
+    if log_axes:
+        fig.update_xaxes(type='log')
+        fig.update_yaxes(type='log')
+    return fig, n_shown
+
+
+def percentile_figure(ranks, quantiles, title, y_title, threshold=None):
+    """Courbe des quantiles en fonction du rang centile (graphique HARD/HRD)."""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=ranks,
+        y=quantiles,
+        mode='lines',
+        name=y_title,
+        line=dict(color=MEASURED_COLOR, width=2)
+    ))
+    if threshold is not None:
+        fig.add_trace(constant_line(ranks, threshold, f'Seuil ({threshold:g}%)', LIMIT_COLOR))
+    fig.update_layout(
+        title=title,
+        xaxis_title='Rang centile (%)',
+        yaxis_title=y_title,
+        height=450
+    )
+    return fig
+
+
+def thompson_howarth_figure(result, title):
+    """Médianes des différences absolues par groupe et droite de Thompson-Howarth."""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=result.group_means,
+        y=result.group_medians,
+        mode='markers',
+        name='Groupes de paires',
+        marker=dict(color=MEASURED_COLOR, size=7, opacity=0.8)
+    ))
+    if result.group_means.size:
+        c = np.linspace(result.group_means.min(), result.group_means.max(), 100)
+        fig.add_trace(go.Scatter(
+            x=c,
+            y=result.sigma(c) * TH_MEDIAN_FACTOR,
+            mode='lines',
+            name=f'σ(c) = {result.sigma0:.4g} + {result.k:.4g}·c',
+            line=dict(color=LIMIT_COLOR, width=2)
+        ))
+    fig.update_layout(
+        title=title,
+        xaxis_title='Teneur moyenne du groupe',
+        yaxis_title='Médiane des différences absolues',
+        height=450
+    )
+    return fig
+
+
+def carryover_figure(max_grade, values, flagged, grade_threshold, blank_limit, x_title, y_title,
+                     large=False, max_points=DEFAULT_MAX_POINTS, log_axes=False):
+    """Blancs en fonction de la plus forte teneur précédente.
+
+    En mode ``large``, les blancs signalés sont tous tracés et les autres
+    sont réduits à ``max_points`` points régulièrement espacés. Renvoie la
+    figure et le nombre de points tracés.
+    """
+    max_grade = np.asarray(max_grade, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    flagged = np.asarray(flagged, dtype=bool)
+    others = np.flatnonzero(~flagged)
+    if large and others.size > max_points:
+        others = others[np.linspace(0, others.size - 1, max_points).astype(np.int64)]
+    flagged = np.flatnonzero(flagged)
+
+    scatter = go.Scattergl if large else go.Scatter
+    fig = go.Figure()
+    fig.add_trace(scatter(
+        x=max_grade[others],
+        y=values[others],
+        mode='markers',
+        name='Blancs',
+        marker=dict(color=MEASURED_COLOR, size=6, opacity=0.7)
+    ))
+    fig.add_trace(scatter(
+        x=max_grade[flagged],
+        y=values[flagged],
+        mode='markers',
+        name='Contamination probable',
+        marker=dict(color=LIMIT_COLOR, size=8)
+    ))
+    fig.add_hline(y=blank_limit, line=dict(color=LIMIT_COLOR, dash='dash'), annotation_text='Limite des blancs')
+    if np.isfinite(grade_threshold):
+        fig.add_vline(x=grade_threshold, line=dict(color=REFERENCE_COLOR, dash='dash'), annotation_text='Seuil de teneur')
+    fig.update_layout(
+        title="GeoQAQC - Contamination des blancs après fortes teneurs",
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        height=600,
+        hovermode="closest"
+    )
+    if log_axes:
+        fig.update_xaxes(type='log')
+        fig.update_yaxes(type='log')
+    return fig, others.size + flagged.size
+
+
+def qc_heatmap(values, counts, title, colorbar_title, zmax=None):
+    """Indicateur par lot (lignes) × élément (colonnes) ; cellules vides en blanc.
+
+    ``values`` et ``counts`` sont des DataFrames de même forme ; le nombre
+    de résultats de chaque cellule est affiché au survol.
+    """
+    z = values.to_numpy(dtype=np.float64)
+    fig = go.Figure(go.Heatmap(
+        x=[str(column) for column in values.columns],
+        y=[str(batch) for batch in values.index],
+        z=z,
+        customdata=counts.to_numpy(),
+        colorscale='YlOrRd',
+        zmin=0,
+        zmax=zmax if zmax is not None else (np.nanmax(z) if np.isfinite(z).any() else 1),
+        colorbar=dict(title=colorbar_title),
+        xgap=1,
+        ygap=1,
+        hovertemplate='Lot: %{y}<br>Élément: %{x}<br>%{z:.3g}<br>Résultats: %{customdata}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title='Élément',
+        yaxis_title='Lot',
+        height=max(400, min(1200, 120 + 22 * len(values.index)))
+    )
+    fig.update_xaxes(type='category', side='top')
+    fig.update_yaxes(type='category', autorange='reversed')
+    return fig
+
+
+def density_grid(x, y, bins=DEFAULT_BINS, log_axes=False):
+    """Comptes 2D des paires et centres des cellules (en unités des données).
+
+    Les deux axes partagent les mêmes bornes pour que la ligne y = x reste
+    la diagonale de la grille.
+    """
+    if x.size == 0:
+        return np.zeros((bins, bins)), np.zeros(bins), np.zeros(bins)
+    if log_axes:
+        x, y = np.log10(x), np.log10(y)
+    low = min(x.min(), y.min())
+    high = max(x.max(), y.max())
+    if high == low:
+        high = low + 1
+    edges = np.linspace(low, high, bins + 1)
+    counts, _, _ = np.histogram2d(x, y, bins=[edges, edges])
+    centers = (edges[:-1] + edges[1:]) / 2
+    if log_axes:
+        centers = 10 ** centers
+    return counts, centers, centers
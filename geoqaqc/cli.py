@@ -0,0 +1,335 @@
+"""Traitement QAQC en ligne de commande d'un dossier de certificats de laboratoire.
+
+Exemple :
+
+    python -m geoqaqc depot/ --output resultats/ --certificates crm_certificates.csv \\
+        --crm-column Standard --blank-label BLANK --duplicate-pairs Au_ppm:Au_ppm_dup
+
+Chaque fichier est traité dans un processus du pool ; un fichier illisible
+est signalé sans interrompre les autres. Les résultats reproduisent
+l'arborescence du dossier d'entrée dans le dossier des résultats. Le code de sortie vaut 0 si tout
+est conforme, 1 si des contrôles échouent et 2 si des fichiers n'ont pas
+pu être traités.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from geoqaqc import censored, engine
+from geoqaqc.batch import crm_keys, evaluate_crm_batch
+from geoqaqc.certificates import CertificateStore
+
+EXIT_OK = 0
+EXIT_QC_FAILURES = 1
+EXIT_FILE_ERRORS = 2
+
+SUMMARY_FILE = "geoqaqc_summary.csv"
+
+CENSORED_METHODS = {
+    "demi-limite": censored.SUBSTITUTE_HALF_LIMIT,
+    "limite": censored.SUBSTITUTE_LIMIT,
+    "kaplan-meier": censored.SUBSTITUTE_KAPLAN_MEIER,
+    "ros": censored.SUBSTITUTE_ROS,
+    "exclure": censored.SUBSTITUTE_EXCLUDE,
+}
+
+
+@dataclass
+class QaqcOptions:
+    separator: str = ","
+    certificates: str = None
+    crm_column: str = None
+    elements: list = field(default_factory=list)
+    method: str = None
+    tolerance_type: str = engine.TOLERANCE_STDDEV
+    tolerance_value: float = 2.0
+    blank_label: str = None
+    censored_method: str = censored.SUBSTITUTE_HALF_LIMIT
+    duplicate_pairs: list = field(default_factory=list)
+    duplicate_threshold: float = 20.0
+    output: str = "."
+
+
+# Base de certificats lue une fois par le processus principal, transmise à
+# chaque processus du pool
+_certificate_store = None
+
+
+def _init_worker(store):
+    global _certificate_store
+    _certificate_store = store
+
+
+def load_certificates(path, separator):
+    """Base de certificats de ``path`` (None sans fichier) ; lève ``ValueError`` si illisible."""
+    if not path:
+        return None
+    try:
+        return CertificateStore.from_csv(path, separator)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"table des certificats illisible ({path}): {e}") from e
+
+
+def element_columns(frame, options):
+    if options.elements:
+        return [column for column in options.elements if column in frame.columns]
+    # Par défaut : les colonnes numériques, y compris celles contenant des valeurs censurées
+    return censored.numeric_columns(frame, exclude=[options.crm_column])
+
+
+def check_crms(frame, options, elements):
+    if _certificate_store is None or options.crm_column is None:
+        return None
+    # Seules les lignes des CRM certifiés sont évaluées
+    frame = frame[crm_keys(frame[options.crm_column]).isin(_certificate_store.crm_ids)]
+    result = evaluate_crm_batch(
+        frame, options.crm_column, elements, _certificate_store,
+        options.tolerance_type, options.tolerance_value, options.method
+    )
+    table = pd.concat(
+        {
+            "resultats": result.count.stack(),
+            "hors_limites": result.failed.stack(),
+            "moyenne": result.mean.stack(),
+            "valeur_certifiee": result.reference_value.stack(),
+            "statut": result.status.stack(),
+        },
+        axis=1,
+    )
+    table.index.names = ["crm_id", "element"]
+    return table[table["resultats"] > 0].reset_index()
+
+
+def check_blanks(frame, options, elements):
+    if options.blank_label is None or options.crm_column is None:
+        return None
+    blanks = frame[crm_keys(frame[options.crm_column]) == options.blank_label]
+    rows = []
+    for element in elements:
+        parsed = censored.parse_censored(blanks[element], negative_as_censored=True)
+        try:
+            kept, values, result = censored.evaluate_censored_blanks(parsed, options.censored_method)
+        except ValueError:
+            continue
+        rows.append({
+            "element": element,
+            "blancs": values.size,
+            "censures": parsed.take(kept).n_censored,
+            "moyenne": result.stats.mean,
+            "lod": result.lod,
+            "eleves": int(result.elevated.sum()),
+        })
+    return pd.DataFrame(rows, columns=["element", "blancs", "censures", "moyenne", "lod", "eleves"])
+
+
+def check_duplicates(frame, options):
+    rows = []
+    for original, replicate in options.duplicate_pairs:
+        if original not in frame.columns or replicate not in frame.columns:
+            continue
+        data = engine.prepare_numeric(frame[[original, replicate]], [original, replicate])
+        if len(data) < 2:
+            continue
+        result = engine.evaluate_duplicates(data[original].to_numpy(), data[replicate].to_numpy())
+        rows.append({
+            "original": original,
+            "duplicata": replicate,
+            "paires": len(data),
+            "pente": result.slope,
+            "r2": result.r ** 2,
+            "diff_rel_moyenne": result.mean_rel_diff_pct,
+            "hors_seuil": int((result.rel_diff_pct > options.duplicate_threshold).sum()),
+        })
+    return pd.DataFrame(
+        rows, columns=["original", "duplicata", "paires", "pente", "r2", "diff_rel_moyenne", "hors_seuil"]
+    )
+
+
+def relative_name(path, root=None):
+    """Chemin de ``path`` relatif au dossier d'entrée ``root`` (nom du fichier sans dossier)."""
+    return os.path.relpath(path, root) if root is not None else os.path.basename(path)
+
+
+def process_file(path, options, root=None):
+    """Contrôles d'un fichier ; les erreurs sont renvoyées, jamais levées.
+
+    Les tables sont écrites sous ``options.output`` au même chemin relatif
+    que le fichier sous ``root``, pour que deux fichiers de même nom dans des
+    sous-dossiers différents ne s'écrasent pas.
+    """
+    start = time.perf_counter()
+    name = relative_name(path, root)
+    summary = {"fichier": name, "lignes": 0, "erreur": None}
+    try:
+        frame = pd.read_csv(path, sep=options.separator)
+        summary["lignes"] = len(frame)
+        elements = element_columns(frame, options)
+        output = os.path.join(options.output, os.path.dirname(name))
+        os.makedirs(output, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(name))[0]
+
+        checks = {
+            "crm": check_crms(frame, options, elements),
+            "blancs": check_blanks(frame, options, elements),
+            "duplicatas": check_duplicates(frame, options),
+        }
+        for check, table in checks.items():
+            if table is not None:
+                table.to_csv(os.path.join(output, f"{stem}_{check}.csv"), index=False)
+
+        crm, blanks, duplicates = checks["crm"], checks["blancs"], checks["duplicatas"]
+        if crm is not None:
+            certified = crm[crm["valeur_certifiee"].notna()]
+            summary["crm_resultats"] = int(certified["resultats"].sum())
+            summary["crm_hors_limites"] = int(certified["hors_limites"].sum())
+        else:
+            summary["crm_resultats"] = summary["crm_hors_limites"] = 0
+        summary["blancs_eleves"] = int(blanks["eleves"].sum()) if blanks is not None else 0
+        summary["duplicatas_hors_seuil"] = int(duplicates["hors_seuil"].sum()) if duplicates is not None else 0
+    except Exception as e:
+        summary["erreur"] = f"{type(e).__name__}: {e}"
+    summary["duree_s"] = time.perf_counter() - start
+    return summary
+
+
+def _is_within(path, directory):
+    directory = os.path.realpath(directory)
+    return os.path.commonpath((os.path.realpath(path), directory)) == directory
+
+
+def discover_files(directory, patterns, exclude=None):
+    """Fichiers de ``directory`` et de ses sous-dossiers, hors du dossier ``exclude``
+    (les résultats d'un passage précédent, s'ils sont rangés dans le dossier d'entrée)."""
+    paths = set()
+    for pattern in patterns:
+        paths.update(glob.glob(os.path.join(directory, "**", pattern), recursive=True))
+    return sorted(
+        path for path in paths
+        if os.path.isfile(path) and not (exclude is not None and _is_within(path, exclude))
+    )
+
+
+def run(paths, options, workers=None, root=None, store=None):
+    """Traite ``paths`` sur un pool de processus et renvoie le résumé par fichier.
+
+    Les fichiers sont nommés par leur chemin relatif à ``root`` dans le
+    résumé et le dossier des résultats. ``store`` est la base de certificats
+    déjà chargée ; sinon elle est lue depuis ``options.certificates``.
+    """
+    if store is None:
+        store = load_certificates(options.certificates, options.separator)
+    os.makedirs(options.output, exist_ok=True)
+    summaries = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(store,),
+    ) as pool:
+        futures = {pool.submit(process_file, path, options, root): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                summary = future.result()
+            except Exception as e:  # processus du pool interrompu
+                summary = {"fichier": relative_name(futures[future], root), "lignes": 0,
+                           "erreur": f"{type(e).__name__}: {e}"}
+            summaries.append(summary)
+            status = "ERREUR" if summary["erreur"] else "ok"
+            print(f"[{status}] {summary['fichier']} ({summary['lignes']} lignes)", file=sys.stderr)
+
+    columns = ["fichier", "lignes", "crm_resultats", "crm_hors_limites", "blancs_eleves",
+               "duplicatas_hors_seuil", "erreur", "duree_s"]
+    summary = pd.DataFrame(summaries).reindex(columns=columns).sort_values("fichier")
+    summary[columns[1:6]] = summary[columns[1:6]].astype("Int64")
+    summary.to_csv(os.path.join(options.output, SUMMARY_FILE), index=False)
+    return summary
+
+
+def exit_code(summary):
+    if summary["erreur"].notna().any():
+        return EXIT_FILE_ERRORS
+    failures = summary[["crm_hors_limites", "blancs_eleves", "duplicatas_hors_seuil"]].fillna(0).to_numpy()
+    return EXIT_QC_FAILURES if np.any(failures > 0) else EXIT_OK
+
+
+def _duplicate_pair(text):
+    original, sep, replicate = text.partition(":")
+    if not sep or not original or not replicate:
+        raise argparse.ArgumentTypeError(f"paire de duplicatas invalide: {text!r} (attendu original:duplicata)")
+    return original, replicate
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="geoqaqc",
+        description="Contrôles QAQC (CRM, blancs, duplicatas) d'un dossier de certificats de laboratoire.",
+    )
+    parser.add_argument("directory", help="dossier contenant les fichiers CSV")
+    parser.add_argument("-o", "--output", default="geoqaqc_resultats", help="dossier des résultats")
+    parser.add_argument("--pattern", action="append", help="motif des fichiers (défaut: *.csv et *.txt)")
+    parser.add_argument("--sep", default=",", help="séparateur des fichiers (\\t pour tabulation)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="nombre de processus (défaut: nombre de cœurs)")
+    parser.add_argument("--certificates", help="table des certificats CRM (crm_id, element, method, value, std_dev)")
+    parser.add_argument("--crm-column", help="colonne identifiant le CRM ou le type d'échantillon")
+    parser.add_argument("--elements", help="colonnes d'éléments séparées par des virgules (défaut: colonnes numériques)")
+    parser.add_argument("--method", help="méthode analytique des certificats")
+    parser.add_argument("--tolerance-type", choices=["stddev", "percent"], default="stddev",
+                        help="tolérance en multiple de l'écart-type ou en pourcentage")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="valeur de la tolérance")
+    parser.add_argument("--blank-label", help="valeur de --crm-column désignant les blancs")
+    parser.add_argument("--censored", choices=sorted(CENSORED_METHODS), default="demi-limite",
+                        help="traitement des blancs censurés (<0.005, BDL)")
+    parser.add_argument("--duplicate-pairs", type=_duplicate_pair, nargs="*", default=[],
+                        help="paires de colonnes original:duplicata")
+    parser.add_argument("--duplicate-threshold", type=float, default=20.0,
+                        help="seuil de différence relative des duplicatas (%%)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    separator = "\t" if args.sep in ("\\t", "tab", "Tab") else args.sep
+    options = QaqcOptions(
+        separator=separator,
+        certificates=args.certificates,
+        crm_column=args.crm_column,
+        elements=[column.strip() for column in args.elements.split(",")] if args.elements else [],
+        method=args.method,
+        tolerance_type=engine.TOLERANCE_PERCENT if args.tolerance_type == "percent" else engine.TOLERANCE_STDDEV,
+        tolerance_value=args.tolerance,
+        blank_label=args.blank_label,
+        censored_method=CENSORED_METHODS[args.censored],
+        duplicate_pairs=args.duplicate_pairs,
+        duplicate_threshold=args.duplicate_threshold,
+        output=args.output,
+    )
+    # Une table de certificats invalide est signalée une fois, avant de lancer le pool
+    try:
+        store = load_certificates(options.certificates, separator)
+    except ValueError as e:
+        parser.error(str(e))
+
+    paths = discover_files(args.directory, args.pattern or ["*.csv", "*.txt"], exclude=args.output)
+    if not paths:
+        print(f"Aucun fichier trouvé dans {args.directory}.", file=sys.stderr)
+        return EXIT_FILE_ERRORS
+
+    start = time.perf_counter()
+    summary = run(paths, options, args.workers, root=args.directory, store=store)
+    elapsed = time.perf_counter() - start
+
+    n_errors = int(summary["erreur"].notna().sum())
+    print(
+        f"{len(summary)} fichiers ({n_errors} en erreur), {int(summary['lignes'].sum())} lignes "
+        f"en {elapsed:.1f} s : {len(summary) / elapsed:.1f} fichiers/s, "
+        f"{summary['lignes'].sum() / elapsed:.0f} lignes/s.",
+        file=sys.stderr,
+    )
+    return exit_code(summary)
@@ -0,0 +1,194 @@
+"""Règles de contrôle incrémentales : Shewhart, Westgard, CUSUM et EWMA.
+
+L'état de chaque couple CRM × élément (moyenne et variance de Welford,
+cumuls CUSUM, EWMA, derniers z-scores pour les fenêtres de Westgard) est
+conservé entre les lots : intégrer un nouveau lot de n résultats coûte
+O(n), sans repasser sur l'historique.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+
+# Plus longue fenêtre de Westgard (10-x)
+WESTGARD_WINDOW = 10
+
+RULE_COLUMNS = ["1-3s", "2-2s", "R-4s", "4-1s", "10-x", "Alerte CUSUM", "Alerte EWMA"]
+
+
+@dataclass
+class ControlParams:
+    cusum_k: float = 0.5
+    cusum_h: float = 5.0
+    ewma_lambda: float = 0.2
+    ewma_l: float = 3.0
+
+
+@dataclass
+class ControlState:
+    """État persistant d'une carte de contrôle (z-scores par rapport à target/sigma)."""
+
+    target: float
+    sigma: float
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    cusum_pos: float = 0.0
+    cusum_neg: float = 0.0
+    ewma: float = 0.0
+    recent_z: list = field(default_factory=list)
+    batches: list = field(default_factory=list)
+
+    @property
+    def std_dev(self):
+        """Écart-type de population des valeurs intégrées (comme ``np.std``)."""
+        return float(np.sqrt(self.m2 / self.count)) if self.count else float("nan")
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def new_state(target, sigma):
+    if not sigma or sigma <= 0:
+        raise ValueError("L'écart-type de la carte de contrôle doit être supérieur à zéro.")
+    return ControlState(target=float(target), sigma=float(sigma))
+
+
+def batch_key(values):
+    """Empreinte d'un lot, pour ne pas l'intégrer deux fois."""
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    return hashlib.blake2b(values.tobytes(), digest_size=8).hexdigest()
+
+
+def _runs(condition, length):
+    """Vrai là où les ``length`` derniers points (inclus) vérifient ``condition``."""
+    counts = np.concatenate(([0], np.cumsum(condition)))
+    ends = np.arange(length, counts.size)
+    runs = np.zeros(condition.size, dtype=bool)
+    runs[length - 1:] = counts[ends] - counts[ends - length] == length
+    return runs
+
+
+def _cusum(start, steps):
+    # C_i = max(0, C_{i-1} + d_i) s'écrit S_i - min(0, min_{j<=i} S_j),
+    # avec S la somme cumulée partant de C_0 : aucune boucle Python.
+    cumulative = start + np.cumsum(steps)
+    return cumulative - np.minimum(0.0, np.minimum.accumulate(cumulative))
+
+
+def update_state(state, values, params=None, key=None):
+    """Intègre un lot et renvoie (nouvel état, drapeaux des règles pour ce lot).
+
+    Lève ``ValueError`` si le lot identifié par ``key`` a déjà été intégré.
+    """
+    params = params or ControlParams()
+    values = np.asarray(values, dtype=np.float64)
+    if key is not None and key in state.batches:
+        raise ValueError("Ce lot a déjà été intégré à l'historique.")
+
+    z = (values - state.target) / state.sigma
+    history = np.asarray(state.recent_z, dtype=np.float64)
+    full = np.concatenate((history, z))
+    new = slice(history.size, None)
+
+    flags = {"Z-score": z, "1-3s": np.abs(z) > 3}
+    flags["2-2s"] = (_runs(full > 2, 2) | _runs(full < -2, 2))[new]
+    previous = np.concatenate(([0.0], full[:-1]))
+    r4s = ((full > 2) & (previous < -2)) | ((full < -2) & (previous > 2))
+    if full.size:
+        r4s[0] = False
+    flags["R-4s"] = r4s[new]
+    flags["4-1s"] = (_runs(full > 1, 4) | _runs(full < -1, 4))[new]
+    flags["10-x"] = (_runs(full > 0, WESTGARD_WINDOW) | _runs(full < 0, WESTGARD_WINDOW))[new]
+
+    cusum_pos = _cusum(state.cusum_pos, z - params.cusum_k)
+    cusum_neg = _cusum(state.cusum_neg, -z - params.cusum_k)
+    flags["CUSUM+"] = cusum_pos
+    flags["CUSUM-"] = cusum_neg
+    flags["Alerte CUSUM"] = (cusum_pos > params.cusum_h) | (cusum_neg > params.cusum_h)
+
+    lam = params.ewma_lambda
+    ewma = pd.Series(np.concatenate(([state.ewma], z))).ewm(alpha=lam, adjust=False).mean().to_numpy()[1:]
+    position = state.count + np.arange(1, z.size + 1)
+    ewma_limit = params.ewma_l * np.sqrt(lam / (2 - lam) * (1 - (1 - lam) ** (2 * position)))
+    flags["EWMA"] = ewma
+    flags["Alerte EWMA"] = np.abs(ewma) > ewma_limit
+
+    # Fusion de Welford (Chan et al.) des moments du lot avec l'historique
+    count, mean, m2 = state.count, state.mean, state.m2
+    if values.size:
+        batch_mean = values.mean()
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        total = count + values.size
+        delta = batch_mean - mean
+        mean = mean + delta * values.size / total
+        m2 = m2 + batch_m2 + delta ** 2 * count * values.size / total
+        count = total
+
+    new_state = replace(
+        state,
+        count=count,
+        mean=float(mean),
+        m2=float(m2),
+        cusum_pos=float(cusum_pos[-1]) if z.size else state.cusum_pos,
+        cusum_neg=float(cusum_neg[-1]) if z.size else state.cusum_neg,
+        ewma=float(ewma[-1]) if z.size else state.ewma,
+        recent_z=full[-(WESTGARD_WINDOW - 1):].tolist(),
+        batches=state.batches + [key] if key is not None else list(state.batches),
+    )
+    return new_state, pd.DataFrame(flags)
+
+
+def rule_summary(flags):
+    """Nombre de points signalés par règle."""
+    return flags[RULE_COLUMNS].sum().astype(int).rename("Points signalés").to_frame()
+
+
+class ControlStateStore:
+    """États persistés en JSON, un fichier par couple (CRM, élément)."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def path(self, crm_id, element):
+        name = re.sub(r"[^\w.-]+", "_", f"{crm_id}__{element}")
+        suffix = hashlib.blake2b(f"{crm_id}\x00{element}".encode("utf-8"), digest_size=4).hexdigest()
+        return os.path.join(self.directory, f"{name}-{suffix}.json")
+
+    def load(self, crm_id, element):
+        try:
+            with open(self.path(crm_id, element), encoding="utf-8") as f:
+                return ControlState.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def save(self, crm_id, element, state):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(crm_id, element)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    def append(self, crm_id, element, values, target, sigma, params=None):
+        """Intègre un lot à l'état persisté (créé au besoin avec target/sigma).
+
+        Renvoie (nouvel état, drapeaux des règles pour ce lot).
+        """
+        with self._lock:
+            state = self.load(crm_id, element)
+            if state is None:
+                state = new_state(target, sigma)
+            state, flags = update_state(state, values, params, key=batch_key(values))
+            self.save(crm_id, element, state)
+        return state, flags
@@ -0,0 +1,89 @@
+"""Paramètres par défaut de l'interface et des analyses.
+
+Ce module n'importe ni numpy, ni pandas, ni plotly : le premier affichage
+de l'application en dépend sans charger les modules d'analyse, importés à
+la première analyse. Les modules d'analyse reprennent leurs valeurs par
+défaut d'ici.
+"""
+TOLERANCE_PERCENT = "Pourcentage (%)"
+TOLERANCE_STDDEV = "Multiple de l'écart-type"
+
+# Seuil HARD usuel : 90 % des paires sous 10 %
+HARD_THRESHOLD = 10.0
+# 2 000 rééchantillonnages suffisent pour des intervalles à 95 % ; le coût
+# croît avec rééchantillonnages × paires
+DEFAULT_RESAMPLES = 2_000
+# Échantillons de routine précédant un blanc
+DEFAULT_WINDOW = 3
+DEFAULT_CHUNKSIZE = 200_000
+
+# Valeurs initiales des paramètres de l'interface, par clé de widget
+SESSION_DEFAULTS = {
+    "control_type": "Standards CRM",
+    "reference_value": 0.0,
+    "reference_stddev": 0.0,
+    "tolerance_type": TOLERANCE_PERCENT,
+    "tolerance_percent": 10.0,
+    "tolerance_stddev": 2.0,
+    "stream_chunksize": DEFAULT_CHUNKSIZE,
+    "render_mode": "Automatique",
+    "duplicate_outlier_threshold": 30.0,
+    "duplicate_hard_threshold": HARD_THRESHOLD,
+    "bootstrap_resamples": DEFAULT_RESAMPLES,
+    "bootstrap_confidence": 0.95,
+    "carryover_window": DEFAULT_WINDOW,
+    "blank_default_limit": 0.0,
+    "blank_negative_censored": True,
+    "multi_hard_threshold": HARD_THRESHOLD,
+}
+
+# Paramètres sans valeur initiale, conservés dès que l'utilisateur les a choisis
+SESSION_PARAMETERS = [
+    "import_method",
+    "file_separator",
+    "stream_path",
+    "stream_separator",
+    "pasted_data",
+    "paste_separator",
+    "crm_mode",
+    "blank_mode",
+    "crm_id_column",
+    "crm_value_column",
+    "crm_history_id",
+    "batch_crm_column",
+    "batch_id_column",
+    "batch_element_columns",
+    "batch_method",
+    "batch_drill_crm",
+    "batch_drill_element",
+    "bootstrap_method",
+    "carryover_type_column",
+    "carryover_id_column",
+    "carryover_value_column",
+    "carryover_sequence_column",
+    "carryover_batch_column",
+    "carryover_blank_labels",
+    "carryover_crm_labels",
+    "carryover_grade_threshold",
+    "carryover_blank_limit",
+    "carryover_log_axes",
+    "duplicate_original_column",
+    "duplicate_replicate_column",
+    "duplicate_log_axes",
+    "blank_id_column",
+    "blank_value_column",
+    "blank_censored_method",
+    "multi_type_column",
+    "multi_id_column",
+    "multi_batch_column",
+    "multi_parent_column",
+    "multi_blank_labels",
+    "multi_duplicate_labels",
+    "multi_element_columns",
+    "multi_censored_method",
+    "multi_method",
+    "multi_indicator",
+    "multi_drill_element",
+    "multi_drill_batch",
+    "multi_drill_crm",
+]
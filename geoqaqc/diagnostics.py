@@ -0,0 +1,189 @@
+"""Mesures par étape des chemins d'ingestion et d'analyse.
+
+Chaque étape (lecture du CSV, conversion numérique, statistiques, figure,
+tableau, export) enregistre sa durée, le pic de mémoire et le nombre de
+lignes traitées. Les mesures sont rattachées à la trace courante, portée
+par une variable de contexte (session et section analysée) : une étape
+exécutée hors d'une trace ne coûte rien et n'est pas enregistrée.
+
+Le pic de mémoire d'une étape est mesuré par tracemalloc, seulement quand
+le suivi est actif : il couvre les allocations Python et numpy, pas la
+mémoire interne de pyarrow, et inclut les allocations des fils exécutés en
+parallèle. Le maximum de mémoire résidente du processus est toujours noté.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+from geoqaqc import __version__
+
+try:
+    import resource
+except ImportError:  # absent sous Windows
+    resource = None
+
+DEFAULT_MAX_RECORDS = 1000
+# Le journal est renommé en .1 au-delà de cette taille
+MAX_LOG_BYTES = 20 * 2 ** 20
+
+_current_trace = ContextVar("geoqaqc_trace", default=None)
+
+
+def max_rss_mb():
+    """Maximum de mémoire résidente du processus depuis son démarrage (Mo)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilo-octets sous Linux, octets sous macOS
+    return rss / 2 ** 20 if sys.platform == "darwin" else rss / 2 ** 10
+
+
+@dataclass
+class StageRecord:
+    timestamp: str
+    version: str
+    session: str
+    section: str
+    stage: str
+    wall_ms: float
+    rows: int = None
+    peak_mb: float = None
+    max_rss_mb: float = None
+    thread: str = ""
+    error: str = None
+
+
+@dataclass
+class Stage:
+    """Étape en cours ; ``rows`` peut être renseigné dans le bloc ``with``."""
+
+    name: str
+    rows: int = None
+    start_memory: int = 0
+    peak_memory: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+
+class Trace:
+    """Étapes d'une même analyse, exécutées dans un même fil."""
+
+    def __init__(self, recorder, session, section):
+        self.recorder = recorder
+        self.session = session
+        self.section = section
+        self.open_stages = []
+
+    def _update_peaks(self):
+        # reset_peak est global : le pic courant est reporté sur les étapes
+        # englobantes avant chaque remise à zéro
+        _, peak = tracemalloc.get_traced_memory()
+        for stage in self.open_stages:
+            stage.peak_memory = max(stage.peak_memory, peak)
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        stage = Stage(name, rows)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            self._update_peaks()
+            stage.start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.open_stages.append(stage)
+        error = None
+        try:
+            yield stage
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            if tracing and tracemalloc.is_tracing():
+                self._update_peaks()
+            self.open_stages.pop()
+            wall_ms = (time.perf_counter() - stage.started) * 1000
+            peak_mb = None
+            if tracing:
+                peak_mb = max(stage.peak_memory - stage.start_memory, 0) / 2 ** 20
+            self.recorder.record(StageRecord(
+                timestamp=datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                version=self.recorder.version,
+                session=self.session,
+                section=self.section,
+                stage=name,
+                wall_ms=round(wall_ms, 3),
+                rows=None if stage.rows is None else int(stage.rows),
+                peak_mb=None if peak_mb is None else round(peak_mb, 3),
+                max_rss_mb=max_rss_mb(),
+                thread=threading.current_thread().name,
+                error=error,
+            ))
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Mesure une étape dans la trace courante (sans effet hors d'une trace)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield Stage(name, rows)
+        return
+    with trace.stage(name, rows) as current:
+        yield current
+
+
+class Recorder:
+    """Mesures récentes en mémoire et journal en lignes JSON (``log_path``)."""
+
+    def __init__(self, log_path=None, max_records=DEFAULT_MAX_RECORDS, version=__version__):
+        self.log_path = log_path
+        self.version = version
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, session, section):
+        token = _current_trace.set(Trace(self, session, section))
+        try:
+            yield
+        finally:
+            _current_trace.reset(token)
+
+    def record(self, record):
+        with self._lock:
+            self._records.append(record)
+            if self.log_path:
+                self._write(record)
+
+    def _write(self, record):
+        directory = os.path.dirname(self.log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > MAX_LOG_BYTES:
+            os.replace(self.log_path, self.log_path + ".1")
+        with open(self.log_path, "a", encoding="utf-8") as log:
+            log.write(json.dumps(asdict(record), ensure_ascii=False) + "\n")
+
+    def records(self, session=None):
+        with self._lock:
+            records = list(self._records)
+        if session is not None:
+            records = [record for record in records if record.session == session]
+        return [asdict(record) for record in records]
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+
+def set_memory_tracing(enabled):
+    """Active ou arrête tracemalloc (global au processus, ralentit les allocations)."""
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
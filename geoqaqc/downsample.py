@@ -0,0 +1,48 @@
+"""Réduction des séries longues avant l'envoi au navigateur.
+
+L'algorithme LTTB (Largest-Triangle-Three-Buckets) conserve la forme de la
+série ; les points signalés (hors limites, élevés) sont toujours conservés.
+"""
+import numpy as np
+
+DEFAULT_MAX_POINTS = 5000
+
+
+def lttb_indices(y, n_out, x=None):
+    """Indices des points retenus par LTTB, premier et dernier inclus."""
+    y = np.asarray(y, dtype=np.float64)
+    n = y.size
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    # n_out - 2 seaux entre le premier et le dernier point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < edges.size:
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def select_points(y, max_points=DEFAULT_MAX_POINTS, keep=None):
+    """Indices triés à afficher : LTTB plus tous les points de ``keep``."""
+    indices = lttb_indices(y, max_points)
+    if keep is not None:
+        indices = np.union1d(indices, np.flatnonzero(keep))
+    return indices
@@ -0,0 +1,189 @@
+"""Moteur de calcul QAQC, indépendant de l'interface.
+
+Les fonctions travaillent sur des tableaux NumPy (ou des colonnes de
+DataFrame) et n'effectuent aucun traitement ligne par ligne : les statuts
+sont obtenus par comparaison de tableaux.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from geoqaqc.defaults import TOLERANCE_PERCENT, TOLERANCE_STDDEV
+
+STATUS_OK = "OK"
+STATUS_OUT_OF_LIMITS = "Hors limites"
+STATUS_HIGH = "Élevé"
+
+
+@dataclass
+class SummaryStats:
+    count: int
+    mean: float
+    std_dev: float
+    min: float
+    max: float
+
+
+@dataclass
+class CrmResult:
+    lower_limit: float
+    upper_limit: float
+    stats: SummaryStats
+    deviation_pct: np.ndarray
+    z_score: Optional[np.ndarray]
+    out_of_limits: np.ndarray
+
+
+@dataclass
+class BlankResult:
+    lod: float
+    stats: SummaryStats
+    elevated: np.ndarray
+
+
+@dataclass
+class DuplicateResult:
+    slope: float
+    intercept: float
+    r: float
+    abs_diff: np.ndarray
+    rel_diff_pct: np.ndarray
+    mean_abs_diff: float
+    mean_rel_diff_pct: float
+
+
+def as_float_array(values):
+    """Convertit en tableau float64 sans copie inutile."""
+    return np.asarray(values, dtype=np.float64)
+
+
+def prepare_numeric(frame, numeric_columns):
+    """Supprime les lignes incomplètes et convertit les colonnes numériques.
+
+    Les valeurs non numériques deviennent NaN puis sont écartées, comme
+    ``pd.to_numeric(errors='coerce')`` suivi de ``dropna()``.
+    """
+    frame = frame.dropna()
+    converted = {column: pd.to_numeric(frame[column], errors="coerce") for column in numeric_columns}
+    frame = frame.assign(**converted)
+    return frame.dropna()
+
+
+def summary_stats(values):
+    values = as_float_array(values)
+    return SummaryStats(
+        count=int(values.size),
+        mean=float(np.mean(values)),
+        std_dev=float(np.std(values)),
+        min=float(np.min(values)),
+        max=float(np.max(values)),
+    )
+
+
+def status_column(failed, ok_label=STATUS_OK, failed_label=STATUS_OUT_OF_LIMITS):
+    """Colonne de statut catégorielle construite à partir d'un masque booléen."""
+    codes = np.asarray(failed, dtype=np.int8)
+    return pd.Categorical.from_codes(codes, categories=[ok_label, failed_label])
+
+
+def crm_limits(reference_value, tolerance_type, tolerance_value, reference_stddev=None):
+    """Limites inférieure et supérieure d'un CRM.
+
+    Lève ``ValueError`` si la tolérance est exprimée en écarts-types et que
+    l'écart-type de référence est absent ou nul.
+    """
+    if tolerance_type == TOLERANCE_PERCENT:
+        tolerance = tolerance_value / 100
+        upper_limit = reference_value * (1 + tolerance)
+        lower_limit = reference_value * (1 - tolerance)
+    else:
+        if reference_stddev is None or reference_stddev == 0:
+            raise ValueError(
+                "L'écart-type de référence doit être défini et supérieur à zéro "
+                "pour utiliser ce type de tolérance."
+            )
+        upper_limit = reference_value + (tolerance_value * reference_stddev)
+        lower_limit = reference_value - (tolerance_value * reference_stddev)
+    return lower_limit, upper_limit
+
+
+def evaluate_crm(values, reference_value, lower_limit, upper_limit, reference_stddev=0):
+    values = as_float_array(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deviation_pct = (values - reference_value) / reference_value * 100
+    z_score = None
+    if reference_stddev and reference_stddev > 0:
+        z_score = (values - reference_value) / reference_stddev
+    return CrmResult(
+        lower_limit=lower_limit,
+        upper_limit=upper_limit,
+        stats=summary_stats(values),
+        deviation_pct=deviation_pct,
+        z_score=z_score,
+        out_of_limits=(values < lower_limit) | (values > upper_limit),
+    )
+
+
+def evaluate_blanks(values, k=3):
+    values = as_float_array(values)
+    stats = summary_stats(values)
+    lod = stats.mean + k * stats.std_dev
+    return BlankResult(lod=lod, stats=stats, elevated=values > lod)
+
+
+def relative_difference(x, y):
+    """Différence relative absolue (%) par rapport à la moyenne de la paire.
+
+    Les paires de somme nulle donnent NaN, sans avertissement de division.
+    """
+    x = as_float_array(x)
+    y = as_float_array(y)
+    pair_mean = (x + y) / 2
+    rel_diff = np.full(pair_mean.shape, np.nan)
+    np.divide(np.abs(y - x) * 100, pair_mean, out=rel_diff, where=pair_mean != 0)
+    return rel_diff
+
+
+def duplicate_regression(x, y):
+    """Régression linéaire des duplicatas : pente, ordonnée à l'origine et r.
+
+    Forme fermée des moindres carrés (équivalente à ``np.polyfit(x, y, 1)``)
+    calculée sur les écarts à la moyenne. Sans dispersion des originaux
+    (une seule paire, originaux tous égaux), pente, ordonnée et r valent NaN.
+    """
+    x = as_float_array(x)
+    y = as_float_array(y)
+    if x.size == 0:
+        return float("nan"), float("nan"), float("nan")
+    x_mean = x.mean()
+    y_mean = y.mean()
+    dx = x - x_mean
+    dy = y - y_mean
+    sxx = dx @ dx
+    sxy = dx @ dy
+    syy = dy @ dy
+    if sxx == 0:
+        return float("nan"), float("nan"), float("nan")
+    slope = sxy / sxx
+    intercept = y_mean - slope * x_mean
+    r = sxy / np.sqrt(sxx * syy) if syy > 0 else float("nan")
+    return float(slope), float(intercept), float(r)
+
+
+def evaluate_duplicates(x, y):
+    x = as_float_array(x)
+    y = as_float_array(y)
+    slope, intercept, r = duplicate_regression(x, y)
+    abs_diff = np.abs(y - x)
+    rel_diff_pct = relative_difference(x, y)
+    return DuplicateResult(
+        slope=slope,
+        intercept=intercept,
+        r=r,
+        abs_diff=abs_diff,
+        rel_diff_pct=rel_diff_pct,
+        mean_abs_diff=float(np.mean(abs_diff)),
+        mean_rel_diff_pct=float(np.nanmean(rel_diff_pct)),
+    )
@@ -0,0 +1,118 @@
+"""Export des résultats (CSV compressé, Parquet, Excel, archive ZIP).
+
+Les fichiers ne sont produits qu'au moment du téléchargement et les grands
+tableaux sont écrits par blocs de lignes, de sorte que seul le fichier
+compressé réside entièrement en mémoire.
+"""
+import gzip
+import importlib.util
+import zipfile
+from io import BytesIO
+
+EXPORT_CHUNKSIZE = 100_000
+
+# Limite de lignes d'une feuille Excel (en-tête compris)
+EXCEL_MAX_ROWS = 1_048_576
+
+CSV_GZ = "CSV.gz"
+PARQUET = "Parquet"
+EXCEL = "Excel"
+
+FORMATS = {
+    CSV_GZ: (".csv.gz", "application/gzip"),
+    PARQUET: (".parquet", "application/vnd.apache.parquet"),
+    EXCEL: (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def _installed(module):
+    return importlib.util.find_spec(module) is not None
+
+
+def excel_engine():
+    for engine in ("xlsxwriter", "openpyxl"):
+        if _installed(engine):
+            return engine
+    return None
+
+
+def available_formats():
+    """Formats utilisables avec les dépendances installées."""
+    formats = [CSV_GZ]
+    if _installed("pyarrow"):
+        formats.append(PARQUET)
+    if excel_engine() is not None:
+        formats.append(EXCEL)
+    return formats
+
+
+def file_name(base_name, fmt):
+    return base_name + FORMATS[fmt][0]
+
+
+def mime_type(fmt):
+    return FORMATS[fmt][1]
+
+
+def write_csv_gz(frame, fileobj, chunksize=EXPORT_CHUNKSIZE):
+    with gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=6) as gz:
+        for start in range(0, max(len(frame), 1), chunksize):
+            chunk = frame.iloc[start:start + chunksize]
+            gz.write(chunk.to_csv(index=False, header=start == 0).encode("utf-8"))
+
+
+def write_parquet(frame, fileobj, chunksize=EXPORT_CHUNKSIZE):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(frame.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(fileobj, schema, compression="zstd") as writer:
+        for start in range(0, len(frame), chunksize):
+            chunk = frame.iloc[start:start + chunksize]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_excel(frame, fileobj):
+    if len(frame) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(
+            f"{len(frame)} lignes dépassent la limite d'une feuille Excel ; "
+            "utilisez le format CSV ou Parquet."
+        )
+    engine = excel_engine()
+    if engine is None:
+        raise ImportError("L'export Excel nécessite xlsxwriter ou openpyxl.")
+    frame.to_excel(fileobj, index=False, engine=engine)
+
+
+def write_frame(frame, fileobj, fmt, chunksize=EXPORT_CHUNKSIZE):
+    if fmt == CSV_GZ:
+        write_csv_gz(frame, fileobj, chunksize)
+    elif fmt == PARQUET:
+        write_parquet(frame, fileobj, chunksize)
+    elif fmt == EXCEL:
+        write_excel(frame, fileobj)
+    else:
+        raise ValueError(f"Format d'export inconnu: {fmt}")
+
+
+def export_frame(frame, fmt, chunksize=EXPORT_CHUNKSIZE):
+    """Contenu du fichier exporté, en bytes."""
+    buffer = BytesIO()
+    write_frame(frame, buffer, fmt, chunksize)
+    return buffer.getvalue()
+
+
+def export_archive(frames, fmt, chunksize=EXPORT_CHUNKSIZE):
+    """Archive ZIP regroupant plusieurs tableaux ({nom de base: DataFrame}).
+
+    Chaque entrée est écrite directement dans l'archive, sans passer par un
+    fichier intermédiaire en mémoire.
+    """
+    buffer = BytesIO()
+    # Le gzip et le Parquet sont déjà compressés
+    compression = zipfile.ZIP_DEFLATED if fmt == EXCEL else zipfile.ZIP_STORED
+    with zipfile.ZipFile(buffer, mode="w", compression=compression) as archive:
+        for base_name, frame in frames.items():
+            with archive.open(file_name(base_name, fmt), mode="w", force_zip64=True) as entry:
+                write_frame(frame, entry, fmt, chunksize)
+    return buffer.getvalue()
@@ -0,0 +1,183 @@
+"""Historique local des résultats QAQC (SQLite).
+
+Les résultats importés sont stockés au format long (une ligne par
+échantillon × élément) et indexés par CRM, élément, laboratoire, lot et
+date : une requête comme « tous les résultats Au de l'OREAS-45 ce
+trimestre » est servie par l'index, sans relire les fichiers. Un
+certificat déjà importé (même contenu) n'est pas réimporté.
+"""
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from geoqaqc.batch import numeric_block
+from geoqaqc.engine import STATUS_OK, STATUS_OUT_OF_LIMITS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS certificates (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    source_name TEXT,
+    lab TEXT,
+    imported_at TEXT NOT NULL,
+    n_results INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    certificate_id INTEGER NOT NULL REFERENCES certificates(id),
+    crm_id TEXT,
+    element TEXT NOT NULL,
+    lab TEXT,
+    batch TEXT,
+    sample_id TEXT,
+    analysed_at TEXT,
+    value REAL NOT NULL,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_crm_element_date ON results (crm_id, element, analysed_at);
+CREATE INDEX IF NOT EXISTS idx_results_element_date ON results (element, analysed_at);
+CREATE INDEX IF NOT EXISTS idx_results_lab_date ON results (lab, analysed_at);
+CREATE INDEX IF NOT EXISTS idx_results_batch ON results (batch);
+CREATE INDEX IF NOT EXISTS idx_results_certificate ON results (certificate_id);
+"""
+
+RESULT_COLUMNS = ["crm_id", "element", "lab", "batch", "sample_id", "analysed_at", "value", "status"]
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _text_column(frame, column, n_rows):
+    if column is None:
+        return np.full(n_rows, None, dtype=object)
+    values = frame[column]
+    return values.astype(str).str.strip().where(values.notna(), None).to_numpy(dtype=object)
+
+
+class HistoryStore:
+    """Base SQLite partagée entre sessions (une connexion protégée par un verrou)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def has_certificate(self, content_hash):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM certificates WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+        return row is not None
+
+    def import_results(self, frame, content_hash, element_columns, crm_column=None, source_name=None,
+                       lab=None, lab_column=None, batch_column=None, date_column=None,
+                       sample_column=None, evaluated=None, failed=None,
+                       status_labels=(STATUS_OK, STATUS_OUT_OF_LIMITS)):
+        """Importe un tableau large (une colonne par élément).
+
+        ``evaluated`` et ``failed`` sont des masques optionnels (lignes ×
+        éléments) donnant le statut calculé de chaque résultat. Sans colonne
+        de date, la date d'import est utilisée. Renvoie le nombre de
+        résultats importés, ou None si le certificat est déjà présent.
+        """
+        element_columns = list(element_columns)
+        n_rows = len(frame)
+        values = numeric_block(frame, element_columns)
+
+        if date_column is not None:
+            dates = pd.to_datetime(frame[date_column], errors="coerce")
+            dates = dates.dt.strftime(DATE_FORMAT).where(dates.notna(), None).to_numpy(dtype=object)
+        else:
+            dates = np.full(n_rows, datetime.now().strftime(DATE_FORMAT), dtype=object)
+
+        labs = _text_column(frame, lab_column, n_rows)
+        if lab_column is None and lab:
+            labs[:] = lab
+
+        status = np.full(values.shape, None, dtype=object)
+        if failed is not None:
+            if evaluated is None:
+                evaluated = np.ones(values.shape, dtype=bool)
+            status[evaluated] = status_labels[0]
+            status[evaluated & failed] = status_labels[1]
+
+        # Passage au format long : seules les valeurs numériques sont gardées
+        rows, cols = np.nonzero(np.isfinite(values))
+        long = {
+            "crm_id": _text_column(frame, crm_column, n_rows)[rows],
+            "element": np.asarray(element_columns, dtype=object)[cols],
+            "lab": labs[rows],
+            "batch": _text_column(frame, batch_column, n_rows)[rows],
+            "sample_id": _text_column(frame, sample_column, n_rows)[rows],
+            "analysed_at": dates[rows],
+            "value": values[rows, cols],
+            "status": status[rows, cols],
+        }
+
+        with self._lock, self._connection:
+            try:
+                cursor = self._connection.execute(
+                    "INSERT INTO certificates (content_hash, source_name, lab, imported_at, n_results) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (content_hash, source_name, lab, datetime.now().strftime(DATE_FORMAT), int(rows.size)),
+                )
+            except sqlite3.IntegrityError:
+                return None
+            certificate_id = cursor.lastrowid
+            self._connection.executemany(
+                "INSERT INTO results (certificate_id, crm_id, element, lab, batch, sample_id, analysed_at, value, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                zip(
+                    [certificate_id] * rows.size,
+                    *(long[column].tolist() for column in RESULT_COLUMNS),
+                ),
+            )
+        return int(rows.size)
+
+    def query(self, crm_id=None, element=None, lab=None, batch=None, start=None, end=None, limit=None):
+        """Résultats filtrés, triés par date ; ``start`` et ``end`` sont des dates inclusives."""
+        clauses, params = [], []
+        for column, value in (("crm_id", crm_id), ("element", element), ("lab", lab), ("batch", batch)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if start is not None:
+            clauses.append("analysed_at >= ?")
+            params.append(pd.Timestamp(start).normalize().strftime(DATE_FORMAT))
+        if end is not None:
+            clauses.append("analysed_at < ?")
+            params.append((pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).strftime(DATE_FORMAT))
+        sql = f"SELECT {', '.join(RESULT_COLUMNS)} FROM results"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY analysed_at"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return pd.read_sql_query(sql, self._connection, params=params)
+
+    def distinct(self, column):
+        """Valeurs distinctes d'une colonne indexée (pour les filtres de l'interface)."""
+        if column not in ("crm_id", "element", "lab", "batch"):
+            raise ValueError(f"Colonne non indexée: {column}")
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT DISTINCT {column} FROM results WHERE {column} IS NOT NULL ORDER BY {column}"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def certificates(self):
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT id, source_name, lab, imported_at, n_results FROM certificates ORDER BY imported_at",
+                self._connection,
+            )
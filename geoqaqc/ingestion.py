@@ -0,0 +1,293 @@
+"""Ingestion des fichiers CSV de laboratoire.
+
+Streamlit réexécute le script à chaque interaction : le résultat du parsing
+est donc conservé dans un cache LRU borné en nombre de fichiers et en
+mémoire, indexé par une empreinte du contenu du fichier et du séparateur,
+et partagé entre réexécutions et sessions.
+
+Pour les fichiers plus volumineux que la mémoire disponible,
+``StreamingSource`` ne lit que l'en-tête et un échantillon, puis charge
+uniquement les colonnes demandées, par blocs.
+"""
+import contextlib
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import partial
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from geoqaqc.defaults import DEFAULT_CHUNKSIZE
+from geoqaqc.diagnostics import stage
+from geoqaqc.memo import BoundedLRU
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow est optionnel
+    pa = None
+    pa_csv = None
+
+DEFAULT_SAMPLE_ROWS = 1000
+# Taille des blocs lus pour l'empreinte d'un fichier en lecture continue
+HASH_BLOCK_SIZE = 1 << 20
+# Mémoire des DataFrames gardés par le cache d'ingestion
+DEFAULT_CACHE_MAX_BYTES = 2 ** 30
+
+# Nombre de chiffres significatifs décimaux qu'un float32 restitue sans perte
+FLOAT32_DIGITS = np.finfo(np.float32).precision
+
+
+def content_key(content, separator):
+    """Empreinte du contenu brut (bytes ou str) et du séparateur."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    digest = hashlib.blake2b(content, digest_size=16)
+    digest.update(b"\x00")
+    digest.update(separator.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def file_content_key(source, separator, block_size=HASH_BLOCK_SIZE):
+    """Comme ``content_key``, pour un fichier lu par blocs (chemin ou objet fichier).
+
+    Un même contenu a la même empreinte, qu'il soit chargé en mémoire ou lu
+    en continu, quels que soient son nom et sa date de modification.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with stage("Empreinte du fichier"), contextlib.ExitStack() as stack:
+        if hasattr(source, "read"):
+            f = _rewind(source)
+        else:
+            f = stack.enter_context(open(source, "rb"))
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    digest.update(b"\x00")
+    digest.update(separator.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def parse_csv(content, separator):
+    """Parse un contenu CSV (bytes ou str) en DataFrame typé."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    with stage("Lecture CSV") as current:
+        df = pd.read_csv(BytesIO(content), sep=separator)
+        current.rows = len(df)
+    return df
+
+
+def frame_bytes(df):
+    """Mémoire d'un DataFrame, chaînes comprises."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+class IngestionCache(BoundedLRU):
+    """Cache LRU des DataFrames issus du parsing, borné en nombre et en mémoire.
+
+    La mémoire d'un DataFrame est mesurée par ``frame_bytes`` ; un fichier qui
+    dépasse à lui seul ``max_bytes`` n'est pas conservé. Les DataFrames
+    renvoyés sont partagés entre sessions et ne doivent pas être modifiés en
+    place.
+    """
+
+    def __init__(self, max_entries=8, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        super().__init__(max_entries, max_bytes, frame_bytes)
+
+    def get_or_parse(self, content, separator):
+        return self.load(content, separator)[1]
+
+    def load(self, content, separator):
+        """Renvoie (empreinte du contenu, DataFrame)."""
+        key = content_key(content, separator)
+        # Le parsing se fait hors du verrou pour ne pas bloquer les autres sessions
+        return key, self.get_or_compute(key, partial(parse_csv, content, separator))
+
+
+def resolve_data_path(root, path):
+    """Chemin absolu de ``path`` (relatif à ``root``), qui doit rester dans ``root``.
+
+    Les liens symboliques sont résolus avant la vérification ; lève
+    ``ValueError`` si le fichier est hors du répertoire autorisé.
+    """
+    root = os.path.realpath(root)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath((root, resolved)) != root:
+        raise ValueError(f"Le fichier doit se trouver dans le répertoire de données {root}.")
+    return resolved
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def read_header_sample(source, separator, nrows=DEFAULT_SAMPLE_ROWS):
+    """Lit l'en-tête et les premières lignes seulement."""
+    with stage("Lecture de l'en-tête", rows=nrows):
+        return pd.read_csv(_rewind(source), sep=separator, nrows=nrows)
+
+
+def fits_float32(values):
+    """Vrai si toutes les valeurs tiennent dans un float32 sans perte.
+
+    Une valeur est conservée si elle a au plus ``FLOAT32_DIGITS`` chiffres
+    significatifs et reste dans la plage normale des float32.
+    """
+    finite = values[np.isfinite(values)]
+    nonzero = np.abs(finite[finite != 0])
+    if nonzero.size == 0:
+        return True
+    info = np.finfo(np.float32)
+    if nonzero.max() > info.max or nonzero.min() < info.tiny:
+        return False
+    exponent = np.floor(np.log10(nonzero))
+    scaled = nonzero * 10.0 ** (FLOAT32_DIGITS - 1 - exponent)
+    return bool(np.all(np.abs(scaled - np.round(scaled)) < 1e-6))
+
+
+def exact_float64(values):
+    """Reconvertit en float64 des float32 validés par ``fits_float32``.
+
+    Chaque valeur est ramenée à ses ``FLOAT32_DIGITS`` chiffres significatifs
+    avant la conversion : 0.1 stocké en float32 redevient exactement le
+    float64 0.1, et non 0.10000000149011612.
+    """
+    result = values.astype(np.float64)
+    exact = np.isfinite(result) & (result != 0)
+    nonzero = result[exact]
+    digits = FLOAT32_DIGITS - 1 - np.floor(np.log10(np.abs(nonzero)))
+    mantissa = np.round(nonzero * 10.0 ** digits)
+    # Division ou multiplication par une puissance de dix exacte : arrondi correct
+    result[exact] = np.where(digits >= 0, mantissa / 10.0 ** np.abs(digits), mantissa * 10.0 ** np.abs(digits))
+    return result
+
+
+def _iter_chunks_pyarrow(source, separator, columns, chunksize):
+    # Colonnes lues en texte : les types sont figés sur le premier bloc par
+    # le lecteur pyarrow, une valeur "<0.005" plus loin le ferait échouer.
+    reader = pa_csv.open_csv(
+        _rewind(source),
+        read_options=pa_csv.ReadOptions(block_size=max(chunksize * 64, 1 << 20)),
+        parse_options=pa_csv.ParseOptions(delimiter=separator),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=columns,
+            column_types={column: pa.string() for column in columns},
+        ),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def _iter_chunks_pandas(source, separator, columns, chunksize):
+    yield from pd.read_csv(_rewind(source), sep=separator, usecols=columns, chunksize=chunksize)
+
+
+def iter_column_chunks(source, separator, columns, chunksize=DEFAULT_CHUNKSIZE, engine=None):
+    """Itère sur les colonnes demandées, bloc par bloc.
+
+    ``engine`` vaut "pyarrow" ou "c" ; par défaut pyarrow s'il est installé.
+    """
+    if engine is None:
+        engine = "pyarrow" if pa_csv is not None else "c"
+    if engine == "pyarrow":
+        return _iter_chunks_pyarrow(source, separator, list(columns), chunksize)
+    return _iter_chunks_pandas(source, separator, list(columns), chunksize)
+
+
+def load_columns(source, separator, columns, numeric_columns=(), chunksize=DEFAULT_CHUNKSIZE, engine=None,
+                 progress=None):
+    """Charge uniquement ``columns``, par blocs, avec des types numériques explicites.
+
+    Les colonnes de ``numeric_columns`` sont converties en float (les valeurs
+    non numériques deviennent NaN) puis stockées en float32 tant qu'aucun bloc
+    ne perd de précision, en float64 sinon ; les blocs déjà stockés en float32
+    sont alors reconvertis exactement (``exact_float64``). La mémoire de travail est bornée
+    par la taille d'un bloc. ``progress(lignes lues)`` est appelé après chaque bloc.
+    """
+    columns = list(dict.fromkeys(columns))
+    numeric_columns = [column for column in columns if column in set(numeric_columns)]
+    parts = {column: [] for column in columns}
+    as_float32 = {column: True for column in numeric_columns}
+    n_rows = 0
+
+    with stage("Lecture par blocs") as current:
+        for chunk in iter_column_chunks(source, separator, columns, chunksize, engine):
+            for column in columns:
+                if column not in as_float32:
+                    parts[column].append(chunk[column].to_numpy())
+                    continue
+                values = pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype=np.float64)
+                if as_float32[column] and fits_float32(values):
+                    parts[column].append(values.astype(np.float32))
+                else:
+                    if as_float32[column]:
+                        as_float32[column] = False
+                        parts[column] = [exact_float64(part) for part in parts[column]]
+                    parts[column].append(values)
+            n_rows += len(chunk)
+            if progress is not None:
+                progress(n_rows)
+        current.rows = n_rows
+
+    data = {}
+    for column in columns:
+        if parts[column]:
+            data[column] = np.concatenate(parts[column])
+        else:
+            data[column] = np.array([], dtype=np.float32 if column in as_float32 else object)
+        parts[column] = None
+    return pd.DataFrame(data, columns=columns)
+
+
+class StreamingSource:
+    """Fichier volumineux lu à la demande, colonne par colonne.
+
+    Seuls l'en-tête et un échantillon sont analysés à la création, le
+    fichier n'étant parcouru par blocs que pour son empreinte ; ``load``
+    charge les colonnes sélectionnées et garde les derniers résultats.
+    """
+
+    def __init__(self, source, separator, chunksize=DEFAULT_CHUNKSIZE,
+                 sample_rows=DEFAULT_SAMPLE_ROWS, max_loaded=4):
+        self.source = source
+        self.separator = separator
+        self.chunksize = chunksize
+        self.sample = read_header_sample(source, separator, nrows=sample_rows)
+        # Empreinte du contenu : clé des résultats et de l'historique
+        self.content_key = file_content_key(source, separator)
+        self.max_loaded = max_loaded
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        # Un objet fichier a une position de lecture partagée : ses lectures
+        # sont sérialisées ; un chemin peut être relu en parallèle.
+        self._read_lock = threading.Lock() if hasattr(source, "seek") else contextlib.nullcontext()
+
+    @property
+    def columns(self):
+        return self.sample.columns
+
+    def load(self, columns, numeric_columns=(), progress=None):
+        key = (tuple(columns), tuple(numeric_columns))
+        with self._lock:
+            if key in self._loaded:
+                self._loaded.move_to_end(key)
+                return self._loaded[key]
+
+        # La lecture se fait hors du verrou pour ne pas bloquer les autres sessions
+        with self._read_lock:
+            frame = load_columns(
+                self.source, self.separator, columns, numeric_columns, chunksize=self.chunksize,
+                progress=progress
+            )
+
+        with self._lock:
+            self._loaded[key] = frame
+            self._loaded.move_to_end(key)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return frame
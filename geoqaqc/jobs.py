@@ -0,0 +1,212 @@
+"""Analyses en arrière-plan, réparties équitablement entre les sessions.
+
+Streamlit exécute le script dans le fil de la session : une analyse longue
+bloque la page. Les analyses sont soumises comme tâches à un pool de fils
+borné ; la page lit l'avancement à chaque réexécution et récupère le
+résultat une fois la tâche terminée.
+
+Les tâches en attente sont servies à tour de rôle par session, et une
+session n'occupe au plus que ``max_running_per_owner`` fils : une longue
+analyse ne peut pas affamer les autres utilisateurs. L'annulation est
+coopérative : elle prend effet au prochain appel de progression de la
+tâche (un bloc lu, un lot de rééchantillonnages, une étape).
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_QUEUED = "En attente"
+JOB_RUNNING = "En cours"
+JOB_DONE = "Terminée"
+JOB_FAILED = "Échec"
+JOB_CANCELLED = "Annulée"
+FINISHED_STATUSES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+DEFAULT_MAX_WORKERS = min(4, os.cpu_count() or 1)
+MAX_QUEUED_PER_OWNER = 8
+# Tâches terminées conservées pour que les sessions récupèrent leur résultat
+MAX_FINISHED_JOBS = 256
+
+
+class JobCancelled(Exception):
+    """Levée dans la tâche par l'appel de progression après une annulation."""
+
+
+def no_progress(done, total=None, message=None):
+    pass
+
+
+def stage(progress, start, stop, message):
+    """Rapporte une étape dans l'intervalle [start, stop] de l'avancement total.
+
+    Le rappel renvoyé reçoit ``(done, total)`` ; ``message`` peut utiliser
+    ``{done}`` et ``{total}``. Sans total connu, l'avancement reste à ``start``.
+    """
+    def report(done, total=None):
+        fraction = start + (stop - start) * min(done / total, 1.0) if total else start
+        progress(fraction, 1.0, message.format(done=done, total=total))
+    return report
+
+
+class Job:
+    """Tâche soumise par une session ; ``function`` reçoit le rappel de progression."""
+
+    def __init__(self, owner, function, key=None, label=""):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.function = function
+        self.key = key
+        self.label = label
+        self.status = JOB_QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def report(self, done, total=None, message=None):
+        """Rappel de progression ; lève ``JobCancelled`` si l'annulation est demandée."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        if total:
+            self.progress = min(max(done / total, 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def wait(self, timeout=None):
+        """Attend la fin de la tâche ; renvoie vrai si elle est terminée."""
+        return self._finished.wait(timeout)
+
+
+class JobManager:
+    """Pool de fils borné avec une file par session servie à tour de rôle."""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_running_per_owner=None,
+                 max_queued_per_owner=MAX_QUEUED_PER_OWNER):
+        self.max_workers = max_workers
+        self.max_running_per_owner = max_running_per_owner or max(1, max_workers // 2)
+        self.max_queued_per_owner = max_queued_per_owner
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="geoqaqc-job")
+        self._jobs = OrderedDict()
+        self._queues = OrderedDict()
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def submit(self, owner, function, key=None, label=""):
+        with self._lock:
+            queue = self._queues.setdefault(owner, deque())
+            if len(queue) >= self.max_queued_per_owner:
+                raise ValueError("Trop d'analyses en attente pour cette session. Veuillez patienter ou en annuler.")
+            job = Job(owner, function, key, label)
+            self._jobs[job.id] = job
+            queue.append(job)
+            self._prune()
+            self._dispatch()
+        return job
+
+    def get(self, job_id):
+        if job_id is None:
+            return None
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return
+            job._cancel.set()
+            # Une tâche en attente est retirée de la file ; une tâche en cours
+            # s'arrête à son prochain appel de progression
+            if job.status == JOB_QUEUED:
+                self._queues[job.owner].remove(job)
+                self._finish(job, JOB_CANCELLED)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "running": sum(self._running.values()),
+                "queued": sum(len(queue) for queue in self._queues.values()),
+                "jobs": len(self._jobs),
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            for job in self._jobs.values():
+                job._cancel.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _next_job(self):
+        # Tour de rôle : la session servie passe en fin de liste
+        for owner, queue in self._queues.items():
+            if queue and self._running.get(owner, 0) < self.max_running_per_owner:
+                self._queues.move_to_end(owner)
+                return queue.popleft()
+        return None
+
+    def _dispatch(self):
+        while sum(self._running.values()) < self.max_workers:
+            job = self._next_job()
+            if job is None:
+                break
+            job.status = JOB_RUNNING
+            job.started_at = time.monotonic()
+            self._running[job.owner] = self._running.get(job.owner, 0) + 1
+            self._executor.submit(self._run, job)
+
+    def _run(self, job):
+        status = JOB_DONE
+        try:
+            job.result = job.function(job.report)
+        except JobCancelled:
+            status = JOB_CANCELLED
+        except Exception as e:
+            job.error = e
+            status = JOB_FAILED
+        if status == JOB_DONE and job.cancel_requested:
+            status = JOB_CANCELLED
+            job.result = None
+
+        with self._lock:
+            self._running[job.owner] -= 1
+            if not self._running[job.owner]:
+                del self._running[job.owner]
+            self._finish(job, status)
+            self._dispatch()
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.monotonic()
+        if status == JOB_DONE:
+            job.progress = 1.0
+        job.function = None
+        job._finished.set()
+
+    def _prune(self):
+        for owner in [owner for owner, queue in self._queues.items() if not queue]:
+            del self._queues[owner]
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
@@ -0,0 +1,36 @@
+"""Import différé des modules lourds.
+
+``lazy_import("geoqaqc.charts")`` renvoie un substitut qui importe le module
+au premier accès à l'un de ses attributs : l'application peut référencer
+ses modules d'analyse et de tracé dès le début du script sans payer leur
+import (numpy, pandas, plotly) avant la première analyse. L'import passe
+par ``importlib`` et profite de son verrou : deux sessions qui accèdent en
+même temps au module l'importent une seule fois.
+"""
+import importlib
+
+
+class LazyModule:
+    """Module importé au premier accès à un attribut."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        # Appelée seulement pour les attributs absents du substitut
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __repr__(self):
+        state = "importé" if self.loaded else "non importé"
+        return f"<module différé {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
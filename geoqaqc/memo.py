@@ -0,0 +1,120 @@
+"""Mémoïsation des résultats d'analyse et des figures.
+
+Les entrées sont indexées par (empreinte des données, type de contrôle,
+colonnes, paramètres) et évincées dans l'ordre LRU dès que le nombre
+d'entrées ou la taille estimée dépasse la limite. Les valeurs renvoyées
+sont partagées entre sessions et ne doivent pas être modifiées en place.
+"""
+import dataclasses
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 512 * 2 ** 20
+DEFAULT_MAX_ENTRIES = 64
+
+# Taille supposée d'un objet Python référencé par une colonne object
+OBJECT_ITEM_BYTES = 64
+
+
+def estimate_size(value):
+    """Taille mémoire approximative (octets) d'un résultat d'analyse."""
+    if isinstance(value, np.ndarray):
+        extra = OBJECT_ITEM_BYTES * value.size if value.dtype == object else 0
+        return value.nbytes + extra
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        n_object = sum(frame[column].dtype == object for column in frame.columns) * len(frame)
+        return int(frame.memory_usage(index=True, deep=False).sum()) + OBJECT_ITEM_BYTES * n_object
+    # Figures plotly, sans importer plotly avant la première figure
+    if hasattr(value, "to_plotly_json"):
+        return estimate_size(value.to_plotly_json())
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return sum(estimate_size(getattr(value, field.name)) for field in dataclasses.fields(value))
+    if isinstance(value, dict):
+        return sum(estimate_size(item) for item in value.values()) + sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value) + sys.getsizeof(value)
+    return sys.getsizeof(value)
+
+
+class BoundedLRU:
+    """Cache LRU partagé entre threads, borné en nombre d'entrées et en mémoire.
+
+    ``size(valeur)`` donne la taille d'une valeur en octets ; une valeur qui
+    dépasse à elle seule ``max_bytes`` est renvoyée sans être conservée.
+    """
+
+    def __init__(self, max_entries, max_bytes, size):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = size
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, key):
+        """Renvoie (trouvé, valeur) sans calculer ; un succès est compté."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Le calcul se fait hors du verrou pour ne pas bloquer les autres sessions
+        value = compute()
+        size = self._size(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+class ResultCache(BoundedLRU):
+    """Résultats d'analyse et figures, bornés en nombre et en mémoire estimée."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        super().__init__(max_entries, max_bytes, estimate_size)
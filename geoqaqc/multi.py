@@ -0,0 +1,337 @@
+"""Tableau de bord multi-élément : CRM, blancs et duplicatas en une passe.
+
+Un export de laboratoire large (une ligne par échantillon, une colonne par
+élément) est lu une fois en matrice lignes × éléments, valeurs censurées
+comprises. Une colonne de type désigne les lignes de contrôle : identifiant
+de CRM, libellé de blanc ou de duplicata. Les trois contrôles sont évalués
+sur la matrice entière, puis comptés par lot × élément avec
+``np.bincount``, comme dans ``batch.evaluate_crm_batch`` :
+
+- CRM : limites certifiées alignées sur chaque ligne par indexation, les
+  valeurs censurées évaluées à leur limite comme dans ``batch`` ;
+- blancs : LOD de chaque élément (moyenne + k écarts-types de l'ensemble
+  des blancs, censurés substitués), blancs au-dessus comptés par lot ;
+- duplicatas : HARD de chaque ligne de duplicata contre son original
+  (colonne d'identifiant parent, sinon la ligne précédente si c'est un
+  échantillon de routine), taux au-delà
+  du seuil et HARD au 90e centile par lot × élément.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from geoqaqc import censored
+from geoqaqc.batch import batch_limits, crm_keys
+from geoqaqc.carryover import KIND_BLANK, KIND_CRM, KIND_ROUTINE
+from geoqaqc.defaults import HARD_THRESHOLD, TOLERANCE_STDDEV
+from geoqaqc.precision import HARD_PERCENTILE, half_relative_difference
+
+KIND_DUPLICATE = 3
+
+# Lot unique sans colonne de lot ; lot des lignes sans numéro de lot
+ALL_BATCHES = "Tous"
+NO_BATCH = "(sans lot)"
+
+# Substitutions applicables élément par élément à la matrice des blancs
+CENSORED_METHODS = [
+    censored.SUBSTITUTE_HALF_LIMIT,
+    censored.SUBSTITUTE_LIMIT,
+    censored.SUBSTITUTE_EXCLUDE,
+]
+
+INDICATOR_CRM = "CRM hors limites (%)"
+INDICATOR_BLANK = "Blancs élevés (%)"
+INDICATOR_DUPLICATE = "Duplicatas hors seuil HARD (%)"
+INDICATOR_PRECISION = "Précision des duplicatas (HARD au 90e centile, %)"
+INDICATORS = [INDICATOR_CRM, INDICATOR_BLANK, INDICATOR_DUPLICATE, INDICATOR_PRECISION]
+
+
+@dataclass
+class MultiElementResult:
+    """Contrôles par lot × élément ; chaque tableau est indexé par lot, une colonne par élément.
+
+    Les LOD des blancs sont indexées par élément, les limites des CRM par
+    CRM × élément.
+    """
+
+    crm_count: pd.DataFrame
+    crm_failed: pd.DataFrame
+    blank_count: pd.DataFrame
+    blank_failed: pd.DataFrame
+    duplicate_count: pd.DataFrame
+    duplicate_failed: pd.DataFrame
+    duplicate_hard_percentile: pd.DataFrame
+    blank_mean: pd.Series
+    blank_std_dev: pd.Series
+    blank_lod: pd.Series
+    crm_reference_value: pd.DataFrame
+    crm_reference_stddev: pd.DataFrame
+    crm_lower_limit: pd.DataFrame
+    crm_upper_limit: pd.DataFrame
+
+    @property
+    def crm_failure_rate(self):
+        return self.crm_failed / self.crm_count.where(self.crm_count > 0)
+
+    @property
+    def blank_failure_rate(self):
+        return self.blank_failed / self.blank_count.where(self.blank_count > 0)
+
+    @property
+    def duplicate_failure_rate(self):
+        return self.duplicate_failed / self.duplicate_count.where(self.duplicate_count > 0)
+
+    def indicator(self, name):
+        """Valeurs (%) de l'indicateur et nombre de résultats de chaque cellule."""
+        if name == INDICATOR_CRM:
+            return self.crm_failure_rate * 100, self.crm_count
+        if name == INDICATOR_BLANK:
+            return self.blank_failure_rate * 100, self.blank_count
+        if name == INDICATOR_DUPLICATE:
+            return self.duplicate_failure_rate * 100, self.duplicate_count
+        if name == INDICATOR_PRECISION:
+            return self.duplicate_hard_percentile, self.duplicate_count
+        raise ValueError(f"Indicateur inconnu : {name}")
+
+    def tables(self):
+        """Tableaux du tableau de bord, lot en première colonne, pour l'export en archive."""
+        tables = {
+            "taux_crm_hors_limites": self.crm_failure_rate,
+            "nombre_crm": self.crm_count,
+            "nombre_crm_hors_limites": self.crm_failed,
+            "taux_blancs_eleves": self.blank_failure_rate,
+            "nombre_blancs": self.blank_count,
+            "nombre_blancs_eleves": self.blank_failed,
+            "taux_duplicatas_hors_seuil": self.duplicate_failure_rate,
+            "nombre_duplicatas": self.duplicate_count,
+            "nombre_duplicatas_hors_seuil": self.duplicate_failed,
+            "hard_90e_centile": self.duplicate_hard_percentile,
+        }
+        tables = {name: table.reset_index() for name, table in tables.items()}
+        tables["lod_blancs"] = pd.DataFrame({
+            "element": self.blank_lod.index,
+            "moyenne": self.blank_mean.to_numpy(),
+            "ecart_type": self.blank_std_dev.to_numpy(),
+            "lod": self.blank_lod.to_numpy(),
+        })
+        return tables
+
+
+def batch_codes(frame, batch_column=None):
+    """Code de lot de chaque ligne et noms des lots, dans l'ordre d'apparition."""
+    if batch_column is None:
+        return np.zeros(len(frame), dtype=np.intp), [ALL_BATCHES]
+    codes, batches = pd.factorize(crm_keys(frame[batch_column]).fillna(NO_BATCH))
+    return codes, [str(batch) for batch in batches]
+
+
+def batch_mask(frame, batch_column, batch):
+    """Lignes du lot ``batch`` (nom du lot dans les résultats)."""
+    if batch_column is None:
+        return np.ones(len(frame), dtype=bool)
+    return (crm_keys(frame[batch_column]).fillna(NO_BATCH) == batch).to_numpy()
+
+
+def sample_kinds(types, crm_ids=(), blank_labels=(), duplicate_labels=()):
+    """Type de chaque ligne (routine, blanc, CRM, duplicata) d'après la colonne de type."""
+    types = crm_keys(types)
+    kinds = np.full(len(types), KIND_ROUTINE, dtype=np.int8)
+    kinds[types.isin([str(c) for c in crm_ids]).to_numpy()] = KIND_CRM
+    kinds[types.isin([str(b).strip() for b in blank_labels]).to_numpy()] = KIND_BLANK
+    kinds[types.isin([str(d).strip() for d in duplicate_labels]).to_numpy()] = KIND_DUPLICATE
+    return kinds
+
+
+def duplicate_originals(frame, kinds, id_column=None, parent_column=None):
+    """Lignes des duplicatas et lignes de leurs originaux.
+
+    L'original est l'échantillon dont l'identifiant figure dans
+    ``parent_column`` (première occurrence) ; sans cette colonne, c'est la
+    ligne précédente, à condition qu'elle soit un échantillon de routine
+    (pas un blanc, un CRM ou un autre duplicata). Les duplicatas sans
+    original sont ignorés.
+    """
+    rows = np.flatnonzero(kinds == KIND_DUPLICATE)
+    if parent_column is None or id_column is None:
+        originals = rows - 1
+        routine = np.zeros(rows.size, dtype=bool)
+        routine[originals >= 0] = kinds[originals[originals >= 0]] == KIND_ROUTINE
+        originals[~routine] = -1
+    else:
+        ids = crm_keys(frame[id_column])
+        first = pd.Series(np.arange(len(frame)), index=ids)
+        first = first[first.index.notna() & ~first.index.duplicated()]
+        parents = crm_keys(frame[parent_column]).iloc[rows]
+        originals = first.reindex(parents).fillna(-1).to_numpy(dtype=np.intp)
+    found = originals >= 0
+    return rows[found], originals[found]
+
+
+def measured_values(parsed):
+    """Valeurs mesurées ; les valeurs censurées (limites) deviennent NaN."""
+    return np.where(parsed.censoring == censored.CENSORING_NONE, parsed.values, np.nan)
+
+
+def duplicate_pair_table(frame, element, kinds, id_column=None, parent_column=None, mask=None):
+    """Paires (original, duplicata) de ``element``, valeurs censurées en NaN.
+
+    ``mask`` (une valeur par ligne) restreint les duplicatas retenus, par
+    exemple aux lignes d'un lot.
+    """
+    duplicates, originals = duplicate_originals(frame, kinds, id_column, parent_column)
+    if mask is not None:
+        keep = mask[duplicates]
+        duplicates, originals = duplicates[keep], originals[keep]
+    values = measured_values(censored.parse_censored(frame[element]))
+    return pd.DataFrame({
+        f"{element} (original)": values[originals],
+        f"{element} (duplicata)": values[duplicates],
+    })
+
+
+def _cell_sums(codes, n_batches, weights):
+    """Sommes par lot × élément de ``weights`` (lignes × éléments)."""
+    n_elements = weights.shape[1]
+    cells = (codes[:, None] * n_elements + np.arange(n_elements)).ravel()
+    size = n_batches * n_elements
+    return np.bincount(cells, weights=weights.ravel(), minlength=size).reshape(n_batches, n_elements)
+
+
+def _cell_percentile(codes, n_batches, values, q):
+    """Centile ``q`` (interpolation linéaire) des valeurs finies de chaque lot × élément.
+
+    Un seul tri (``np.lexsort`` par cellule puis valeur) pour toutes les
+    cellules ; NaN pour une cellule vide.
+    """
+    n_elements = values.shape[1]
+    size = n_batches * n_elements
+    cells = (codes[:, None] * n_elements + np.arange(n_elements)).ravel()
+    values = values.ravel()
+    finite = np.isfinite(values)
+    cells, values = cells[finite], values[finite]
+
+    ordered = values[np.lexsort((values, cells))]
+    counts = np.bincount(cells, minlength=size)
+    starts = np.cumsum(counts) - counts
+    filled = counts > 0
+    position = (counts[filled] - 1) * q / 100
+    low = np.floor(position).astype(np.intp)
+    high = np.ceil(position).astype(np.intp)
+    lower = ordered[starts[filled] + low]
+    upper = ordered[starts[filled] + high]
+
+    result = np.full(size, np.nan)
+    result[filled] = lower + (upper - lower) * (position - low)
+    return result.reshape(n_batches, n_elements)
+
+
+def evaluate_multi_element(
+    frame,
+    type_column,
+    element_columns,
+    batch_column=None,
+    store=None,
+    tolerance_type=TOLERANCE_STDDEV,
+    tolerance_value=2.0,
+    method=None,
+    blank_labels=(),
+    censored_method=censored.SUBSTITUTE_HALF_LIMIT,
+    negative_as_censored=False,
+    k=3,
+    duplicate_labels=(),
+    id_column=None,
+    parent_column=None,
+    hard_threshold=HARD_THRESHOLD,
+):
+    """Évalue CRM, blancs et duplicatas de tous les éléments du fichier en une passe.
+
+    Les CRM sont les lignes dont le type figure dans la base de certificats
+    ``store`` ; sans base, aucun CRM n'est évalué. ``negative_as_censored``
+    ne s'applique qu'aux blancs.
+    """
+    if censored_method not in CENSORED_METHODS:
+        raise ValueError(f"Méthode non disponible en mode multi-élément : {censored_method}")
+    element_columns = list(element_columns)
+    if not element_columns:
+        raise ValueError("Sélectionnez au moins une colonne d'élément.")
+
+    codes, batches = batch_codes(frame, batch_column)
+    n_batches = len(batches)
+    types = crm_keys(frame[type_column])
+    kinds = sample_kinds(types, store.crm_ids if store is not None else (), blank_labels, duplicate_labels)
+
+    # Lecture unique du bloc d'éléments ; une valeur censurée vaut sa limite
+    # pour les CRM (comme dans ``batch``) et ne compte pas comme mesure pour
+    # les duplicatas
+    parsed = censored.parse_censored_block(frame, element_columns)
+    measured = measured_values(parsed)
+
+    # CRM : limites certifiées de chaque ligne (CRM × élément)
+    crm_rows = np.flatnonzero(kinds == KIND_CRM)
+    crm_codes, crm_ids = pd.factorize(types.iloc[crm_rows])
+    if crm_rows.size:
+        ref_value, ref_stddev = store.reference_matrix(list(crm_ids), element_columns, method)
+    else:
+        ref_value = ref_stddev = np.empty((0, len(element_columns)))
+    lower, upper = batch_limits(ref_value, ref_stddev, tolerance_type, tolerance_value)
+    values = parsed.values[crm_rows]
+    row_lower = lower[crm_codes]
+    row_upper = upper[crm_codes]
+    evaluated = np.isfinite(values) & np.isfinite(row_lower)
+    failed = evaluated & ((values < row_lower) | (values > row_upper))
+    crm_count = _cell_sums(codes[crm_rows], n_batches, evaluated)
+    crm_failed = _cell_sums(codes[crm_rows], n_batches, failed)
+
+    # Blancs : LOD de chaque élément sur l'ensemble des blancs
+    blank_rows = np.flatnonzero(kinds == KIND_BLANK)
+    blanks = parsed.take(blank_rows)
+    if negative_as_censored:
+        blanks = censored.censor_negatives(blanks)
+    values = censored.substitute(blanks, censored_method)
+    kept = np.isfinite(values)
+    n_kept = kept.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(kept, values, 0.0).sum(axis=0) / n_kept
+        std_dev = np.sqrt(np.where(kept, (values - mean) ** 2, 0.0).sum(axis=0) / n_kept)
+    lod = mean + k * std_dev
+    elevated = kept & (values > lod) & ~blanks.left
+    blank_count = _cell_sums(codes[blank_rows], n_batches, kept)
+    blank_failed = _cell_sums(codes[blank_rows], n_batches, elevated)
+
+    # Duplicatas : HARD de chaque paire, comme dans ``precision``
+    duplicate_rows, original_rows = duplicate_originals(frame, kinds, id_column, parent_column)
+    hard = np.abs(half_relative_difference(measured[original_rows], measured[duplicate_rows]))
+    evaluated = np.isfinite(hard)
+    duplicate_codes = codes[duplicate_rows]
+    duplicate_count = _cell_sums(duplicate_codes, n_batches, evaluated)
+    duplicate_failed = _cell_sums(duplicate_codes, n_batches, evaluated & (hard > hard_threshold))
+    hard_percentile = _cell_percentile(duplicate_codes, n_batches, hard, HARD_PERCENTILE)
+
+    index = pd.Index(batches, name=batch_column or "Lot")
+
+    def matrix(data, dtype=np.float64):
+        return pd.DataFrame(data.astype(dtype), index=index, columns=element_columns)
+
+    def crm_matrix(data):
+        return pd.DataFrame(data, index=pd.Index(list(crm_ids), name=type_column), columns=element_columns)
+
+    def series(data):
+        return pd.Series(data, index=pd.Index(element_columns, name="element"))
+
+    return MultiElementResult(
+        crm_count=matrix(crm_count, np.int64),
+        crm_failed=matrix(crm_failed, np.int64),
+        blank_count=matrix(blank_count, np.int64),
+        blank_failed=matrix(blank_failed, np.int64),
+        duplicate_count=matrix(duplicate_count, np.int64),
+        duplicate_failed=matrix(duplicate_failed, np.int64),
+        duplicate_hard_percentile=matrix(hard_percentile),
+        blank_mean=series(mean),
+        blank_std_dev=series(std_dev),
+        blank_lod=series(lod),
+        crm_reference_value=crm_matrix(ref_value),
+        crm_reference_stddev=crm_matrix(ref_stddev),
+        crm_lower_limit=crm_matrix(lower),
+        crm_upper_limit=crm_matrix(upper),
+    )
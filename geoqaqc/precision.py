@@ -0,0 +1,233 @@
+"""Précision des duplicatas : RMA, HARD/HRD, Thompson-Howarth et bootstrap.
+
+Les deux valeurs d'une paire portent une erreur de mesure : la régression
+des moindres carrés sous-estime alors la pente, d'où la régression de l'axe
+majeur réduit (RMA). Le bootstrap tire des lots de rééchantillonnages sous
+forme d'une matrice d'indices (lots × paires), compte les tirages de chaque
+paire (``np.bincount``) et obtient les sommes de tout le lot par un produit
+matriciel avec les termes de chaque paire, sans boucle Python sur les
+tirages ni copie des valeurs tirées.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from geoqaqc.defaults import DEFAULT_RESAMPLES, HARD_THRESHOLD
+from geoqaqc.engine import as_float_array
+
+REGRESSION_OLS = "Moindres carrés"
+REGRESSION_RMA = "Axe majeur réduit (RMA)"
+
+# Taille des groupes de paires de la méthode de Thompson-Howarth
+TH_GROUP_SIZE = 11
+# Pour d = x1 - x2 normale, médiane(|d|) = 0.6745 * sqrt(2) * sigma
+TH_MEDIAN_FACTOR = 0.6745 * np.sqrt(2)
+
+HARD_PERCENTILE = 90.0
+
+# Éléments de la matrice d'indices d'un lot de bootstrap (borne la mémoire)
+BOOTSTRAP_BATCH_ELEMENTS = 4_000_000
+
+PERCENTILE_POINTS = 1001
+
+
+@dataclass
+class ThompsonHowarthResult:
+    """Écart-type de mesure modélisé par sigma(c) = sigma0 + k * c."""
+
+    group_means: np.ndarray
+    group_medians: np.ndarray
+    sigma0: float
+    k: float
+
+    def sigma(self, concentration):
+        return self.sigma0 + self.k * np.asarray(concentration, dtype=np.float64)
+
+    def precision_pct(self, concentration):
+        """Précision relative à 2 sigma (%) à la concentration donnée."""
+        concentration = np.asarray(concentration, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return 200 * self.sigma(concentration) / concentration
+
+
+@dataclass
+class PrecisionResult:
+    rma_slope: float
+    rma_intercept: float
+    hard: np.ndarray
+    hrd: np.ndarray
+    hard_within_threshold_pct: float
+    hard_percentile_value: float
+    thompson_howarth: ThompsonHowarthResult
+
+
+@dataclass
+class BootstrapResult:
+    method: str
+    confidence: float
+    slopes: np.ndarray
+    intercepts: np.ndarray
+    slope_interval: tuple
+    intercept_interval: tuple
+
+
+def _moments(x, y):
+    x_mean = x.mean()
+    y_mean = y.mean()
+    dx = x - x_mean
+    dy = y - y_mean
+    return x_mean, y_mean, dx @ dx, dy @ dy, dx @ dy
+
+
+def regression_slope(sxx, syy, sxy, method=REGRESSION_RMA):
+    """Pente(s) à partir des sommes des carrés et du produit croisé centrés."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if method == REGRESSION_OLS:
+            return sxy / sxx
+        return np.sign(sxy) * np.sqrt(syy / sxx)
+
+
+def rma_regression(x, y):
+    """Régression RMA : pente, ordonnée à l'origine et r.
+
+    Comme ``engine.duplicate_regression``, renvoie NaN sans avertissement
+    quand une série est constante (pente ou r indéfinis).
+    """
+    x = as_float_array(x)
+    y = as_float_array(y)
+    x_mean, y_mean, sxx, syy, sxy = _moments(x, y)
+    slope = regression_slope(sxx, syy, sxy, REGRESSION_RMA)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = sxy / np.sqrt(sxx * syy)
+        intercept = y_mean - slope * x_mean
+    return float(slope), float(intercept), float(r)
+
+
+def half_relative_difference(x, y):
+    """HRD (%) : (y - x) / (x + y) ; NaN pour une somme nulle, sans avertissement."""
+    x = as_float_array(x)
+    y = as_float_array(y)
+    total = x + y
+    hrd = np.full(total.shape, np.nan)
+    np.divide(100 * (y - x), total, out=hrd, where=total != 0)
+    return hrd
+
+
+def percentile_curve(values, n_points=PERCENTILE_POINTS):
+    """Rangs centiles et quantiles correspondants (taille fixe quel que soit n)."""
+    values = as_float_array(values)
+    values = values[np.isfinite(values)]
+    ranks = np.linspace(0, 100, n_points)
+    if values.size == 0:
+        return ranks, np.full(n_points, np.nan)
+    return ranks, np.percentile(values, ranks)
+
+
+def thompson_howarth(x, y, group_size=TH_GROUP_SIZE):
+    """Estimation de Thompson-Howarth de la précision en fonction de la teneur.
+
+    Les paires sont triées par moyenne et groupées par ``group_size`` ; la
+    médiane des différences absolues de chaque groupe est régressée sur la
+    moyenne du groupe. Lève ``ValueError`` s'il y a moins de deux groupes.
+    """
+    x = as_float_array(x)
+    y = as_float_array(y)
+    n_groups = x.size // group_size
+    if n_groups < 2:
+        raise ValueError(
+            f"Au moins {2 * group_size} paires sont nécessaires pour la méthode de Thompson-Howarth."
+        )
+    means = (x + y) / 2
+    order = np.argsort(means, kind="stable")[:n_groups * group_size]
+    group_means = means[order].reshape(n_groups, group_size).mean(axis=1)
+    group_medians = np.median(np.abs(x - y)[order].reshape(n_groups, group_size), axis=1)
+
+    c_mean, d_mean, scc, _, scd = _moments(group_means, group_medians)
+    slope = scd / scc if scc > 0 else 0.0
+    intercept = d_mean - slope * c_mean
+    return ThompsonHowarthResult(
+        group_means=group_means,
+        group_medians=group_medians,
+        sigma0=float(intercept / TH_MEDIAN_FACTOR),
+        k=float(slope / TH_MEDIAN_FACTOR),
+    )
+
+
+def evaluate_precision(x, y, hard_threshold=HARD_THRESHOLD, group_size=TH_GROUP_SIZE):
+    """RMA, HARD/HRD et Thompson-Howarth (None s'il y a trop peu de paires)."""
+    x = as_float_array(x)
+    y = as_float_array(y)
+    slope, intercept, _ = rma_regression(x, y)
+    hrd = half_relative_difference(x, y)
+    hard = np.abs(hrd)
+    finite = hard[np.isfinite(hard)]
+    return PrecisionResult(
+        rma_slope=slope,
+        rma_intercept=intercept,
+        hard=hard,
+        hrd=hrd,
+        hard_within_threshold_pct=float(np.mean(finite <= hard_threshold) * 100) if finite.size else float("nan"),
+        hard_percentile_value=float(np.percentile(finite, HARD_PERCENTILE)) if finite.size else float("nan"),
+        thompson_howarth=thompson_howarth(x, y, group_size) if x.size >= 2 * group_size else None,
+    )
+
+
+def bootstrap_regression(x, y, n_resamples=DEFAULT_RESAMPLES, confidence=0.95,
+                         method=REGRESSION_RMA, seed=None, batch_size=None, progress=None):
+    """Intervalles de confiance bootstrap (percentiles) de la pente et de l'ordonnée.
+
+    Chaque lot tire une matrice d'indices (lot × n), convertie en nombre de
+    tirages de chaque paire ; les sommes x, y, x², y² et xy de tout le lot
+    sont le produit de ces comptes par les termes précalculés des paires.
+    Les valeurs sont centrées au préalable pour limiter les erreurs
+    d'arrondi. Le coût reste proportionnel à ``n_resamples * n`` tirages :
+    de l'ordre d'une seconde par millier de rééchantillonnages de 100 000
+    paires.
+    ``progress(fait, total)`` est appelé après chaque lot.
+    """
+    x = as_float_array(x)
+    y = as_float_array(y)
+    n = x.size
+    if n < 3:
+        raise ValueError("Au moins 3 paires sont nécessaires pour le bootstrap.")
+    if batch_size is None:
+        batch_size = max(1, BOOTSTRAP_BATCH_ELEMENTS // n)
+
+    x_mean, y_mean = x.mean(), y.mean()
+    xc = x - x_mean
+    yc = y - y_mean
+    # Termes de chaque paire : une ligne de comptes × ces colonnes donne les sommes d'un tirage
+    terms = np.column_stack((xc, yc, xc * xc, yc * yc, xc * yc))
+    rng = np.random.default_rng(seed)
+    index_dtype = np.int32 if n < np.iinfo(np.int32).max else np.int64
+
+    slopes = np.empty(n_resamples)
+    intercepts = np.empty(n_resamples)
+    for start in range(0, n_resamples, batch_size):
+        size = min(batch_size, n_resamples - start)
+        indices = rng.integers(0, n, size=(size, n), dtype=index_dtype)
+        # Décalage de chaque ligne : un seul comptage pour tout le lot
+        cells = (indices + (np.arange(size, dtype=np.intp) * n)[:, None]).ravel()
+        counts = np.bincount(cells, minlength=size * n).reshape(size, n)
+        sx, sy, sx2, sy2, sxy = (counts @ terms).T
+        mx = sx / n
+        my = sy / n
+        sxx = sx2 - n * mx * mx
+        syy = sy2 - n * my * my
+        sxy = sxy - n * mx * my
+        slope = regression_slope(sxx, syy, sxy, method)
+        slopes[start:start + size] = slope
+        intercepts[start:start + size] = (y_mean + my) - slope * (x_mean + mx)
+        if progress is not None:
+            progress(start + size, n_resamples)
+
+    tail = (1 - confidence) / 2 * 100
+    bounds = [tail, 100 - tail]
+    return BootstrapResult(
+        method=method,
+        confidence=confidence,
+        slopes=slopes,
+        intercepts=intercepts,
+        slope_interval=tuple(np.nanpercentile(slopes, bounds)),
+        intercept_interval=tuple(np.nanpercentile(intercepts, bounds)),
+    )
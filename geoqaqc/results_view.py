@@ -0,0 +1,65 @@
+"""Vue paginée des résultats détaillés.
+
+Le filtrage et le tri sont faits côté serveur ; seule la page demandée
+(au plus ``MAX_PAGE_SIZE`` lignes) est stylée et envoyée au navigateur. La
+coloration est calculée à partir d'un masque booléen, pas cellule par
+cellule.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = [50, 100, 500, 1000]
+MAX_PAGE_SIZE = max(PAGE_SIZES)
+
+HIGHLIGHT_CSS = 'background-color: #ffcccc'
+
+
+@dataclass
+class ResultsPage:
+    frame: pd.DataFrame
+    flagged: np.ndarray
+    n_rows: int
+    n_pages: int
+    page: int
+
+
+def paginate(frame, flagged, only_flagged=False, sort_column=None, ascending=True,
+             page=1, page_size=PAGE_SIZES[0]):
+    """Filtre, trie puis découpe ``frame`` ; ``flagged`` est aligné ligne à ligne."""
+    page_size = min(int(page_size), MAX_PAGE_SIZE)
+    flagged = np.asarray(flagged, dtype=bool)
+
+    positions = np.flatnonzero(flagged) if only_flagged else np.arange(len(frame))
+    if sort_column is not None:
+        values = frame[sort_column].iloc[positions].reset_index(drop=True)
+        order = values.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+        positions = positions[order]
+
+    n_rows = positions.size
+    n_pages = max(1, -(-n_rows // page_size))
+    page = min(max(1, int(page)), n_pages)
+    selected = positions[(page - 1) * page_size:page * page_size]
+    return ResultsPage(
+        frame=frame.iloc[selected],
+        flagged=flagged[selected],
+        n_rows=n_rows,
+        n_pages=n_pages,
+        page=page,
+    )
+
+
+def highlight_styles(frame, flagged, column):
+    """Tableau de styles CSS : ``column`` colorée sur les lignes signalées."""
+    styles = pd.DataFrame('', index=frame.index, columns=frame.columns)
+    if column in styles.columns:
+        styles[column] = np.where(flagged, HIGHLIGHT_CSS, '')
+    return styles
+
+
+def style_page(results_page, column):
+    return results_page.frame.style.apply(
+        lambda frame: highlight_styles(frame, results_page.flagged, column),
+        axis=None
+    )
@@ -0,0 +1,182 @@
+"""Jeux de données QAQC synthétiques et reproductibles.
+
+Générateurs vectorisés, utilisables de 1e3 à 1e7 lignes :
+
+- résultats de CRM avec dérive le long de la séquence et valeurs aberrantes
+  (échanges d'échantillons, erreurs de saisie), avec la table de certificats
+  correspondante ;
+- blancs avec valeurs censurées (``<0.005``) et contaminations occasionnelles ;
+- paires de duplicatas dont la précision dépend de la teneur
+  (sigma(c) = sigma0 + k * c, le modèle de Thompson-Howarth) ;
+- export de laboratoire large (une colonne par élément) où CRM, blancs et
+  duplicatas sont insérés parmi les échantillons de routine.
+
+Une même graine donne toujours les mêmes données.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_SEED = 0
+
+ELEMENTS = ["Au_ppm", "Cu_pct", "Ag_ppm"]
+
+# CRM fictifs : valeur certifiée et écart-type par élément
+CERTIFIED_VALUES = {
+    "CRM-LOW": {"Au_ppm": (0.52, 0.02), "Cu_pct": (0.21, 0.008), "Ag_ppm": (1.8, 0.12)},
+    "CRM-MED": {"Au_ppm": (1.43, 0.05), "Cu_pct": (0.64, 0.02), "Ag_ppm": (6.2, 0.3)},
+    "CRM-HIGH": {"Au_ppm": (7.85, 0.21), "Cu_pct": (2.31, 0.06), "Ag_ppm": (24.5, 0.9)},
+    "CRM-OXIDE": {"Au_ppm": (0.98, 0.04), "Cu_pct": (0.12, 0.006), "Ag_ppm": (3.1, 0.2)},
+}
+METHOD = "FA-AAS"
+
+DETECTION_LIMIT = 0.005
+BATCH_SIZE = 50
+
+# Export multi-élément : les éléments certifiés, puis des éléments sans certificat
+WIDE_ELEMENTS = ELEMENTS + ["As_ppm", "Bi_ppm", "Co_ppm", "Cr_ppm", "Mo_ppm", "Ni_ppm", "Pb_ppm", "Sb_ppm", "W_ppm", "Zn_ppm"]
+ROUTINE_LABEL = "ECH"
+BLANK_LABEL = "BLANK"
+DUPLICATE_LABEL = "DUP"
+
+
+def certificate_table():
+    """Table des certificats au format de ``CertificateStore.from_csv``."""
+    return pd.DataFrame(
+        [
+            (crm_id, element, METHOD, value, std_dev)
+            for crm_id, elements in CERTIFIED_VALUES.items()
+            for element, (value, std_dev) in elements.items()
+        ],
+        columns=["crm_id", "element", "method", "value", "std_dev"],
+    )
+
+
+def _sample_ids(prefix, n):
+    return np.char.add(prefix, np.char.zfill(np.arange(n).astype(str), 7))
+
+
+def crm_results(n, seed=DEFAULT_SEED, drift_pct=3.0, outlier_rate=0.01):
+    """Résultats de CRM : dérive linéaire de ``drift_pct`` % sur la séquence.
+
+    Une fraction ``outlier_rate`` des résultats est remplacée par la valeur
+    d'un autre CRM (échange d'échantillons) ou multipliée par 10 (erreur
+    d'unité).
+    """
+    rng = np.random.default_rng(seed)
+    crm_ids = list(CERTIFIED_VALUES)
+    codes = rng.integers(0, len(crm_ids), n)
+    position = np.arange(n) / max(n - 1, 1)
+
+    frame = {
+        "sample_id": _sample_ids("CRM", n),
+        "crm_id": pd.Categorical.from_codes(codes, categories=crm_ids),
+        "sequence": np.arange(1, n + 1),
+        "batch": (np.arange(n) // BATCH_SIZE) + 1,
+    }
+    for element in ELEMENTS:
+        value = np.array([CERTIFIED_VALUES[crm_id][element][0] for crm_id in crm_ids])
+        std_dev = np.array([CERTIFIED_VALUES[crm_id][element][1] for crm_id in crm_ids])
+        results = value[codes] * (1 + drift_pct / 100 * position) + rng.normal(0, 1, n) * std_dev[codes]
+
+        outliers = rng.random(n) < outlier_rate
+        swapped = outliers & (rng.random(n) < 0.5)
+        results[swapped] = value[(codes[swapped] + 1) % len(crm_ids)]
+        results[outliers & ~swapped] *= 10
+        frame[element] = np.round(np.maximum(results, 0), 4)
+    return pd.DataFrame(frame)
+
+
+def blank_results(n, seed=DEFAULT_SEED, detection_limit=DETECTION_LIMIT, contamination_rate=0.005):
+    """Blancs en texte, comme dans un certificat : ``<0.005`` sous la limite de détection.
+
+    Les teneurs suivent une loi lognormale centrée près de la limite de
+    détection ; une fraction ``contamination_rate`` est contaminée.
+    """
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(np.log(detection_limit * 0.8), 0.6, n)
+    contaminated = rng.random(n) < contamination_rate
+    values[contaminated] *= rng.uniform(5, 50, int(contaminated.sum()))
+
+    # Arrondies à 4 décimales, les teneurs se répètent : seules les valeurs
+    # distinctes sont converties en texte
+    text = np.full(n, f"<{detection_limit:g}", dtype=object)
+    detected = values >= detection_limit
+    uniques, codes = np.unique(np.round(values[detected], 4), return_inverse=True)
+    text[detected] = uniques.astype(str).astype(object)[codes]
+    return pd.DataFrame({
+        "sample_id": _sample_ids("BLK", n),
+        "batch": (np.arange(n) // BATCH_SIZE) + 1,
+        "Au_ppm": text,
+    })
+
+
+def duplicate_pairs(n, seed=DEFAULT_SEED, sigma0=0.01, precision_pct=15.0, outlier_rate=0.005):
+    """Paires original / duplicata avec sigma(c) = sigma0 + k * c.
+
+    ``precision_pct`` est la précision relative à 2 sigma aux fortes
+    teneurs (k = precision_pct / 200).
+    """
+    rng = np.random.default_rng(seed)
+    grade = rng.lognormal(np.log(0.5), 1.2, n)
+    sigma = sigma0 + precision_pct / 200 * grade
+    original = grade + rng.normal(0, 1, n) * sigma
+    duplicate = grade + rng.normal(0, 1, n) * sigma
+
+    outliers = rng.random(n) < outlier_rate
+    duplicate[outliers] *= rng.uniform(1.5, 3, int(outliers.sum()))
+    return pd.DataFrame({
+        "sample_id": _sample_ids("DUP", n),
+        "original": np.round(np.maximum(original, 0), 4),
+        "duplicate": np.round(np.maximum(duplicate, 0), 4),
+    })
+
+
+def assay_table(n, seed=DEFAULT_SEED, elements=WIDE_ELEMENTS, control_rate=0.05, duplicate_precision_pct=10.0):
+    """Export large : une ligne par échantillon, une colonne par élément.
+
+    La colonne ``type`` désigne les contrôles (identifiant de CRM,
+    ``BLANK``, ``DUP``), insérés chacun à la fréquence ``control_rate``.
+    Un duplicata suit toujours un échantillon de routine, son original,
+    rappelé dans ``parent_id``. Les blancs sous la limite de détection
+    sont écrits ``<0.005``.
+    """
+    rng = np.random.default_rng(seed)
+    crm_ids = list(CERTIFIED_VALUES)
+    labels = np.array([ROUTINE_LABEL, BLANK_LABEL, DUPLICATE_LABEL] + crm_ids, dtype=object)
+    weights = [1 - 3 * control_rate, control_rate, control_rate] + [control_rate / len(crm_ids)] * len(crm_ids)
+    codes = rng.choice(len(labels), n, p=weights)
+    # Pas de duplicata en tête de fichier ni après un contrôle
+    codes[0] = 0
+    codes[1:][(codes[1:] == 2) & (codes[:-1] != 0)] = 0
+
+    blank = codes == 1
+    duplicates = np.flatnonzero(codes == 2)
+    crm = codes >= 3
+    crm_codes = codes[crm] - 3
+
+    ids = _sample_ids("ECH", n)
+    parents = np.full(n, None, dtype=object)
+    parents[duplicates] = ids[duplicates - 1]
+    frame = {
+        "sample_id": ids,
+        "type": labels[codes],
+        "parent_id": parents,
+        "batch": (np.arange(n) // BATCH_SIZE) + 1,
+    }
+    for element in elements:
+        values = rng.lognormal(np.log(0.5), 1.0, n)
+        if element in CERTIFIED_VALUES[crm_ids[0]]:
+            value = np.array([CERTIFIED_VALUES[crm_id][element][0] for crm_id in crm_ids])
+            std_dev = np.array([CERTIFIED_VALUES[crm_id][element][1] for crm_id in crm_ids])
+            values[crm] = value[crm_codes] + rng.normal(0, 1, crm_codes.size) * std_dev[crm_codes]
+        values[blank] = rng.lognormal(np.log(DETECTION_LIMIT * 0.8), 0.6, int(blank.sum()))
+        values[duplicates] = values[duplicates - 1] * rng.normal(1, duplicate_precision_pct / 100, duplicates.size)
+        values = np.round(np.maximum(values, 0), 4)
+
+        # Colonnes en texte, comme lues dans l'export : seules les valeurs
+        # distinctes sont converties
+        uniques, inverse = np.unique(values, return_inverse=True)
+        text = uniques.astype(str).astype(object)[inverse]
+        text[blank & (values < DETECTION_LIMIT)] = f"<{DETECTION_LIMIT:g}"
+        frame[element] = text
+    return pd.DataFrame(frame)
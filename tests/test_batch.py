@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from geoqaqc import batch
+from geoqaqc.certificates import CertificateStore
+from geoqaqc.defaults import TOLERANCE_PERCENT, TOLERANCE_STDDEV
+from geoqaqc.engine import STATUS_OK
+
+STORE = CertificateStore(pd.DataFrame({
+    "crm_id": ["A", "A", "B"],
+    "element": ["Au", "Cu", "Au"],
+    "value": [1.0, 10.0, 2.0],
+    "std_dev": [0.1, 1.0, 0.2],
+}))
+
+FRAME = pd.DataFrame({
+    "crm": ["A", "A", " A ", "B", "B", "C", None],
+    # <0.5 est évaluée à sa limite ; C est sans certificat, la dernière ligne sans CRM
+    "Au": ["0.9", "1.25", "<0.5", "2.1", "2.3", "1", "7"],
+    "Cu": [10.0, 12.5, 9.0, 5.0, np.nan, 1.0, 7.0],
+})
+
+
+def test_batch_hand_computed():
+    result = batch.evaluate_crm_batch(FRAME, "crm", ["Au", "Cu"], STORE, TOLERANCE_STDDEV, 2)
+    assert result.count.index.tolist() == ["A", "B", "C"]
+    # A : Au dans [0.8, 1.2], Cu dans [8, 12] ; B : Au dans [1.6, 2.4]
+    np.testing.assert_allclose(result.lower_limit.to_numpy(), [[0.8, 8], [1.6, np.nan], [np.nan, np.nan]])
+    np.testing.assert_allclose(result.upper_limit.to_numpy(), [[1.2, 12], [2.4, np.nan], [np.nan, np.nan]])
+    assert result.count.to_numpy().tolist() == [[3, 3], [2, 1], [1, 1]]
+    assert result.failed.to_numpy().tolist() == [[2, 1], [0, 0], [0, 0]]
+    np.testing.assert_allclose(result.mean.to_numpy(), [[2.65 / 3, 31.5 / 3], [2.2, 5], [1, 1]])
+    np.testing.assert_allclose(result.failure_rate.to_numpy(), [[2 / 3, 1 / 3], [0, np.nan], [np.nan, np.nan]])
+    assert result.status.to_numpy().tolist() == [
+        [batch.STATUS_FAILED, batch.STATUS_FAILED],
+        [STATUS_OK, batch.STATUS_NO_CERTIFICATE],
+        [batch.STATUS_NO_CERTIFICATE, batch.STATUS_NO_CERTIFICATE],
+    ]
+
+
+def test_batch_percent_tolerance():
+    result = batch.evaluate_crm_batch(FRAME, "crm", ["Au"], STORE, TOLERANCE_PERCENT, 10)
+    # A : [0.9, 1.1], la borne elle-même est acceptée
+    assert result.lower_limit.loc["A", "Au"] == pytest.approx(0.9)
+    assert result.failed.loc["A", "Au"] == 2
+    # B : [1.8, 2.2]
+    assert result.failed.loc["B", "Au"] == 1
+
+
+def test_row_flags_agree_with_counts():
+    result = batch.evaluate_crm_batch(FRAME, "crm", ["Au", "Cu"], STORE, TOLERANCE_STDDEV, 2)
+    evaluated, failed = batch.row_flags(FRAME, "crm", ["Au", "Cu"], result)
+    assert evaluated.tolist() == [[True, True], [True, True], [True, True], [True, False], [True, False],
+                                  [False, False], [False, False]]
+    assert failed.tolist() == [[False, False], [True, True], [True, False], [False, False], [False, False],
+                               [False, False], [False, False]]
+    evaluated_pairs = result.lower_limit.notna()
+    assert failed.sum(axis=0).tolist() == result.failed.sum().tolist()
+    assert evaluated.sum(axis=0).tolist() == result.count.where(evaluated_pairs, 0).sum().tolist()
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from geoqaqc import carryover
+from geoqaqc.carryover import KIND_BLANK, KIND_CRM, KIND_ROUTINE
+
+R, B, C = KIND_ROUTINE, KIND_BLANK, KIND_CRM
+
+# Routine 1, routine 100, blanc 5, routine 1, blanc 0.1, CRM 0.5
+GRADES = [1.0, 100.0, 5.0, 1.0, 0.1, 0.5]
+KINDS = [R, R, B, R, B, C]
+
+
+def test_blank_after_high_grade_is_contaminated():
+    result = carryover.detect_carryover(GRADES, KINDS, window=2, grade_threshold=50, blank_limit=1)
+    np.testing.assert_array_equal(result.positions, [2, 4, 5])
+    np.testing.assert_array_equal(result.previous_grade, [100, 1, 1])
+    np.testing.assert_array_equal(result.max_grade, [100, 100, 100])
+    np.testing.assert_array_equal(result.max_lag, [1, 2, 2])
+    assert result.follows_high_grade.tolist() == [True, True, False]
+    # Le second blanc suit aussi la forte teneur, mais reste sous la limite des blancs
+    assert result.contaminated.tolist() == [True, False, False]
+    np.testing.assert_allclose(result.carryover_pct, [5, 0.1, 0.5])
+
+
+def test_window_length():
+    result = carryover.detect_carryover(GRADES, KINDS, window=1, grade_threshold=50, blank_limit=0.05)
+    np.testing.assert_array_equal(result.max_grade, [100, 1, 1])
+    assert result.contaminated.tolist() == [True, False, False]
+
+
+def test_window_stops_at_batch_boundary():
+    result = carryover.detect_carryover(GRADES, KINDS, window=2, grade_threshold=50, blank_limit=0.05,
+                                        batches=["a", "a", "a", "b", "b", "b"])
+    np.testing.assert_array_equal(result.max_grade, [100, 1, 1])
+    assert result.contaminated.tolist() == [True, False, False]
+
+
+def test_first_control_without_previous_routine():
+    result = carryover.detect_carryover([0.2, 3.0], [B, R], window=3, grade_threshold=1, blank_limit=0.1)
+    assert np.isnan(result.max_grade[0])
+    assert result.max_lag.tolist() == [0]
+    assert not result.contaminated.any()
+
+
+def test_censored_blank_never_contaminated():
+    censored_left = [False, False, True, False, False, False]
+    result = carryover.detect_carryover(GRADES, KINDS, window=2, grade_threshold=50, blank_limit=1,
+                                        censored_left=censored_left)
+    assert result.follows_high_grade[0]
+    assert not result.contaminated.any()
+
+
+def test_sequence_order_and_original_positions():
+    # Mêmes lignes, mélangées dans le fichier ; la séquence rétablit l'ordre d'analyse
+    shuffle = np.array([4, 0, 5, 2, 1, 3])
+    result = carryover.detect_carryover(np.array(GRADES)[shuffle], np.array(KINDS)[shuffle], window=2,
+                                        grade_threshold=50, blank_limit=1, sequence=shuffle.astype(float))
+    np.testing.assert_array_equal(shuffle[result.positions], [2, 4, 5])
+    assert result.contaminated.tolist() == [True, False, False]
+
+
+def test_default_limits():
+    grades = [1, 2, 3, 4, 5, 0.1, 0.1, 0.4]
+    kinds = [R, R, R, R, R, B, B, B]
+    result = carryover.detect_carryover(grades, kinds, window=1)
+    assert result.grade_threshold == pytest.approx(np.percentile([1, 2, 3, 4, 5], 95))
+    assert result.blank_limit == pytest.approx(np.mean([0.1, 0.1, 0.4]) + 3 * np.std([0.1, 0.1, 0.4]))
+
+
+def test_sample_kinds():
+    kinds = carryover.sample_kinds(["ECH", " BLANK", "OREAS-45", None, "DUP"], ["BLANK"], ["OREAS-45"])
+    assert kinds.tolist() == [R, B, C, R, R]
+
+
+def test_window_must_be_positive():
+    with pytest.raises(ValueError):
+        carryover.detect_carryover(GRADES, KINDS, window=0)
@@ -0,0 +1,123 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from geoqaqc import censored
+from geoqaqc.censored import CENSORING_LEFT, CENSORING_NONE, CENSORING_RIGHT
+
+
+def test_parse_censored_text():
+    column = pd.Series(["0.12", "<0.005", " < 0,005", "<=0.01", ">10", "BDL", "n.d.", "illisible", None, "-0.3"])
+    parsed = censored.parse_censored(column, default_limit=0.002)
+    np.testing.assert_array_equal(
+        parsed.values, [0.12, 0.005, 0.005, 0.01, 10, 0.002, 0.002, np.nan, np.nan, -0.3]
+    )
+    assert parsed.censoring.tolist() == [
+        CENSORING_NONE, CENSORING_LEFT, CENSORING_LEFT, CENSORING_LEFT, CENSORING_RIGHT,
+        CENSORING_LEFT, CENSORING_LEFT, CENSORING_NONE, CENSORING_NONE, CENSORING_NONE,
+    ]
+    assert parsed.n_censored == 6
+
+
+def test_detection_label_without_default_limit():
+    parsed = censored.parse_censored(pd.Series(["BDL", "0.5"]))
+    assert np.isnan(parsed.values[0])
+    assert parsed.censoring.tolist() == [CENSORING_LEFT, CENSORING_NONE]
+
+
+def test_negative_as_censored():
+    parsed = censored.parse_censored(pd.Series([-0.005, 0.2, -1.0]), negative_as_censored=True)
+    np.testing.assert_array_equal(parsed.values, [0.005, 0.2, 1.0])
+    assert parsed.censoring.tolist() == [CENSORING_LEFT, CENSORING_NONE, CENSORING_LEFT]
+
+
+def test_block_matches_column_by_column():
+    frame = pd.DataFrame({
+        "Au": ["<0.005", "0.3", "BDL", ">5"],
+        "Cu": [0.1, np.nan, 0.3, 0.4],
+        "Ag": ["1,5", "<0.005", "x", "-2"],
+    })
+    block = censored.parse_censored_block(frame, ["Au", "Cu", "Ag"], default_limit=0.001, negative_as_censored=True)
+    for i, column in enumerate(["Au", "Cu", "Ag"]):
+        parsed = censored.parse_censored(frame[column], default_limit=0.001, negative_as_censored=True)
+        np.testing.assert_array_equal(block.values[:, i], parsed.values)
+        np.testing.assert_array_equal(block.censoring[:, i], parsed.censoring)
+
+
+def test_substitution_methods():
+    parsed = censored.parse_censored(pd.Series(["<0.01", "0.04", ">2", "x"]))
+    np.testing.assert_array_equal(
+        censored.substitute(parsed, censored.SUBSTITUTE_HALF_LIMIT), [0.005, 0.04, 2, np.nan]
+    )
+    np.testing.assert_array_equal(censored.substitute(parsed, censored.SUBSTITUTE_LIMIT), [0.01, 0.04, 2, np.nan])
+    np.testing.assert_array_equal(
+        censored.substitute(parsed, censored.SUBSTITUTE_EXCLUDE), [np.nan, 0.04, np.nan, np.nan]
+    )
+
+
+def test_kaplan_meier_hand_computed():
+    # 1, <2, 3, 4 : la masse de <2 est reportée sur la seule valeur inférieure (1)
+    parsed = censored.parse_censored(pd.Series(["1", "<2", "3", "4"]))
+    mean, std_dev = censored.kaplan_meier_stats(parsed)
+    assert mean == pytest.approx(0.5 * 1 + 0.25 * 3 + 0.25 * 4)
+    assert std_dev == pytest.approx(np.sqrt(0.5 * 1.25 ** 2 + 0.25 * 0.75 ** 2 + 0.25 * 1.75 ** 2))
+
+
+def test_kaplan_meier_without_censoring_is_plain_mean():
+    values = [0.3, 0.1, 0.7, 0.7, 0.2]
+    mean, std_dev = censored.kaplan_meier_stats(censored.parse_censored(pd.Series(values)))
+    assert mean == pytest.approx(np.mean(values))
+    assert std_dev == pytest.approx(np.std(values))
+
+
+def test_kaplan_meier_all_censored():
+    mean, std_dev = censored.kaplan_meier_stats(censored.parse_censored(pd.Series(["<1", "<2"])))
+    assert np.isnan(mean) and np.isnan(std_dev)
+
+
+def test_ros_single_detection_limit_hand_computed():
+    parsed = censored.parse_censored(pd.Series(["<1", "2", "<1", "3", "4", "5"]))
+    # pe = 4/6 : censurées à (1 - pe) i/3, détectées à (1 - pe) + pe i/5
+    censored_positions = [1 / 9, 2 / 9]
+    detected_positions = [1 / 3 + 2 / 3 * i / 5 for i in range(1, 5)]
+    z = [NormalDist().inv_cdf(p) for p in detected_positions]
+    slope, intercept = np.polyfit(z, np.log([2, 3, 4, 5]), 1)
+    expected = np.exp(intercept + slope * np.array([NormalDist().inv_cdf(p) for p in censored_positions]))
+
+    imputed = censored.ros_impute(parsed)
+    np.testing.assert_allclose(imputed[[0, 2]], expected, rtol=1e-7)
+    np.testing.assert_array_equal(imputed[[1, 3, 4, 5]], [2, 3, 4, 5])
+
+
+def test_ros_several_detection_limits_hand_computed():
+    parsed = censored.parse_censored(pd.Series(["<0.5", "0.6", "<1", "0.9", "1.4", "<0.5", "2.2", "3.1", "<1"]))
+    # pe(1) = 3/9 = 1/3, pe(0.5) = 1/3 + 2/4 (1 - 1/3) = 2/3
+    positions = {
+        0.6: 1 / 3 + 1 / 9, 0.9: 1 / 3 + 2 / 9,
+        1.4: 2 / 3 + 1 / 12, 2.2: 2 / 3 + 2 / 12, 3.1: 2 / 3 + 3 / 12,
+    }
+    censored_positions = [1 / 9, 2 / 9, 2 / 9, 4 / 9]
+    z = [NormalDist().inv_cdf(p) for p in positions.values()]
+    slope, intercept = np.polyfit(z, np.log(list(positions)), 1)
+    expected = np.exp(intercept + slope * np.array([NormalDist().inv_cdf(p) for p in censored_positions]))
+
+    imputed = censored.ros_impute(parsed)
+    np.testing.assert_allclose(imputed[[0, 5, 2, 8]], expected, rtol=1e-7)
+    np.testing.assert_array_equal(imputed[~parsed.left], parsed.values[~parsed.left])
+
+
+def test_ros_requires_three_detected_values():
+    with pytest.raises(ValueError):
+        censored.ros_impute(censored.parse_censored(pd.Series(["<1", "2", "3"])))
+
+
+def test_censored_blanks_hand_computed():
+    parsed = censored.parse_censored(pd.Series(["<0.01", "0.02", "0.03", "0.5"]))
+    kept, values, result = censored.evaluate_censored_blanks(parsed, censored.SUBSTITUTE_HALF_LIMIT, k=1)
+    expected = np.array([0.005, 0.02, 0.03, 0.5])
+    assert kept.all()
+    np.testing.assert_array_equal(values, expected)
+    assert result.lod == pytest.approx(expected.mean() + expected.std())
+    assert result.elevated.tolist() == [False, False, False, True]
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from geoqaqc import control_rules
+
+
+def test_rules_on_hand_computed_series():
+    # target 10, sigma 1 : z = 0, 3.5, 2.5, 2.5, -2.5
+    state = control_rules.new_state(10, 1)
+    state, flags = control_rules.update_state(state, [10, 13.5, 12.5, 12.5, 7.5])
+
+    np.testing.assert_array_equal(flags["Z-score"], [0, 3.5, 2.5, 2.5, -2.5])
+    assert flags["1-3s"].tolist() == [False, True, False, False, False]
+    assert flags["2-2s"].tolist() == [False, False, True, True, False]
+    assert flags["R-4s"].tolist() == [False, False, False, False, True]
+    assert flags["4-1s"].tolist() == [False, False, False, False, False]
+
+    # k = 0.5 : C+ = max(0, C + z - 0.5), C- = max(0, C - z - 0.5)
+    np.testing.assert_allclose(flags["CUSUM+"], [0, 3, 5, 7, 4])
+    np.testing.assert_allclose(flags["CUSUM-"], [0, 0, 0, 0, 2])
+    assert flags["Alerte CUSUM"].tolist() == [False, False, False, True, False]
+
+    # lambda = 0.2 : e_i = 0.8 e_{i-1} + 0.2 z_i ; limite 3 sqrt(0.2/1.8 (1 - 0.8^2i))
+    np.testing.assert_allclose(flags["EWMA"], [0, 0.7, 1.06, 1.348, 0.5784])
+    assert flags["Alerte EWMA"].tolist() == [False, False, True, True, False]
+
+    assert state.count == 5
+    assert state.mean == pytest.approx(11.2)
+    assert state.std_dev == pytest.approx(np.std([10, 13.5, 12.5, 12.5, 7.5]))
+    assert state.cusum_pos == pytest.approx(4)
+    assert state.cusum_neg == pytest.approx(2)
+
+
+def test_westgard_windows_span_batches():
+    state = control_rules.new_state(0, 1)
+    state, flags = control_rules.update_state(state, [0.5, 1.5, 1.5, 2.5])
+    assert flags["4-1s"].tolist() == [False, False, False, False]
+    state, flags = control_rules.update_state(state, [2.2, -2.5])
+    # 4-1s et 2-2s avec les derniers points du lot précédent
+    assert flags["4-1s"].tolist() == [True, False]
+    assert flags["2-2s"].tolist() == [True, False]
+    assert flags["R-4s"].tolist() == [False, True]
+
+
+def test_incremental_batches_match_one_shot_run():
+    rng = np.random.default_rng(3)
+    values = rng.normal(100.4, 2.0, 250)
+    one_shot_state, one_shot = control_rules.update_state(control_rules.new_state(100, 2), values)
+
+    state = control_rules.new_state(100, 2)
+    parts = []
+    for batch in np.split(values, [7, 8, 60, 61, 200]):
+        state, flags = control_rules.update_state(state, batch, key=control_rules.batch_key(batch))
+        parts.append(flags)
+    incremental = pd.concat(parts, ignore_index=True)
+
+    pd.testing.assert_frame_equal(incremental, one_shot, check_exact=False, rtol=1e-12, atol=1e-12)
+    assert state.count == one_shot_state.count == values.size
+    # Fusion de Chan : mêmes moments qu'en une passe
+    assert state.mean == pytest.approx(values.mean(), rel=1e-13)
+    assert state.m2 == pytest.approx(((values - values.mean()) ** 2).sum(), rel=1e-10)
+    assert state.std_dev == pytest.approx(np.std(values), rel=1e-10)
+    assert state.cusum_pos == pytest.approx(one_shot_state.cusum_pos)
+    assert state.cusum_neg == pytest.approx(one_shot_state.cusum_neg)
+    assert state.ewma == pytest.approx(one_shot_state.ewma)
+    assert state.recent_z == pytest.approx(one_shot_state.recent_z)
+    assert len(state.batches) == 6
+
+
+def test_empty_batch_leaves_state_unchanged():
+    state, _ = control_rules.update_state(control_rules.new_state(1, 0.1), [1.05, 0.92])
+    same, flags = control_rules.update_state(state, [])
+    assert flags.empty
+    assert same == state
+
+
+def test_batch_integrated_once():
+    state, _ = control_rules.update_state(control_rules.new_state(1, 0.1), [1.0], key="lot-1")
+    with pytest.raises(ValueError):
+        control_rules.update_state(state, [1.1], key="lot-1")
+
+
+def test_new_state_requires_positive_sigma():
+    with pytest.raises(ValueError):
+        control_rules.new_state(1, 0)
+
+
+def test_store_persists_state_between_batches(tmp_path):
+    store = control_rules.ControlStateStore(str(tmp_path))
+    store.append("CRM-A", "Au", [1.0, 1.2], target=1, sigma=0.1)
+    state, _ = store.append("CRM-A", "Au", [0.8], target=5, sigma=9)
+    # La cible et l'écart-type de la création sont conservés
+    assert (state.target, state.sigma) == (1, 0.1)
+    assert state.count == 3
+    assert state.mean == pytest.approx(1.0)
+    assert control_rules.ControlStateStore(str(tmp_path)).load("CRM-A", "Au") == state
+    with pytest.raises(ValueError):
+        store.append("CRM-A", "Au", [0.8], target=1, sigma=0.1)
@@ -0,0 +1,92 @@
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+from geoqaqc import ingestion
+
+ENGINES = ["c", pytest.param("pyarrow", marks=pytest.mark.skipif(ingestion.pa_csv is None, reason="pyarrow absent"))]
+
+
+def csv_bytes(values):
+    return ("v\n" + "\n".join(values) + "\n").encode("utf-8")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_load_columns_keeps_float32_when_exact(engine):
+    frame = ingestion.load_columns(BytesIO(csv_bytes(["0.1", "0.25", "1200"])), ",", ["v"], ["v"], engine=engine)
+    assert frame["v"].dtype == np.float32
+
+
+def test_load_columns_upcast_keeps_earlier_chunks_exact():
+    # Les deux premiers blocs tiennent en float32, le troisième non
+    content = csv_bytes(["0.1", "0.2", "0.3", "0.7", "123456789.123"])
+    frame = ingestion.load_columns(BytesIO(content), ",", ["v"], ["v"], chunksize=2, engine="c")
+    assert frame["v"].dtype == np.float64
+    assert frame["v"].tolist() == [0.1, 0.2, 0.3, 0.7, 123456789.123]
+
+
+@pytest.mark.skipif(ingestion.pa_csv is None, reason="pyarrow absent")
+def test_load_columns_upcast_across_pyarrow_blocks():
+    # Plus d'un bloc pyarrow (1 Mo au minimum) avant la valeur à 12 chiffres
+    values = [f"{i % 1000 / 10:g}" for i in range(300_000)] + ["123456789.123"]
+    frame = ingestion.load_columns(BytesIO(csv_bytes(values)), ",", ["v"], ["v"], chunksize=1000, engine="pyarrow")
+    assert frame["v"].dtype == np.float64
+    np.testing.assert_array_equal(frame["v"].to_numpy(), np.array(values, dtype=np.float64))
+
+
+def test_exact_float64_restores_decimal_values():
+    values = np.array([0.1, -0.005, 123456.0, 1.5e-7, 0.0, np.nan, 987654e10])
+    assert ingestion.fits_float32(values)
+    restored = ingestion.exact_float64(values.astype(np.float32))
+    np.testing.assert_array_equal(restored, values)
+
+
+def test_file_content_key_matches_in_memory_key(tmp_path):
+    content = b"crm,Au\nOREAS-45,0.52\n" * 1000
+    path = tmp_path / "lot.csv"
+    path.write_bytes(content)
+    copy = tmp_path / "copie.csv"
+    copy.write_bytes(content)
+    key = ingestion.file_content_key(str(path), ",", block_size=4096)
+    assert key == ingestion.content_key(content, ",")
+    assert key == ingestion.file_content_key(str(copy), ",")
+    assert key != ingestion.file_content_key(str(path), ";")
+
+
+def test_load_columns_non_numeric_text_is_nan():
+    frame = ingestion.load_columns(BytesIO(b"id,v\na,0.5\nb,<0.005\nc,\n"), ",", ["id", "v"], ["v"], engine="c")
+    assert frame["id"].tolist() == ["a", "b", "c"]
+    np.testing.assert_array_equal(frame["v"].to_numpy(), np.array([0.5, np.nan, np.nan], dtype=np.float32))
+
+
+def test_ingestion_cache_reuses_parsed_frame():
+    cache = ingestion.IngestionCache(max_entries=2)
+    key, frame = cache.load(b"a;b\n1;2\n", ";")
+    assert key == ingestion.content_key(b"a;b\n1;2\n", ";")
+    assert frame.columns.tolist() == ["a", "b"]
+    assert cache.load("a;b\n1;2\n", ";")[1] is frame
+    cache.load(b"a\n1\n", ";")
+    cache.load(b"a\n2\n", ";")
+    # Entrée la plus ancienne évincée
+    assert cache.load(b"a;b\n1;2\n", ";")[1] is not frame
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_ingestion_cache_skips_frames_over_budget():
+    cache = ingestion.IngestionCache(max_bytes=10)
+    frame = cache.get_or_parse(b"a\n1\n2\n", ",")
+    assert cache.get_or_parse(b"a\n1\n2\n", ",") is not frame
+    assert cache.hits == 0
+
+
+def test_streaming_source_loads_selected_columns(tmp_path):
+    content = b"crm;Au;Cu\nA;0.5;1\nB;<0.01;2\n"
+    path = tmp_path / "lot.csv"
+    path.write_bytes(content)
+    source = ingestion.StreamingSource(str(path), ";")
+    assert source.columns.tolist() == ["crm", "Au", "Cu"]
+    assert source.content_key == ingestion.content_key(content, ";")
+    frame = source.load(["crm", "Au"])
+    assert frame["Au"].tolist() == ["0.5", "<0.01"]
+    assert source.load(["crm", "Au"]) is frame
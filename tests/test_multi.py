@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from geoqaqc import batch, censored, multi, synthetic
+from geoqaqc.carryover import KIND_BLANK, KIND_ROUTINE
+from geoqaqc.certificates import CertificateStore
+from geoqaqc.defaults import TOLERANCE_STDDEV
+from geoqaqc.multi import KIND_DUPLICATE
+
+STORE = CertificateStore(synthetic.certificate_table())
+
+
+def test_crm_counts_match_batch_path_per_element():
+    frame = synthetic.assay_table(4000, seed=4)
+    crm_rows = np.flatnonzero(frame["type"].isin(STORE.crm_ids))
+    # Valeurs censurées parmi les CRM : évaluées à leur limite sur les deux chemins
+    frame.loc[crm_rows[:5], "Au_ppm"] = "<0.3"
+    frame.loc[crm_rows[5:8], "Cu_pct"] = ">5"
+    elements = synthetic.WIDE_ELEMENTS
+
+    result = multi.evaluate_multi_element(frame, "type", elements, batch_column="batch", store=STORE,
+                                          tolerance_type=TOLERANCE_STDDEV, tolerance_value=2)
+
+    assert result.crm_count.to_numpy().sum() > 0
+    crm_frame = frame.iloc[crm_rows]
+    for name, rows in crm_frame.groupby("batch"):
+        expected = batch.evaluate_crm_batch(rows, "type", elements, STORE, TOLERANCE_STDDEV, 2)
+        evaluated = expected.count.where(expected.lower_limit.notna(), 0)
+        assert result.crm_count.loc[str(name)].tolist() == evaluated.sum().tolist()
+        assert result.crm_failed.loc[str(name)].tolist() == expected.failed.sum().tolist()
+
+    expected = batch.evaluate_crm_batch(crm_frame, "type", elements, STORE, TOLERANCE_STDDEV, 2)
+    pd.testing.assert_frame_equal(
+        result.crm_lower_limit.sort_index(), expected.lower_limit, check_names=False
+    )
+    assert result.crm_failed.to_numpy().sum() == expected.failed.to_numpy().sum()
+
+
+FRAME = pd.DataFrame({
+    "id": ["E1", "D1", "BL1", "D2", "E2", "D3", "D4", "BL2", "BL3", "BL4"],
+    "type": ["ECH", "DUP", "BLANK", "DUP", "ECH", "DUP", "DUP", "BLANK", "BLANK", "BLANK"],
+    "parent": [None, "E1", None, "E2", None, "E2", "E1", None, None, None],
+    "lot": [1, 1, 1, 1, 2, 2, 2, 2, 2, 2],
+    "Au": ["1.0", "1.2", "<0.01", "9", "2.0", "3.0", "0.8", "0.02", "0.03", "0.5"],
+})
+
+
+def test_duplicate_originals_previous_routine_row():
+    kinds = multi.sample_kinds(FRAME["type"], blank_labels=["BLANK"], duplicate_labels=["DUP"])
+    assert kinds.tolist() == [KIND_ROUTINE, KIND_DUPLICATE, KIND_BLANK, KIND_DUPLICATE, KIND_ROUTINE,
+                              KIND_DUPLICATE, KIND_DUPLICATE, KIND_BLANK, KIND_BLANK, KIND_BLANK]
+    # D2 suit un blanc et D4 un autre duplicata : sans original
+    duplicates, originals = multi.duplicate_originals(FRAME, kinds)
+    assert duplicates.tolist() == [1, 5]
+    assert originals.tolist() == [0, 4]
+
+
+def test_duplicate_originals_from_parent_column():
+    kinds = multi.sample_kinds(FRAME["type"], blank_labels=["BLANK"], duplicate_labels=["DUP"])
+    duplicates, originals = multi.duplicate_originals(FRAME, kinds, "id", "parent")
+    assert duplicates.tolist() == [1, 3, 5, 6]
+    assert originals.tolist() == [0, 4, 4, 0]
+
+
+def test_blanks_and_duplicates_hand_computed():
+    result = multi.evaluate_multi_element(FRAME, "type", ["Au"], batch_column="lot", blank_labels=["BLANK"],
+                                          k=1, duplicate_labels=["DUP"])
+    # Blancs, <0.01 à la moitié de sa limite : LOD = moyenne + 1 écart-type
+    blanks = np.array([0.005, 0.02, 0.03, 0.5])
+    assert result.blank_mean["Au"] == pytest.approx(blanks.mean())
+    assert result.blank_std_dev["Au"] == pytest.approx(blanks.std())
+    assert result.blank_lod["Au"] == pytest.approx(blanks.mean() + blanks.std())
+    assert result.blank_count["Au"].tolist() == [1, 3]
+    assert result.blank_failed["Au"].tolist() == [0, 1]
+
+    # Paires (1.0, 1.2) au lot 1 et (2.0, 3.0) au lot 2 : HARD 9.09 % et 20 %
+    assert result.duplicate_count["Au"].tolist() == [1, 1]
+    assert result.duplicate_failed["Au"].tolist() == [0, 1]
+    np.testing.assert_allclose(result.duplicate_hard_percentile["Au"], [100 * 0.2 / 2.2, 20])
+    assert result.crm_count["Au"].tolist() == [0, 0]
+
+
+def test_hard_percentile_across_pairs():
+    frame = pd.DataFrame({
+        "type": ["ECH", "DUP"] * 3,
+        "Au": [1.0, 1.2, 2.0, 3.0, 1.0, 1.0],
+    })
+    result = multi.evaluate_multi_element(frame, "type", ["Au"], duplicate_labels=["DUP"])
+    # HARD 0, 9.09, 20 : 90e centile interpolé entre 9.09 et 20
+    hard = 100 * 0.2 / 2.2
+    assert result.duplicate_hard_percentile.loc[multi.ALL_BATCHES, "Au"] == pytest.approx(hard + 0.8 * (20 - hard))
+
+
+def test_censored_duplicates_not_evaluated():
+    frame = pd.DataFrame({"type": ["ECH", "DUP", "ECH", "DUP"], "Au": ["<0.01", "0.02", "0.5", "0.6"]})
+    result = multi.evaluate_multi_element(frame, "type", ["Au"], duplicate_labels=["DUP"])
+    assert result.duplicate_count["Au"].tolist() == [1]
+    pairs = multi.duplicate_pair_table(frame, "Au", multi.sample_kinds(frame["type"], duplicate_labels=["DUP"]))
+    assert np.isnan(pairs.iloc[0, 0])
+
+
+def test_rejects_unsupported_censored_method():
+    with pytest.raises(ValueError):
+        multi.evaluate_multi_element(FRAME, "type", ["Au"], censored_method=censored.SUBSTITUTE_KAPLAN_MEIER)
@@ -0,0 +1,97 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from geoqaqc import precision
+
+
+def test_rma_on_exact_lines():
+    x = np.array([0.5, 1.0, 2.0, 4.0])
+    assert precision.rma_regression(x, 2 * x + 1) == pytest.approx((2, 1, 1))
+    assert precision.rma_regression(x, 2 - 3 * x) == pytest.approx((-3, 2, -1))
+
+
+def test_rma_hand_computed():
+    # Sxx = 2, Syy = 14/3, Sxy = 2
+    slope, intercept, r = precision.rma_regression([1, 2, 3], [2, 1, 4])
+    assert slope == pytest.approx(np.sqrt(7 / 3))
+    assert intercept == pytest.approx(7 / 3 - 2 * np.sqrt(7 / 3))
+    assert r == pytest.approx(2 / np.sqrt(28 / 3))
+
+
+def test_rma_constant_input_is_nan_without_warning():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        slope, intercept, r = precision.rma_regression([1, 1, 1], [1, 2, 3])
+    assert np.isnan(slope) and np.isnan(intercept) and np.isnan(r)
+
+
+def test_half_relative_difference():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        hrd = precision.half_relative_difference([1, 2, 0, -1], [3, 2, 0, 1])
+    np.testing.assert_array_equal(hrd, [50, 0, np.nan, np.nan])
+
+
+def test_thompson_howarth_hand_computed():
+    # Deux groupes de 3 paires : teneur 1 (|d| médian 0.2) et teneur 3 (|d| médian 0.4)
+    means = np.array([1, 1, 1, 3, 3, 3], dtype=float)
+    diffs = np.array([0.1, 0.3, 0.2, 0.5, 0.3, 0.4])
+    result = precision.thompson_howarth(means - diffs / 2, means + diffs / 2, group_size=3)
+    np.testing.assert_allclose(result.group_means, [1, 3])
+    np.testing.assert_allclose(result.group_medians, [0.2, 0.4])
+    # médiane = 0.1 + 0.1 c
+    assert result.sigma0 == pytest.approx(0.1 / precision.TH_MEDIAN_FACTOR)
+    assert result.k == pytest.approx(0.1 / precision.TH_MEDIAN_FACTOR)
+    assert result.precision_pct(2) == pytest.approx(200 * 0.3 / precision.TH_MEDIAN_FACTOR / 2)
+
+
+def test_thompson_howarth_needs_two_groups():
+    with pytest.raises(ValueError):
+        precision.thompson_howarth(np.arange(5.0), np.arange(5.0), group_size=3)
+
+
+def test_bootstrap_matches_explicit_resamples():
+    rng = np.random.default_rng(11)
+    x = rng.lognormal(0, 1, 40)
+    y = x * rng.normal(1, 0.1, 40)
+    result = precision.bootstrap_regression(x, y, n_resamples=30, seed=5, batch_size=30)
+
+    # Mêmes tirages que le lot unique, régression recalculée sur chaque rééchantillonnage
+    indices = np.random.default_rng(5).integers(0, 40, size=(30, 40), dtype=np.int32)
+    expected = np.array([precision.rma_regression(x[i], y[i])[:2] for i in indices])
+    np.testing.assert_allclose(result.slopes, expected[:, 0], rtol=1e-9)
+    np.testing.assert_allclose(result.intercepts, expected[:, 1], rtol=1e-9, atol=1e-12)
+
+
+def test_bootstrap_ols_matches_polyfit():
+    x = np.array([1.0, 2.0, 4.0, 5.0, 7.0])
+    y = np.array([1.2, 1.9, 4.4, 4.8, 7.5])
+    result = precision.bootstrap_regression(x, y, n_resamples=20, method=precision.REGRESSION_OLS,
+                                            seed=2, batch_size=20)
+    indices = np.random.default_rng(2).integers(0, 5, size=(20, 5), dtype=np.int32)
+    for slope, i in zip(result.slopes, indices):
+        if np.ptp(x[i]) > 0:
+            assert slope == pytest.approx(np.polyfit(x[i], y[i], 1)[0])
+
+
+def test_bootstrap_same_seed_same_interval():
+    x = np.linspace(1, 10, 25)
+    y = x + np.sin(x)
+    first = precision.bootstrap_regression(x, y, n_resamples=200, seed=1)
+    second = precision.bootstrap_regression(x, y, n_resamples=200, seed=1)
+    np.testing.assert_array_equal(first.slopes, second.slopes)
+    assert first.slope_interval == second.slope_interval
+
+
+def test_bootstrap_perfect_line_degenerate_interval():
+    x = np.linspace(0.1, 5, 30)
+    result = precision.bootstrap_regression(x, 2 * x + 1, n_resamples=100, seed=0)
+    assert result.slope_interval == pytest.approx((2, 2))
+    assert result.intercept_interval == pytest.approx((1, 1))
+
+
+def test_bootstrap_needs_three_pairs():
+    with pytest.raises(ValueError):
+        precision.bootstrap_regression([1, 2], [1, 2])
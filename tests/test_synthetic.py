@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from geoqaqc import synthetic
+
+GENERATORS = [
+    synthetic.crm_results,
+    synthetic.blank_results,
+    synthetic.duplicate_pairs,
+    synthetic.assay_table,
+]
+
+
+@pytest.mark.parametrize("generate", GENERATORS)
+def test_same_seed_same_data(generate):
+    pd.testing.assert_frame_equal(generate(500, seed=7), generate(500, seed=7))
+
+
+@pytest.mark.parametrize("generate", GENERATORS)
+def test_other_seed_other_data(generate):
+    assert not generate(500, seed=7).equals(generate(500, seed=8))
+
+
+@pytest.mark.parametrize("generate", GENERATORS)
+def test_row_count(generate):
+    assert len(generate(1234)) == 1234
+
+
+def test_crm_results():
+    frame = synthetic.crm_results(2000)
+    assert list(frame.columns) == ["sample_id", "crm_id", "sequence", "batch"] + synthetic.ELEMENTS
+    assert set(frame["crm_id"]) == set(synthetic.CERTIFIED_VALUES)
+    assert frame["sample_id"].is_unique
+    assert (frame["sequence"] == np.arange(1, 2001)).all()
+    assert frame["batch"].value_counts().max() == synthetic.BATCH_SIZE
+    assert (frame[synthetic.ELEMENTS] >= 0).all().all()
+
+
+def test_blank_results_censored_below_detection_limit():
+    frame = synthetic.blank_results(2000)
+    censored = frame["Au_ppm"] == f"<{synthetic.DETECTION_LIMIT:g}"
+    assert censored.any() and not censored.all()
+    detected = frame.loc[~censored, "Au_ppm"].astype(float)
+    assert (detected >= synthetic.DETECTION_LIMIT).all()
+
+
+def test_duplicate_pairs():
+    frame = synthetic.duplicate_pairs(2000)
+    assert list(frame.columns) == ["sample_id", "original", "duplicate"]
+    assert (frame[["original", "duplicate"]] >= 0).all().all()
+
+
+def test_assay_table_control_kinds():
+    frame = synthetic.assay_table(5000)
+    assert list(frame.columns) == ["sample_id", "type", "parent_id", "batch"] + synthetic.WIDE_ELEMENTS
+    labels = {synthetic.ROUTINE_LABEL, synthetic.BLANK_LABEL, synthetic.DUPLICATE_LABEL} | set(synthetic.CERTIFIED_VALUES)
+    assert set(frame["type"]) == labels
+    assert frame["batch"].value_counts().max() == synthetic.BATCH_SIZE
+
+    counts = frame["type"].value_counts()
+    assert counts[synthetic.ROUTINE_LABEL] > len(frame) / 2
+    assert counts[synthetic.BLANK_LABEL] == pytest.approx(0.05 * len(frame), rel=0.3)
+
+
+def test_assay_table_duplicates_follow_their_routine_original():
+    frame = synthetic.assay_table(5000)
+    duplicates = np.flatnonzero(frame["type"] == synthetic.DUPLICATE_LABEL)
+    assert duplicates.size and duplicates.min() > 0
+    assert (frame["type"].to_numpy()[duplicates - 1] == synthetic.ROUTINE_LABEL).all()
+    assert (frame["parent_id"].to_numpy()[duplicates] == frame["sample_id"].to_numpy()[duplicates - 1]).all()
+    assert frame["parent_id"].notna().sum() == duplicates.size